@@ -0,0 +1,247 @@
+"""
+Archiwizacja starych, zamkniętych wniosków i ich PDF-ów.
+
+Wnioski w statusie Completed/Rejected z miesiącem rozliczeniowym starszym
+niż N miesięcy są przenoszone z gorącej tabeli `wniosek` do
+`wniosek_archive` (pełny rekord jako JSON), a ich PDF-y do archiwów ZIP
+per miesiąc (PDF_ARCHIVE_DIR/pdf_RRRR-MM.zip). Lista, statystyki i eksport
+działają dalej tylko na gorącej tabeli; szczegóły i PDF zarchiwizowanego
+wniosku są czytane z archiwum (read_archived, read_archived_pdf).
+
+Uruchamiane okresowo (np. cron):
+
+    python archive.py --older-than-months 12
+
+Kolejność operacji jest bezpieczna przy przerwaniu: PDF-y najpierw trafiają
+do ZIP-a, potem w jednej transakcji wiersze przechodzą do archiwum, a na
+końcu usuwane są oryginalne pliki PDF.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import zipfile
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, case, delete, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from dates import add_months, month_start
+from etags import bump_versions
+from models import Wniosek, WniosekArchive
+
+logger = logging.getLogger("woz.archive")
+
+PDF_OUTPUT_DIR = os.getenv("PDF_OUTPUT_DIR", "./generated_pdfs")
+PDF_ARCHIVE_DIR = os.getenv("PDF_ARCHIVE_DIR", "./pdf_archive")
+CLOSED_STATUSES = ["Completed", "Rejected"]
+
+
+# ============== PDF ==============
+
+def find_pdfs(pdf_dir: str, wniosek_id: int) -> List[str]:
+    """Nazwy plików PDF wniosku (najnowszy na końcu)."""
+    if not os.path.exists(pdf_dir):
+        return []
+    prefix = f"wniosek_{wniosek_id}_"
+    return sorted(f for f in os.listdir(pdf_dir) if f.startswith(prefix) and f.endswith(".pdf"))
+
+
+def index_pdfs(pdf_dir: str) -> Dict[int, List[str]]:
+    """Wszystkie PDF-y wniosków z jednego listowania katalogu: {id: nazwy (najnowsza na końcu)}."""
+    if not os.path.exists(pdf_dir):
+        return {}
+    index: Dict[int, List[str]] = {}
+    for name in sorted(os.listdir(pdf_dir)):
+        parts = name.split("_")
+        if name.endswith(".pdf") and parts[0] == "wniosek" and len(parts) > 2 and parts[1].isdigit():
+            index.setdefault(int(parts[1]), []).append(name)
+    return index
+
+
+def pdf_archive_name(billing_month: Optional[date]) -> str:
+    return f"pdf_{billing_month:%Y-%m}.zip" if billing_month else "pdf_bez-miesiaca.zip"
+
+
+def _archive_pdfs(pdf_dir: str, archive_dir: str, files: Dict[str, List[str]]) -> None:
+    """Dopisuje PDF-y do archiwów ZIP ({nazwa archiwum: [pliki]}), pomijając już obecne."""
+    os.makedirs(archive_dir, exist_ok=True)
+    for archive_name, names in files.items():
+        path = os.path.join(archive_dir, archive_name)
+        with zipfile.ZipFile(path, "a", compression=zipfile.ZIP_DEFLATED, compresslevel=9) as zf:
+            present = set(zf.namelist())
+            for name in names:
+                if name not in present:
+                    zf.write(os.path.join(pdf_dir, name), arcname=name)
+        with open(path, "rb") as f:
+            os.fsync(f.fileno())
+
+
+def read_archived_pdf(archive_dir: str, archived: WniosekArchive) -> Optional[tuple]:
+    """(nazwa, bajty) najnowszego PDF-u z archiwum ZIP albo None."""
+    if not archived.pdf_archive or not archived.pdf_names:
+        return None
+    path = os.path.join(archive_dir, archived.pdf_archive)
+    if not os.path.exists(path):
+        return None
+    name = archived.pdf_names[-1]
+    with zipfile.ZipFile(path) as zf:
+        try:
+            return name, zf.read(name)
+        except KeyError:
+            return None
+
+
+# ============== WNIOSKI ==============
+
+def _jsonable(row) -> dict:
+    return {
+        key: value.isoformat() if isinstance(value, (date, datetime)) else value
+        for key, value in row.items()
+    }
+
+
+async def read_archived(session: AsyncSession, wniosek_id: int) -> Optional[WniosekArchive]:
+    result = await session.execute(select(WniosekArchive).where(WniosekArchive.id == wniosek_id))
+    return result.scalars().first()
+
+
+def archive_cutoff(older_than_months: int, today: Optional[date] = None) -> date:
+    """Pierwszy miesiąc, który NIE jest archiwizowany."""
+    return add_months(month_start(today or date.today()), -older_than_months)
+
+
+async def archive_batch(
+    session: AsyncSession,
+    cutoff: date,
+    batch_size: int = 1000,
+    pdf_dir: str = PDF_OUTPUT_DIR,
+    archive_dir: str = PDF_ARCHIVE_DIR,
+) -> int:
+    """
+    Archiwizuje jedną paczkę wniosków sprzed `cutoff`; zwraca liczbę
+    zarchiwizowanych (0 = nie ma już nic do archiwizacji). Wnioski bez
+    billing_month są oceniane po dacie utworzenia. DELETE ... RETURNING
+    sprawdza status i wersję z odczytu - wniosek ponownie otwarty w
+    międzyczasie zostaje w gorącej tabeli.
+    """
+    while True:
+        selected, archived = await _archive_once(session, cutoff, batch_size, pdf_dir, archive_dir)
+        # Cała paczka zmieniona w trakcie - następny SELECT widzi już nowe stany
+        if archived or not selected:
+            return archived
+
+
+async def _archive_once(session: AsyncSession, cutoff: date, batch_size: int, pdf_dir: str, archive_dir: str) -> tuple:
+    statement = (
+        select(*Wniosek.__table__.columns)
+        .where(
+            Wniosek.status.in_(CLOSED_STATUSES),
+            or_(
+                Wniosek.billing_month < cutoff,
+                and_(
+                    Wniosek.billing_month.is_(None),
+                    Wniosek.created_date < datetime.combine(cutoff, datetime.min.time()),
+                ),
+            ),
+        )
+        .order_by(Wniosek.id)
+        .limit(batch_size)
+    )
+    rows = (await session.execute(statement)).mappings().all()
+    if not rows:
+        return 0, 0
+
+    # Jedno listowanie katalogu na paczkę zamiast jednego na wiersz
+    index = await asyncio.to_thread(index_pdfs, pdf_dir)
+    pdfs = {row["id"]: index.get(row["id"], []) for row in rows}
+    by_archive: Dict[str, List[str]] = {}
+    for row in rows:
+        if pdfs[row["id"]]:
+            by_archive.setdefault(pdf_archive_name(row["billing_month"]), []).extend(pdfs[row["id"]])
+    if by_archive:
+        await asyncio.to_thread(_archive_pdfs, pdf_dir, archive_dir, by_archive)
+
+    # Usuwane są tylko wiersze niezmienione od odczytu (ta sama wersja) -
+    # wniosek ponownie otwarty w międzyczasie zostaje w gorącej tabeli
+    versions = {row["id"]: row["version"] for row in rows}
+    deleted = set((await session.execute(
+        delete(Wniosek)
+        .where(
+            Wniosek.id.in_(list(versions)),
+            Wniosek.status.in_(CLOSED_STATUSES),
+            Wniosek.version == case(versions, value=Wniosek.id),
+        )
+        .returning(Wniosek.id)
+    )).scalars().all())
+    rows = [row for row in rows if row["id"] in deleted]
+    pdfs = {wniosek_id: names for wniosek_id, names in pdfs.items() if wniosek_id in deleted}
+    if not rows:
+        await session.commit()
+        return len(versions), 0
+
+    await session.execute(insert(WniosekArchive).values([
+        {
+            "id": row["id"],
+            "owner": row["owner"],
+            "billing_month": row["billing_month"],
+            "status": row["status"],
+            "data": _jsonable(row),
+            "pdf_archive": pdf_archive_name(row["billing_month"]) if pdfs[row["id"]] else None,
+            "pdf_names": pdfs[row["id"]],
+        }
+        for row in rows
+    ]))
+    await bump_versions(session, {row["owner"] for row in rows})
+    await session.commit()
+
+    for names in pdfs.values():
+        for name in names:
+            try:
+                os.remove(os.path.join(pdf_dir, name))
+            except FileNotFoundError:
+                pass
+    return len(versions), len(rows)
+
+
+async def archive_wnioski(session: AsyncSession, older_than_months: int, batch_size: int = 1000, **kwargs) -> int:
+    """Archiwizuje paczkami wszystkie kwalifikujące się wnioski; zwraca ich liczbę."""
+    cutoff = archive_cutoff(older_than_months)
+    total = 0
+    while True:
+        done = await archive_batch(session, cutoff, batch_size, **kwargs)
+        if not done:
+            break
+        total += done
+        logger.info("Zarchiwizowano paczkę wniosków", extra={"batch": done, "total": total})
+    return total
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Archiwizacja starych, zamkniętych wniosków")
+    parser.add_argument("--older-than-months", type=int,
+                        default=int(os.getenv("ARCHIVE_AFTER_MONTHS", "12")),
+                        help="Archiwizuj wnioski z miesiącem rozliczeniowym starszym niż N miesięcy")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Wnioski na transakcję")
+    return parser.parse_args(argv)
+
+
+async def main(argv=None):
+    from database import SessionLocal, dispose_engines
+    from logging_config import setup_logging, shutdown_logging
+
+    args = parse_args(argv)
+    setup_logging("archive")
+    try:
+        async with SessionLocal() as session:
+            total = await archive_wnioski(session, args.older_than_months, args.batch_size)
+        logger.info("Archiwizacja zakończona", extra={"archived": total})
+    finally:
+        await dispose_engines()
+        shutdown_logging()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -7,15 +7,15 @@ import os
 from datetime import datetime, timedelta
 from typing import Optional
 
-import bcrypt
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import JWTError, jwt
 from pydantic import BaseModel, EmailStr, field_validator
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
 
 from database import get_session
+from metrics import BCRYPT_DURATION
 from models import User
 
 # Konfiguracja JWT
@@ -28,6 +28,12 @@ REFRESH_TOKEN_EXPIRE_DAYS = 7
 security = HTTPBearer()
 
 
+# bcrypt i python-jose importowane przy pierwszym użyciu - nie spowalniają
+# startu API (sam import jose z backendem kryptograficznym to ~50 ms).
+# Endpointy wołają bcrypt w puli wątków: ~200 ms na hash/weryfikację
+# blokowałoby pętlę zdarzeń (i wszystkie inne żądania) - patrz loadshed.py
+
+
 class UserRegister(BaseModel):
     """Schema do rejestracji użytkownika."""
     email: EmailStr
@@ -74,21 +80,26 @@ class RefreshTokenRequest(BaseModel):
 
 def hash_password(password: str) -> str:
     """Hashuje hasło używając bcrypt."""
+    import bcrypt
     password_bytes = password.encode('utf-8')
     salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password_bytes, salt)
+    with BCRYPT_DURATION.time(operation="hash"):
+        hashed = bcrypt.hashpw(password_bytes, salt)
     return hashed.decode('utf-8')
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Weryfikuje hasło."""
+    import bcrypt
     password_bytes = plain_password.encode('utf-8')
     hashed_bytes = hashed_password.encode('utf-8')
-    return bcrypt.checkpw(password_bytes, hashed_bytes)
+    with BCRYPT_DURATION.time(operation="verify"):
+        return bcrypt.checkpw(password_bytes, hashed_bytes)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Tworzy access token JWT."""
+    from jose import jwt
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({"exp": expire, "type": "access"})
@@ -97,6 +108,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 def create_refresh_token(data: dict) -> str:
     """Tworzy refresh token JWT."""
+    from jose import jwt
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
     to_encode.update({"exp": expire, "type": "refresh"})
@@ -105,6 +117,7 @@ def create_refresh_token(data: dict) -> str:
 
 def decode_token(token: str) -> dict:
     """Dekoduje token JWT."""
+    from jose import JWTError, jwt
     try:
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
         return payload
@@ -201,7 +214,7 @@ async def register(
     # Utwórz użytkownika
     new_user = User(
         email=user_data.email,
-        password_hash=hash_password(user_data.password),
+        password_hash=await run_in_threadpool(hash_password, user_data.password),
         full_name=user_data.full_name,
         role="user"
     )
@@ -235,7 +248,7 @@ async def login(
     """Logowanie użytkownika."""
     user = await get_user_by_email(session, credentials.email)
     
-    if not user or not verify_password(credentials.password, user.password_hash):
+    if not user or not await run_in_threadpool(verify_password, credentials.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Nieprawidłowy email lub hasło"
@@ -0,0 +1,115 @@
+"""
+Cache w pamięci procesu dla gorących odczytów (szczegóły wniosku, statystyki).
+
+Wpis jest ważny tylko dla wersji danych, przy której powstał - dla
+szczegółów wniosku wersji wiersza (`Wniosek.version`), dla statystyk wersji
+`change_version`; obie są podbijane przez każdy zapis (API, worker,
+archiwizacja) i z nich liczony jest ETag. Odczyt wersji i tak jest potrzebny do
+ETagu, więc trafienie w cache zastępuje właściwe zapytanie, a zapis w innym
+procesie unieważnia wpisy bez żadnej komunikacji między procesami. TTL
+i limit rozmiaru (LRU) ograniczają pamięć.
+
+Single-flight: równoczesne chybienia dla tego samego klucza i wersji czekają
+na jedno zapytanie zamiast obciążać pulę połączeń N razy.
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+from metrics import CACHE_REQUESTS
+
+CACHE_TTL = float(os.getenv("CACHE_TTL", "30"))
+WNIOSEK_CACHE_SIZE = int(os.getenv("WNIOSEK_CACHE_SIZE", "1024"))
+
+
+class VersionedCache:
+    """LRU z TTL, wpisy powiązane z wersją danych, ładowanie single-flight."""
+
+    def __init__(self, name: str, maxsize: int, ttl: float = CACHE_TTL):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[Hashable, float, Any]]" = OrderedDict()
+        self._inflight: Dict[Tuple[Hashable, Hashable], asyncio.Future] = {}
+
+    def get(self, key: Hashable, version: Hashable, default=None):
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        entry_version, expires_at, value = entry
+        if entry_version != version or expires_at < time.monotonic():
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, version: Hashable, value: Any) -> None:
+        self._entries[key] = (version, time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def get_or_load(self, key: Hashable, version: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Wartość z cache albo wynik `loader()`; równoległe wywołania dla tego
+        samego klucza i wersji współdzielą jedno wywołanie loadera.
+        """
+        missing = object()
+        while True:
+            value = self.get(key, version, missing)
+            if value is not missing:
+                CACHE_REQUESTS.inc(cache=self.name, result="hit")
+                return value
+
+            flight = (key, version)
+            future = self._inflight.get(flight)
+            if future is None:
+                break
+            CACHE_REQUESTS.inc(cache=self.name, result="coalesced")
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # Anulowane zostało żądanie prowadzące, nie to - próbujemy ponownie
+                if future.cancelled() and not asyncio.current_task().cancelling():
+                    continue
+                raise
+
+        CACHE_REQUESTS.inc(cache=self.name, result="miss")
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[flight] = future
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Wyjątek odbierają czekający; bez nich nie logujemy "never retrieved"
+            future.exception()
+            raise
+        else:
+            self.set(key, version, value)
+            future.set_result(value)
+            return value
+        finally:
+            del self._inflight[flight]
+
+
+# Szczegóły wniosku: id -> treść odpowiedzi (dict) albo None (404)
+WNIOSEK_CACHE = VersionedCache("wniosek", WNIOSEK_CACHE_SIZE)
+# Statystyki: kilka kluczy (zestawy parametrów)
+STATS_CACHE = VersionedCache("stats", 64)
+
+
+def clear_caches() -> None:
+    WNIOSEK_CACHE.clear()
+    STATS_CACHE.clear()
@@ -0,0 +1,212 @@
+"""
+Negocjowana kompresja odpowiedzi HTTP (zstd / br / gzip).
+
+Middleware ASGI:
+- wybiera kodowanie na podstawie Accept-Encoding (z wagami q),
+- pomija małe odpowiedzi (< COMPRESSION_MIN_BYTES) i typy już skompresowane (PDF),
+- odpowiedzi strumieniowe (eksporty) kompresuje kawałek po kawałku z flush,
+  więc klient dostaje dane na bieżąco,
+- bardzo duże bufory (>= COMPRESSION_OFFLOAD_BYTES) kompresuje w wątku,
+  żeby nie blokować pętli zdarzeń.
+
+brotli i zstandard są opcjonalne - bez nich dostępny jest tylko gzip.
+"""
+
+import os
+import zlib
+from typing import Callable, Dict, Optional
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - zależność opcjonalna
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zależność opcjonalna
+    zstandard = None
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "text/",
+)
+
+
+class _Gzip:
+    def __init__(self, level: int):
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.flush(zlib.Z_FINISH)
+
+
+class _Brotli:
+    def __init__(self, level: int):
+        self._obj = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data) + self._obj.flush()
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+
+class _Zstd:
+    def __init__(self, level: int):
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data) + self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+def available_encodings() -> Dict[str, Callable]:
+    """Kodowania w kolejności preferencji serwera."""
+    encodings = {}
+    if zstandard is not None:
+        encodings["zstd"] = lambda: _Zstd(int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3")))
+    if brotli is not None:
+        encodings["br"] = lambda: _Brotli(int(os.getenv("COMPRESSION_BROTLI_LEVEL", "4")))
+    encodings["gzip"] = lambda: _Gzip(int(os.getenv("COMPRESSION_GZIP_LEVEL", "6")))
+    return encodings
+
+
+def negotiate(accept_encoding: str, encodings: Dict[str, Callable]) -> Optional[str]:
+    """Wybiera kodowanie z Accept-Encoding (q=0 wyklucza, '*' akceptuje resztę)."""
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+    best, best_q = None, 0.0
+    for name in encodings:
+        q = weights.get(name, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def _compress_whole(factory: Callable, body: bytes) -> bytes:
+    compressor = factory()
+    return compressor.compress(body) + compressor.finish()
+
+
+class CompressionMiddleware:
+    """Middleware ASGI kompresujące odpowiedzi (pełne i strumieniowe)."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: Optional[int] = None,
+        offload_size: Optional[int] = None,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size if minimum_size is not None else int(
+            os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+        self.offload_size = offload_size if offload_size is not None else int(
+            os.getenv("COMPRESSION_OFFLOAD_BYTES", str(1024 * 1024)))
+        self.encodings = available_encodings()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """Stan kompresji jednej odpowiedzi."""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.factory = middleware.encodings[encoding]
+        self.inner_send = send
+        self.start_message: Optional[Message] = None
+        self.compressor = None
+        self.passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            if "content-encoding" in headers or not content_type.startswith(COMPRESSIBLE_TYPES):
+                self.passthrough = True
+                await self.inner_send(message)
+            else:
+                # Decyzja dopiero po pierwszym kawałku treści
+                self.start_message = message
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.inner_send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start_message is not None:
+            start, self.start_message = self.start_message, None
+            headers = MutableHeaders(raw=start["headers"])
+            if not more_body:
+                # Cała odpowiedź w jednym kawałku
+                if len(body) < self.middleware.minimum_size:
+                    self.passthrough = True
+                    await self.inner_send(start)
+                    await self.inner_send(message)
+                    return
+                body = await self._compress(body)
+                headers["Content-Encoding"] = self.encoding
+                headers["Content-Length"] = str(len(body))
+                headers.add_vary_header("Accept-Encoding")
+                await self.inner_send(start)
+                await self.inner_send({"type": "http.response.body", "body": body})
+                return
+            # Odpowiedź strumieniowa
+            self.compressor = self.factory()
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if "content-length" in headers:
+                del headers["Content-Length"]
+            await self.inner_send(start)
+
+        chunk = await self._compress_chunk(body) if body else b""
+        if not more_body:
+            chunk += self.compressor.finish()
+        await self.inner_send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    async def _compress(self, body: bytes) -> bytes:
+        if len(body) >= self.middleware.offload_size:
+            return await anyio.to_thread.run_sync(_compress_whole, self.factory, body)
+        return _compress_whole(self.factory, body)
+
+    async def _compress_chunk(self, body: bytes) -> bytes:
+        if len(body) >= self.middleware.offload_size:
+            return await anyio.to_thread.run_sync(self.compressor.compress, body)
+        return self.compressor.compress(body)
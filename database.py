@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+from sqlalchemy import inspect
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlmodel import SQLModel
 from typing import AsyncGenerator
@@ -5,27 +7,106 @@ import os
 
 # Import models to ensure they're registered with SQLModel.metadata
 # This must happen before init_db() is called
-from models import Wniosek, User  # noqa: F401
+from models import Wniosek, WniosekHours, User, ChangeVersion  # noqa: F401
+from dates import migrate_date_columns
+from metrics import instrument_engine
+from sqlite_profile import SQLITE_READERS, configure_sqlite, profile_enabled, routing_session_class
 
 # SQLite dla developmentu lokalnego (działa out-of-the-box na Windows)
 # PostgreSQL dla produkcji (ustaw DATABASE_URL)
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./wnioski.db")
 
 
-engine = create_async_engine(DATABASE_URL, echo=True)
+# Logi SQL włącza się przez DB_ECHO=true (patrz logging_config.setup_logging),
+# dzięki czemu przechodzą przez nieblokujący QueueHandler zamiast echo na stdout
+if profile_enabled(DATABASE_URL):
+    # SQLite w WAL: pula czytelników + jedno połączenie piszące (sqlite_profile.py)
+    engine = create_async_engine(DATABASE_URL, echo=False, pool_size=SQLITE_READERS, max_overflow=0)
+    write_engine = create_async_engine(DATABASE_URL, echo=False, pool_size=1, max_overflow=0)
+    configure_sqlite(engine, writer=False)
+    configure_sqlite(write_engine, writer=True)
+    session_options = {"sync_session_class": routing_session_class(engine, write_engine)}
+else:
+    engine = write_engine = create_async_engine(DATABASE_URL, echo=False)
+    session_options = {}
+instrument_engine(engine)
+instrument_engine(write_engine)
 
 SessionLocal = async_sessionmaker(
     bind=engine,
     autocommit=False,
     autoflush=False,
-    expire_on_commit=False
+    expire_on_commit=False,
+    **session_options
 )
 
 
+def create_all_enabled() -> bool:
+    """
+    Czy tworzyć schemat przy starcie. Domyślnie tylko dla deweloperskiego
+    SQLite; produkcyjna baza jest zarządzana migracjami (alembic upgrade head),
+    a repliki API startują bez DDL. DB_CREATE_ALL=true/false wymusza wybór.
+    """
+    flag = os.getenv("DB_CREATE_ALL")
+    if flag is not None:
+        return flag.lower() in ("1", "true", "yes")
+    return engine.dialect.name == "sqlite"
+
+
+def _add_version_column(connection) -> None:
+    # Jak migracja 0003 - dla deweloperskich baz sprzed kolumny version
+    columns = {column["name"] for column in inspect(connection).get_columns("wniosek")}
+    if "version" not in columns:
+        connection.exec_driver_sql("ALTER TABLE wniosek ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+
+
+def _create_missing_indexes(connection) -> None:
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
 async def init_db():
-    async with engine.begin() as conn:
+    if not create_all_enabled():
+        return
+    # Rejestrują DDL wyszukiwania (FTS5 / tsvector) i godzin (triggery)
+    # wykonywany po create_all; import tutaj - worker nie potrzebuje ich wcale
+    import hours
+    import search
+
+    async with write_engine.begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
+        await conn.run_sync(_add_version_column)
+        # create_all nie dodaje nowych indeksów do istniejących tabel
+        await conn.run_sync(_create_missing_indexes)
+        # Tekstowe daty z wcześniejszych wersji -> DATE
+        await conn.run_sync(migrate_date_columns)
+        # Dla baz utworzonych przed wprowadzeniem wyszukiwania (idempotentne)
+        await conn.run_sync(search.create_search_schema)
+        await conn.run_sync(hours.create_hours_schema)
+
+
+async def dispose_engines() -> None:
+    await engine.dispose()
+    if write_engine is not engine:
+        await write_engine.dispose()
+
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     async with SessionLocal() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+
+@asynccontextmanager
+async def open_session(app=None) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Sesja poza Depends() - np. dla middleware i odpowiedzi strumieniowych,
+    które żyją dłużej niż zależności endpointu. Respektuje
+    app.dependency_overrides[get_session] (używane w testach).
+    """
+    factory = app.dependency_overrides.get(get_session, get_session) if app is not None else get_session
+    generator = factory()
+    try:
+        yield await generator.__anext__()
+    finally:
+        await generator.aclose()
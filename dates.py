@@ -0,0 +1,75 @@
+"""
+Kolumny dat wniosku (billing_month, premia_start, premia_end).
+
+Dawniej przechowywane jako tekst "RRRR-MM-DD"; teraz są typu DATE, więc
+zakresy miesięcy korzystają z indeksu (i z przycinania partycji na
+PostgreSQL, patrz partitioning.py). migrate_date_columns() przenosi
+istniejące bazy na nowy typ - idempotentnie, przy starcie aplikacji (dev);
+produkcyjny PostgreSQL przechodzi migracją 0004 bez przepisywania tabeli
+pod blokadą.
+"""
+
+from datetime import date
+from typing import List, Tuple
+
+from sqlalchemy import bindparam, text
+
+DATE_COLUMNS = ["billing_month", "premia_start", "premia_end"]
+
+# Tekst "RRRR-MM-DD..." lub "RRRR-MM" (pierwszy dzień miesiąca); resztę zamieniamy na NULL
+PG_DATE_USING = (
+    "CASE WHEN {col} ~ '^\\d{{4}}-\\d{{2}}-\\d{{2}}' THEN substr({col}, 1, 10)::date "
+    "WHEN {col} ~ '^\\d{{4}}-\\d{{2}}$' THEN ({col} || '-01')::date END"
+)
+
+
+def month_start(value: date) -> date:
+    return value.replace(day=1)
+
+
+def add_months(value: date, months: int) -> date:
+    """Pierwszy dzień miesiąca przesuniętego o `months`."""
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_range(value: date) -> Tuple[date, date]:
+    """Półotwarty zakres [początek miesiąca, początek następnego)."""
+    start = month_start(value)
+    return start, add_months(start, 1)
+
+
+def pg_text_date_columns(connection) -> List[str]:
+    """Kolumny dat wciąż przechowywane jako tekst (PostgreSQL)."""
+    return list(connection.execute(text(
+        "SELECT column_name FROM information_schema.columns "
+        "WHERE table_name = 'wniosek' AND column_name IN :columns "
+        "AND data_type IN ('character varying', 'text')"
+    ).bindparams(bindparam("columns", expanding=True)), {"columns": DATE_COLUMNS}).scalars())
+
+
+def sqlite_normalize_statement(column: str):
+    """Tekst dat w formacie RRRR-MM-DD dla wniosków o id z (:first_id, :last_id]."""
+    return text(
+        f"UPDATE wniosek SET {column} = COALESCE(date({column}), date({column} || '-01')) "
+        f"WHERE {column} IS NOT NULL AND {column} IS NOT date({column}) "
+        f"AND id > :first_id AND id <= :last_id"
+    )
+
+
+def migrate_date_columns(connection) -> None:
+    """Zamienia tekstowe kolumny dat na DATE (PostgreSQL) lub normalizuje tekst (SQLite)."""
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        for column in pg_text_date_columns(connection):
+            connection.execute(text(
+                f"ALTER TABLE wniosek ALTER COLUMN {column} TYPE date "
+                f"USING {PG_DATE_USING.format(col=column)}"
+            ))
+    elif dialect == "sqlite":
+        # SQLite nie ma typu DATE - SQLAlchemy czyta tekst "RRRR-MM-DD",
+        # więc wystarczy poprawić wartości w innym formacie
+        for column in DATE_COLUMNS:
+            connection.execute(sqlite_normalize_statement(column), {"first_id": 0, "last_id": 2**62})
+    # Indeks dla baz utworzonych przed zmianą (create_all nie dodaje indeksów do istniejących tabel)
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_wniosek_billing_month ON wniosek (billing_month)"))
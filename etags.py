@@ -0,0 +1,67 @@
+"""
+ETagi i żądania warunkowe dla list, szczegółów i statystyk wniosków.
+
+ETag wynika z wersji zmian (tabela `change_version`) oraz parametrów
+zapytania. Sprawdzenie If-None-Match kosztuje jeden odczyt po kluczu
+głównym zamiast pełnego zapytania - przy braku zmian odpowiadamy 304.
+
+Zapis podbija tylko wersje swoich właścicieli - nie ma jednego gorącego
+wiersza, o który walczą wszystkie transakcje zapisu. Wersja całej tabeli
+(lista payroll, statystyki) to suma wersji właścicieli: rośnie przy każdym
+zatwierdzonym podbiciu, także gdy transakcje kończą się w innej kolejności
+niż zaczęły (max(version) mógłby wtedy stać w miejscu).
+
+Moduł importują też worker i archiwizacja (bump_versions), więc nie zależy
+od FastAPI - nagłówki i odpowiedź 304 są w main.py.
+"""
+
+import hashlib
+from typing import Iterable, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import ChangeVersion
+
+TABLE_SCOPE = "wniosek"
+
+
+def owner_scope(owner: Optional[str]) -> str:
+    """Zakres wersji dla wniosków jednego właściciela ("owner:" - bez właściciela)."""
+    return f"owner:{owner or ''}"
+
+
+async def bump_versions(session: AsyncSession, owners: Iterable[Optional[str]] = ()) -> None:
+    """
+    Podbija wersje podanych właścicieli (a przez to wersję tabeli).
+    Wywoływać przed commit, w tej samej transakcji co zapis wniosku.
+    """
+    # Stała kolejność - równoległe transakcje blokują wiersze bez zakleszczeń
+    scopes = sorted({owner_scope(o) for o in owners}) or [owner_scope(None)]
+    dialect = session.bind.dialect.name if session.bind is not None else "sqlite"
+    insert = pg_insert if dialect == "postgresql" else sqlite_insert
+    statement = insert(ChangeVersion).values([{"scope": s, "version": 1} for s in scopes])
+    statement = statement.on_conflict_do_update(
+        index_elements=[ChangeVersion.scope],
+        set_={"version": ChangeVersion.version + 1},
+    )
+    await session.execute(statement)
+
+
+async def get_version(session: AsyncSession, scope: str) -> int:
+    """Aktualna wersja zakresu (0, jeśli nie było jeszcze zapisów); TABLE_SCOPE - całej tabeli."""
+    if scope == TABLE_SCOPE:
+        statement = select(func.sum(ChangeVersion.version))
+    else:
+        statement = select(ChangeVersion.version).where(ChangeVersion.scope == scope)
+    result = await session.execute(statement)
+    return result.scalar() or 0
+
+
+def make_etag(version: int, *parts) -> str:
+    """Słaby ETag: wersja danych + skrót parametrów zapytania."""
+    digest = hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=8).hexdigest()
+    return f'W/"{version}-{digest}"'
+
@@ -0,0 +1,120 @@
+"""
+Czcionki Unicode dla PDF (polskie znaki w person / company / comment).
+
+Standardowa Helvetica ReportLab ma tylko kodowanie WinAnsi - ą, ę, ł, ś, ż
+wychodzą jako puste kwadraty. register_fonts() raz na proces:
+- wczytuje i rejestruje TTF z rodziny DejaVu Sans (PDF_FONT_DIR albo typowe
+  katalogi systemowe; w obrazie Docker pakiet fonts-dejavu-core),
+- w trybie --supervise jest wywoływane przed fork (worker.preload_pdf_libraries),
+  więc procesy-dzieci dziedziczą sparsowane czcionki zamiast czytać pliki,
+- podpina cache podzbiorów czcionki (subset osadzany w PDF): kolejne
+  dokumenty z tym samym zestawem znaków nie budują podzbioru od nowa.
+
+Bez plików TTF zostaje Helvetica (z ostrzeżeniem w logu).
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, NamedTuple, Optional
+
+from metrics import CACHE_REQUESTS
+
+logger = logging.getLogger("woz.fonts")
+
+FONT_DIRS = [
+    directory for directory in (
+        os.getenv("PDF_FONT_DIR"),
+        "/usr/share/fonts/truetype/dejavu",
+        "/usr/share/fonts/dejavu",
+        "/usr/share/fonts/TTF",
+    ) if directory
+]
+FONT_FILES = {"regular": "DejaVuSans.ttf", "bold": "DejaVuSans-Bold.ttf"}
+FONT_FAMILY = "DejaVuSans"
+# Podzbiory czcionki (po 256 znaków) zapamiętane na proces, per krój
+SUBSET_CACHE_SIZE = 256
+
+
+class FontSet(NamedTuple):
+    regular: str
+    bold: str
+
+
+FALLBACK_FONTS = FontSet("Helvetica", "Helvetica-Bold")
+
+_lock = threading.Lock()
+_fonts: Optional[FontSet] = None
+
+
+def find_font(filename: str) -> Optional[str]:
+    for directory in FONT_DIRS:
+        path = os.path.join(directory, filename)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+class SubsetCache:
+    """
+    Zastępuje TTFontFace.makeSubset: ten sam ciąg znaków podzbioru daje
+    te same bajty, więc wynik liczony jest raz (LRU).
+    """
+
+    def __init__(self, make_subset: Callable, maxsize: int = SUBSET_CACHE_SIZE):
+        self.make_subset = make_subset
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __call__(self, subset) -> bytes:
+        key = tuple(subset)
+        with self._lock:
+            content = self._entries.get(key)
+            if content is not None:
+                self._entries.move_to_end(key)
+        if content is not None:
+            CACHE_REQUESTS.inc(cache="font_subset", result="hit")
+            return content
+        CACHE_REQUESTS.inc(cache="font_subset", result="miss")
+        content = self.make_subset(subset)
+        with self._lock:
+            self._entries[key] = content
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return content
+
+
+def register_fonts() -> FontSet:
+    """Nazwy czcionek do stylów PDF; pliki wczytywane tylko przy pierwszym wywołaniu."""
+    global _fonts
+    if _fonts is None:
+        with _lock:
+            if _fonts is None:
+                _fonts = _load_fonts()
+    return _fonts
+
+
+def _load_fonts() -> FontSet:
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    paths = {style: find_font(filename) for style, filename in FONT_FILES.items()}
+    if not all(paths.values()):
+        logger.warning("Brak czcionek DejaVu - PDF bez polskich znaków (Helvetica)", extra={
+            "font_dirs": FONT_DIRS,
+        })
+        return FALLBACK_FONTS
+
+    fonts = FontSet(FONT_FAMILY, f"{FONT_FAMILY}-Bold")
+    for style, name in fonts._asdict().items():
+        font = TTFont(name, paths[style])
+        font.face.makeSubset = SubsetCache(font.face.makeSubset)
+        pdfmetrics.registerFont(font)
+    # <b> w Paragraph przełącza na pogrubiony krój tej samej rodziny
+    pdfmetrics.registerFontFamily(
+        FONT_FAMILY, normal=fonts.regular, bold=fonts.bold, italic=fonts.regular, boldItalic=fonts.bold
+    )
+    logger.info("Zarejestrowano czcionki PDF", extra={"family": FONT_FAMILY, "files": list(paths.values())})
+    return fonts
@@ -0,0 +1,205 @@
+"""
+Godziny pracy z kolumny `Wniosek.hours` jako dane do zapytań SQL.
+
+`hours` to słownik {"RRRR-MM-DD": liczba godzin}. Żeby raporty nie wczytywały
+wszystkich wniosków do Pythona:
+- PostgreSQL: kolumna jest JSONB z indeksem GIN (np. `hours ? '2026-01-02'`),
+- tabela `wniosek_hours` (jeden wiersz na wniosek i dzień, indeks po dniu)
+  jest utrzymywana triggerami przy INSERT/UPDATE/DELETE wniosku - także dla
+  zapisów spoza API (worker, seed_data).
+
+Wpisy z kluczem innym niż data lub wartością nieliczbową są pomijane.
+"""
+
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import event, exists, func, select, text
+
+from models import Wniosek, WniosekHours
+
+HOURS_GROUPS = ["day", "month"]
+
+# Klucz w formacie RRRR-MM-DD (bez rzutowania na date - błędny dzień nie wywraca zapisu)
+_PG_DAY_PATTERN = r"^\d{4}-(0[1-9]|1[0-2])-(0[1-9]|[12]\d|3[01])$"
+
+# SELECT wierszy godzin: {source} to dodatkowe tabele FROM, {id}/{hours} - wyrażenia wniosku
+_POSTGRES_SELECT_HOURS = """
+    SELECT {id}, e.key, (e.value #>> '{{}}')::double precision
+    FROM {source}jsonb_each(CASE WHEN jsonb_typeof({hours}) = 'object' THEN {hours} END) AS e
+    WHERE jsonb_typeof(e.value) = 'number' AND e.key ~ '{pattern}'
+"""
+
+# date(key) = key odrzuca klucze, które nie są datą RRRR-MM-DD
+_SQLITE_SELECT_HOURS = """
+    SELECT {id}, e.key, CAST(e.value AS REAL)
+    FROM {source}json_each({hours}) AS e
+    WHERE e.type IN ('integer', 'real') AND date(e.key) = e.key
+"""
+
+
+def _select_hours(dialect: str, source: str, id: str, hours: str) -> str:
+    if dialect == "postgresql":
+        return _POSTGRES_SELECT_HOURS.format(source=source, id=id, hours=hours, pattern=_PG_DAY_PATTERN)
+    return _SQLITE_SELECT_HOURS.format(source=source, id=id, hours=hours)
+
+
+# Typ kolumny i indeks GIN (start dev, partycjonowanie); migracja 0005 robi
+# to samo online - konwersja paczkami i CREATE INDEX CONCURRENTLY
+_POSTGRES_COLUMN_DDL = [
+    """
+    DO $$
+    BEGIN
+        IF (SELECT data_type FROM information_schema.columns
+            WHERE table_name = 'wniosek' AND column_name = 'hours') = 'json' THEN
+            ALTER TABLE wniosek ALTER COLUMN hours TYPE jsonb USING hours::jsonb;
+        END IF;
+    END $$
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_wniosek_hours_gin ON wniosek USING GIN (hours)",
+]
+
+_POSTGRES_DDL = [
+    f"""
+    CREATE OR REPLACE FUNCTION wniosek_hours_sync() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            DELETE FROM wniosek_hours WHERE wniosek_id = OLD.id;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO wniosek_hours (wniosek_id, day, hours)
+            {_select_hours("postgresql", "", "NEW.id", "NEW.hours")};
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS wniosek_hours_sync ON wniosek",
+    """
+    CREATE TRIGGER wniosek_hours_sync
+    AFTER INSERT OR DELETE OR UPDATE OF hours ON wniosek
+    FOR EACH ROW EXECUTE FUNCTION wniosek_hours_sync()
+    """,
+]
+
+_SQLITE_DDL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS wniosek_hours_ai AFTER INSERT ON wniosek BEGIN
+        INSERT INTO wniosek_hours (wniosek_id, day, hours)
+        {_select_hours("sqlite", "", "new.id", "new.hours")};
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS wniosek_hours_ad AFTER DELETE ON wniosek BEGIN
+        DELETE FROM wniosek_hours WHERE wniosek_id = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS wniosek_hours_au AFTER UPDATE OF hours ON wniosek BEGIN
+        DELETE FROM wniosek_hours WHERE wniosek_id = old.id;
+        INSERT INTO wniosek_hours (wniosek_id, day, hours)
+        {_select_hours("sqlite", "", "new.id", "new.hours")};
+    END
+    """,
+]
+
+
+def backfill_statement(dialect: str):
+    """
+    Wypełnia `wniosek_hours` dla wniosków o id z zakresu (:first_id, :last_id].
+    Idempotentne - wiersze dodane już przez trigger są pomijane.
+    """
+    return text(
+        "INSERT INTO wniosek_hours (wniosek_id, day, hours) "
+        + _select_hours(dialect, "wniosek, ", "wniosek.id", "wniosek.hours")
+        + " AND wniosek.id > :first_id AND wniosek.id <= :last_id"
+        + " ON CONFLICT DO NOTHING"
+    )
+
+
+def create_hours_schema(connection, backfill: bool = True, column_ddl: bool = True) -> None:
+    """
+    Tworzy (idempotentnie) indeksy i triggery; przy pierwszym razie wypełnia
+    `wniosek_hours` (chyba że backfill=False - np. migracja robi to paczkami).
+    column_ddl=False pomija zmianę typu kolumny i indeks GIN (migracja).
+    """
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        exists_ = connection.execute(
+            text("SELECT 1 FROM pg_trigger WHERE tgname = 'wniosek_hours_sync'")
+        ).first()
+        ddl_statements = (_POSTGRES_COLUMN_DDL if column_ddl else []) + _POSTGRES_DDL
+    elif dialect == "sqlite":
+        exists_ = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'wniosek_hours_ai'")
+        ).first()
+        ddl_statements = _SQLITE_DDL
+    else:
+        return
+    for ddl in ddl_statements:
+        connection.execute(text(ddl))
+    if not exists_ and backfill:
+        # Wnioski zapisane przed utworzeniem triggerów
+        connection.execute(text("DELETE FROM wniosek_hours"))
+        connection.execute(backfill_statement(dialect), {"first_id": 0, "last_id": 2**62})
+
+
+def drop_hours_schema(connection) -> None:
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("DROP FUNCTION IF EXISTS wniosek_hours_sync() CASCADE"))
+    elif connection.dialect.name == "sqlite":
+        for trigger in ("wniosek_hours_ai", "wniosek_hours_ad", "wniosek_hours_au"):
+            connection.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+
+
+@event.listens_for(WniosekHours.__table__, "after_create")
+def _after_create(target, connection, **kw):
+    create_hours_schema(connection)
+
+
+@event.listens_for(WniosekHours.__table__, "before_drop")
+def _before_drop(target, connection, **kw):
+    drop_hours_schema(connection)
+
+
+# ============== ZAPYTANIA ==============
+
+def worked_on_filter(day: date):
+    """Warunek WHERE: wniosek ma wpisane godziny w danym dniu."""
+    return exists().where(
+        WniosekHours.wniosek_id == Wniosek.id,
+        WniosekHours.day == day.isoformat(),
+    )
+
+
+def hours_report_statement(
+    group_by: str = "month",
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    owner: Optional[str] = None,
+    company: Optional[str] = None,
+    status: Optional[str] = None,
+):
+    """
+    Suma godzin per dzień lub miesiąc (agregacja w bazie, po indeksie dnia).
+    Filtry po właścicielu, firmie i statusie dołączają tabelę wniosków.
+    """
+    period = WniosekHours.day if group_by == "day" else func.substr(WniosekHours.day, 1, 7)
+    statement = select(
+        period.label("period"),
+        func.sum(WniosekHours.hours).label("hours"),
+        func.count(func.distinct(WniosekHours.wniosek_id)).label("wnioski"),
+    )
+    if date_from is not None:
+        statement = statement.where(WniosekHours.day >= date_from.isoformat())
+    if date_to is not None:
+        statement = statement.where(WniosekHours.day <= date_to.isoformat())
+    if owner is not None or company is not None or status is not None:
+        statement = statement.join(Wniosek, Wniosek.id == WniosekHours.wniosek_id)
+        if owner is not None:
+            statement = statement.where(Wniosek.owner == owner)
+        if company is not None:
+            statement = statement.where(Wniosek.company == company)
+        if status is not None:
+            statement = statement.where(Wniosek.status == status)
+    return statement.group_by(period).order_by(period)
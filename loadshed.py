@@ -0,0 +1,148 @@
+"""
+Pomiar opóźnienia pętli zdarzeń i odrzucanie żądań przy przeciążeniu.
+
+LoopLagMonitor co LOOP_LAG_INTERVAL s zasypia i mierzy, o ile później się
+obudził - to czas, przez który pętla była zajęta czymś blokującym (bcrypt,
+duża serializacja, kompresja). Wartość używana do decyzji jest wygładzona
+"szczytowo": rośnie od razu, opada o LAG_DECAY na pomiar, więc pojedynczy
+skok nie przełącza trybu co 50 ms.
+
+LoadShedMiddleware liczy żądania w toku i przy przeciążeniu odpowiada 503 z
+Retry-After zanim żądanie dotrze do aplikacji:
+- niski priorytet (eksporty, statystyki, raporty, admin) - od
+  LOADSHED_LOW_LAG_MS albo połowy LOADSHED_MAX_IN_FLIGHT,
+- pozostałe - od LOADSHED_NORMAL_LAG_MS albo LOADSHED_MAX_IN_FLIGHT,
+- krytyczne (POST /wnioski/, /health*, /metrics) - nigdy.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from typing import Optional
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from metrics import EVENT_LOOP_LAG, EVENT_LOOP_LAG_CURRENT, HTTP_IN_FLIGHT, REQUESTS_SHED
+
+logger = logging.getLogger("woz.loadshed")
+
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.05"))
+LAG_DECAY = 0.9
+
+LOADSHED_ENABLED = os.getenv("LOADSHED_ENABLED", "true").lower() in ("1", "true", "yes")
+LOADSHED_LOW_LAG_MS = float(os.getenv("LOADSHED_LOW_LAG_MS", "100"))
+LOADSHED_NORMAL_LAG_MS = float(os.getenv("LOADSHED_NORMAL_LAG_MS", "500"))
+LOADSHED_MAX_IN_FLIGHT = int(os.getenv("LOADSHED_MAX_IN_FLIGHT", "500"))
+LOADSHED_RETRY_AFTER = int(os.getenv("LOADSHED_RETRY_AFTER", "2"))
+
+PRIORITIES = ["critical", "normal", "low"]
+
+# Zawsze obsługiwane: przyjmowanie wniosków i sondy orkiestratora
+CRITICAL_ROUTES = [("POST", "/wnioski/")]
+CRITICAL_PREFIXES = ["/health", "/metrics"]
+# Praca, którą klient może powtórzyć później
+LOW_PRIORITY_PREFIXES = ["/wnioski/export", "/stats/", "/reports/", "/admin/"]
+
+
+def request_priority(method: str, path: str) -> str:
+    if (method, path) in CRITICAL_ROUTES or path.startswith(tuple(CRITICAL_PREFIXES)):
+        return "critical"
+    if path.startswith(tuple(LOW_PRIORITY_PREFIXES)):
+        return "low"
+    return "normal"
+
+
+class LoopLagMonitor:
+    """Zadanie w tle mierzące opóźnienie pętli zdarzeń."""
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL, decay: float = LAG_DECAY):
+        self.interval = interval
+        self.decay = decay
+        self.lag = 0.0
+        self.in_flight = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="loop-lag-monitor")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self.lag = 0.0
+
+    def record(self, sample: float) -> None:
+        self.lag = max(sample, self.lag * self.decay)
+        EVENT_LOOP_LAG.observe(sample)
+        EVENT_LOOP_LAG_CURRENT.set(self.lag)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, loop.time() - started - self.interval))
+
+    def should_shed(self, priority: str) -> bool:
+        if not LOADSHED_ENABLED or priority == "critical":
+            return False
+        lag_ms = self.lag * 1000
+        if priority == "low":
+            return lag_ms >= LOADSHED_LOW_LAG_MS or self.in_flight >= LOADSHED_MAX_IN_FLIGHT // 2
+        return lag_ms >= LOADSHED_NORMAL_LAG_MS or self.in_flight >= LOADSHED_MAX_IN_FLIGHT
+
+
+# Jeden monitor na proces API (uruchamiany w lifespan)
+LOOP_MONITOR = LoopLagMonitor()
+
+
+class LoadShedMiddleware:
+    """Middleware ASGI: żądania w toku i 503 + Retry-After przy przeciążeniu."""
+
+    def __init__(self, app: ASGIApp, monitor: LoopLagMonitor = LOOP_MONITOR):
+        self.app = app
+        self.monitor = monitor
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        priority = request_priority(scope["method"], scope["path"])
+        if self.monitor.should_shed(priority):
+            REQUESTS_SHED.inc(priority=priority)
+            logger.warning("Żądanie odrzucone - przeciążenie", extra={
+                "path": scope["path"], "priority": priority,
+                "loop_lag_ms": round(self.monitor.lag * 1000, 1), "in_flight": self.monitor.in_flight,
+            })
+            await _service_unavailable(send)
+            return
+
+        self.monitor.in_flight += 1
+        HTTP_IN_FLIGHT.set(self.monitor.in_flight)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.monitor.in_flight -= 1
+            HTTP_IN_FLIGHT.set(self.monitor.in_flight)
+
+
+async def _service_unavailable(send: Send) -> None:
+    body = json.dumps({"detail": "Serwer przeciążony - spróbuj ponownie później"}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": 503,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(LOADSHED_RETRY_AFTER).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,176 @@
+"""
+Strukturalne logowanie JSON dla API i workera WOZ.
+
+Rekordy trafiają do kolejki w pamięci (QueueHandler), a zapis na stdout
+odbywa się w osobnym wątku (QueueListener), więc logowanie nigdy nie
+blokuje pętli zdarzeń. Każdy rekord dostaje correlation_id żądania/zadania.
+"""
+
+import copy
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+
+# Identyfikator korelacji: ustawiany per żądanie HTTP i per wiadomość AMQP
+correlation_id: ContextVar[Optional[str]] = ContextVar("correlation_id", default=None)
+
+# Pola standardowe LogRecord - wszystko inne traktujemy jako dane strukturalne
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "correlation_id", "service"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def new_correlation_id() -> str:
+    """Generuje nowy identyfikator korelacji."""
+    return uuid.uuid4().hex
+
+
+class JsonFormatter(logging.Formatter):
+    """Formatuje rekord jako jedną linię JSON."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        service = getattr(record, "service", None)
+        if service:
+            payload["service"] = service
+        cid = getattr(record, "correlation_id", None)
+        if cid:
+            payload["correlation_id"] = cid
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            # Rekord po przejściu przez kolejkę (JsonQueueHandler.prepare)
+            payload["exc_info"] = record.exc_text
+        if record.stack_info:
+            payload["stack_info"] = self.formatStack(record.stack_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class JsonQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler bez formatowania w wątku wywołującym: domyślne prepare()
+    dokleja traceback do treści wiadomości i gubi exc_info. Tu traceback
+    trafia jako tekst do exc_text (obiekt wyjątku z ramkami nie przechodzi
+    przez kolejkę), a JsonFormatter zapisuje go pod kluczem exc_info.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = JsonFormatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class ContextFilter(logging.Filter):
+    """Dokleja correlation_id i nazwę serwisu w wątku wywołującym."""
+
+    def __init__(self, service: str):
+        super().__init__()
+        self.service = service
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.correlation_id = correlation_id.get()
+        record.service = self.service
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Przepuszcza co N-ty rekord DEBUG (pozostałe poziomy zawsze).
+    Chroni przed zalewem logów z gorących ścieżek.
+    """
+
+    def __init__(self, rate: int):
+        super().__init__()
+        self.rate = max(1, rate)
+        self._counter = itertools.count()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.rate == 1:
+            return True
+        return next(self._counter) % self.rate == 0
+
+
+def setup_logging(service: str) -> logging.handlers.QueueListener:
+    """
+    Konfiguruje logowanie procesu (idempotentnie).
+
+    Zmienne środowiskowe:
+    - LOG_LEVEL: poziom logowania (domyślnie INFO)
+    - LOG_DEBUG_SAMPLE_RATE: co który rekord DEBUG zapisywać (domyślnie 100)
+    - DB_ECHO: "true" włącza logowanie zapytań SQLAlchemy
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = JsonQueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter(service))
+    queue_handler.addFilter(SamplingFilter(int(os.getenv("LOG_DEBUG_SAMPLE_RATE", "100"))))
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter())
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+
+    # Logi zapytań SQL idą tą samą, nieblokującą ścieżką (zamiast echo=True)
+    if os.getenv("DB_ECHO", "false").lower() == "true":
+        logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging() -> None:
+    """Opróżnia kolejkę logów i zatrzymuje wątek zapisu."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _before_fork() -> None:
+    # Wątek zapisu nie może trzymać blokady stdout w chwili fork (supervisor)
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+
+def _after_fork_in_parent() -> None:
+    if _listener is not None and _listener._thread is None:
+        _listener.start()
+
+
+def _after_fork_in_child() -> None:
+    # Dziecko konfiguruje logowanie od nowa (setup_logging) z własnym wątkiem
+    global _listener
+    _listener = None
+
+
+os.register_at_fork(
+    before=_before_fork,
+    after_in_parent=_after_fork_in_parent,
+    after_in_child=_after_fork_in_child,
+)
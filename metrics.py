@@ -0,0 +1,380 @@
+"""
+Metryki w formacie Prometheus dla API i workera WOZ.
+
+Liczniki są bezblokadowe: każdy wątek zapisuje do własnego fragmentu
+(shard) w ``threading.local``, a dopiero eksport sumuje wszystkie fragmenty.
+Dzięki temu pomiar na gorącej ścieżce to jeden słownik i jedno dodawanie.
+"""
+
+import asyncio
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = (1_000, 5_000, 10_000, 50_000, 100_000, 500_000, 1_000_000, 5_000_000)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    """Wspólna baza metryk z fragmentami per wątek."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[dict] = []
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.values
+        except AttributeError:
+            values = self._local.values = {}
+            # list.append jest atomowe - nie potrzebujemy blokady
+            self._shards.append(values)
+            return values
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _snapshots(self) -> List[dict]:
+        # dict(shard) wykonuje się w całości pod GIL, więc kopia jest spójna
+        return [dict(shard) for shard in list(self._shards)]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Licznik monotoniczny."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        shard = self._shard()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        key = self._key(labels)
+        return sum(shard.get(key, 0.0) for shard in self._snapshots())
+
+    def render(self) -> List[str]:
+        totals: Dict[tuple, float] = {}
+        for shard in self._snapshots():
+            for key, value in shard.items():
+                totals[key] = totals.get(key, 0.0) + value
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+            for key, value in sorted(totals.items())
+        ]
+
+
+class Gauge(_Metric):
+    """Wartość chwilowa (ostatni zapis wygrywa, bez fragmentów per wątek)."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[tuple, float] = {}
+
+    def set(self, value: float, **labels) -> None:
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+            for key, value in sorted(dict(self._values).items())
+        ]
+
+
+class Histogram(_Metric):
+    """Histogram z kubełkami w stylu Prometheus."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        shard = self._shard()
+        key = self._key(labels)
+        data = shard.get(key)
+        if data is None:
+            # [licznik per kubełek..., +Inf, suma, liczba obserwacji]
+            data = shard[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        data[bisect.bisect_left(self.buckets, value)] += 1
+        data[-2] += value
+        data[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Mierzy czas wykonania bloku ``with``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        key = self._key(labels)
+        return sum(shard[key][-1] for shard in self._snapshots() if key in shard)
+
+    def render(self) -> List[str]:
+        totals: Dict[tuple, list] = {}
+        for shard in self._snapshots():
+            for key, data in shard.items():
+                data = list(data)
+                if key in totals:
+                    totals[key] = [a + b for a, b in zip(totals[key], data)]
+                else:
+                    totals[key] = data
+        lines = []
+        for key, data in sorted(totals.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), data):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = _format_labels(self.labelnames, key, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {data[-2]}")
+            lines.append(f"{self.name}_count{labels} {data[-1]}")
+        return lines
+
+
+class Registry:
+    """Zbiór metryk eksportowanych razem."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+# ============== METRYKI ==============
+
+HTTP_REQUEST_DURATION = REGISTRY.register(Histogram(
+    "woz_http_request_duration_seconds",
+    "Czas obsługi żądania HTTP",
+    ["method", "route", "status"],
+))
+
+DB_QUERY_DURATION = REGISTRY.register(Histogram(
+    "woz_db_query_duration_seconds",
+    "Czas wykonania zapytania SQL",
+    ["operation"],
+))
+
+PUBLISH_DURATION = REGISTRY.register(Histogram(
+    "woz_amqp_publish_duration_seconds",
+    "Czas publikacji wiadomości do RabbitMQ",
+    ["queue"],
+))
+
+QUEUE_WAIT = REGISTRY.register(Histogram(
+    "woz_queue_wait_seconds",
+    "Czas oczekiwania wiadomości w kolejce",
+    ["queue"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0),
+))
+
+JOBS_PROCESSED = REGISTRY.register(Counter(
+    "woz_worker_jobs_total",
+    "Liczba przetworzonych zadań workera",
+    ["action", "result"],
+))
+
+PDF_RENDER_DURATION = REGISTRY.register(Histogram(
+    "woz_pdf_render_duration_seconds",
+    "Czas generowania PDF",
+))
+
+PDF_BYTES = REGISTRY.register(Histogram(
+    "woz_pdf_size_bytes",
+    "Rozmiar wygenerowanego PDF",
+    buckets=BYTES_BUCKETS,
+))
+
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    "woz_cache_requests_total",
+    "Odczyty cache w pamięci (hit, miss, coalesced - czekające na to samo zapytanie)",
+    ["cache", "result"],
+))
+
+STATUS_CHANGES = REGISTRY.register(Counter(
+    "woz_status_changes_total",
+    "Liczba zmian statusu wniosków przez API",
+    ["status", "mode"],
+))
+
+WRITE_BATCH_SIZE = REGISTRY.register(Histogram(
+    "woz_write_batch_size",
+    "Liczba zapisów zatwierdzonych jednym commitem (StatusWriter)",
+    buckets=(1, 2, 5, 10, 20, 50, 100),
+))
+
+PDF_RESULTS_APPLIED = REGISTRY.register(Counter(
+    "woz_pdf_results_total",
+    "Wyniki zadań PDF z kolejki wnioski_results zapisane przez API",
+    ["result"],
+))
+
+PDF_ON_DEMAND = REGISTRY.register(Counter(
+    "woz_pdf_on_demand_total",
+    "Pobrania PDF bez gotowego pliku (PDF_POLICY lazy/scheduled)",
+    ["result"],
+))
+
+EVENT_LOOP_LAG = REGISTRY.register(Histogram(
+    "woz_event_loop_lag_seconds",
+    "Opóźnienie pętli zdarzeń API (pomiar co LOOP_LAG_INTERVAL)",
+))
+
+EVENT_LOOP_LAG_CURRENT = REGISTRY.register(Gauge(
+    "woz_event_loop_lag_current_seconds",
+    "Wygładzone opóźnienie pętli zdarzeń (wartość używana do odrzucania żądań)",
+))
+
+HTTP_IN_FLIGHT = REGISTRY.register(Gauge(
+    "woz_http_requests_in_flight",
+    "Liczba żądań HTTP w toku",
+))
+
+REQUESTS_SHED = REGISTRY.register(Counter(
+    "woz_http_requests_shed_total",
+    "Żądania odrzucone (503) przy przeciążeniu",
+    ["priority"],
+))
+
+BCRYPT_DURATION = REGISTRY.register(Histogram(
+    "woz_bcrypt_duration_seconds",
+    "Czas operacji bcrypt",
+    ["operation"],
+    buckets=(0.01, 0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.0),
+))
+
+
+# ============== INSTRUMENTACJA ==============
+
+def _operation(statement: str) -> str:
+    head = statement.lstrip().split(None, 1)
+    return head[0].upper() if head else "UNKNOWN"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("woz_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("woz_query_start")
+    if starts:
+        DB_QUERY_DURATION.observe(time.perf_counter() - starts.pop(), operation=_operation(statement))
+
+
+def _handle_error(context):
+    # Przy błędzie after_cursor_execute nie jest wołane - zdejmujemy czas startu,
+    # inaczej lista rośnie, a następne zapytanie dostałby cudzy pomiar
+    connection = context.connection
+    starts = connection.info.get("woz_query_start") if connection is not None else None
+    if starts:
+        starts.pop()
+
+
+def instrument_engine(engine) -> None:
+    """Podpina pomiar czasu zapytań pod zdarzenia silnika SQLAlchemy."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(sync_engine, "handle_error", _handle_error)
+
+
+def render_latest() -> bytes:
+    """Zwraca wszystkie metryki w formacie tekstowym Prometheus."""
+    return REGISTRY.render().encode("utf-8")
+
+
+async def _handle_metrics_request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        request_line = await reader.readline()
+        # Pomiń nagłówki żądania
+        while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+            pass
+        parts = request_line.decode("latin-1").split()
+        if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+            body, status_line = render_latest(), "200 OK"
+        else:
+            body, status_line = b"Not Found\n", "404 Not Found"
+        writer.write(
+            f"HTTP/1.1 {status_line}\r\n"
+            f"Content-Type: {CONTENT_TYPE}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n".encode("latin-1") + body
+        )
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+async def start_metrics_server(port: Optional[int] = None, host: str = "0.0.0.0"):
+    """
+    Uruchamia mały serwer HTTP z endpointem /metrics (dla workera).
+    Port 0 wyłącza serwer.
+    """
+    if port is None:
+        port = int(os.getenv("WORKER_METRICS_PORT", "9100"))
+    if not port:
+        return None
+    return await asyncio.start_server(_handle_metrics_request, host, port)
@@ -0,0 +1,80 @@
+"""
+Środowisko Alembic dla WOZ (silnik asynchroniczny, jak w aplikacji).
+
+URL bazy: opcja sqlalchemy.url (np. z testów) albo DATABASE_URL.
+"""
+
+import asyncio
+import os
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import pool
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+
+# Rejestruje tabele w SQLModel.metadata (autogenerate porównuje z modelami)
+import models  # noqa: F401
+
+config = context.config
+
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = SQLModel.metadata
+
+
+def database_url() -> str:
+    return (
+        config.get_main_option("sqlalchemy.url")
+        or os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./wnioski.db")
+    )
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    """
+    Autogenerate pomija obiekty spoza modeli, tworzone przez DDL w search.py
+    i hours.py (tabele FTS5, indeksy GIN/trigramowe, partycje).
+    """
+    if type_ in ("table", "index") and reflected and compare_to is None:
+        return False
+    return True
+
+
+def run_migrations_offline() -> None:
+    """Generuje SQL bez połączenia z bazą (alembic upgrade head --sql)."""
+    context.configure(
+        url=database_url(),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def do_run_migrations(connection: Connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+        # SQLite nie obsługuje ALTER COLUMN - zmiany przez kopię tabeli
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_async_migrations() -> None:
+    engine = create_async_engine(database_url(), poolclass=pool.NullPool)
+    async with engine.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+    await engine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    asyncio.run(run_async_migrations())
@@ -0,0 +1,100 @@
+"""
+Pomocnicze operacje migracji, które nie blokują produkcyjnej bazy.
+
+- create_index_online / drop_index_online: na PostgreSQL CREATE/DROP INDEX
+  CONCURRENTLY poza transakcją migracji (tabela przyjmuje zapisy w trakcie
+  budowy indeksu); na SQLite zwykły CREATE INDEX.
+- backfill_in_batches: długie UPDATE/INSERT ... SELECT dzielone na zakresy
+  kluczy, każdy zatwierdzany osobno - krótkie blokady, brak jednej wielkiej
+  transakcji i możliwość wznowienia po przerwaniu.
+- convert_column_online: zmiana typu kolumny bez ALTER COLUMN TYPE (który
+  przepisuje tabelę pod blokadą wyłączną) - nowa kolumna synchronizowana
+  triggerem, backfill paczkami i krótka zamiana nazw.
+"""
+
+from typing import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+
+def _is_postgres() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def create_index_online(index_name: str, table_name: str, columns: Sequence[str], **kw) -> None:
+    if not _is_postgres():
+        op.create_index(index_name, table_name, columns, if_not_exists=True, **kw)
+        return
+    with op.get_context().autocommit_block():
+        # Przerwany CREATE INDEX CONCURRENTLY zostawia indeks INVALID - budujemy go od nowa
+        invalid = op.get_bind().execute(sa.text(
+            "SELECT 1 FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+            "WHERE c.relname = :name AND NOT i.indisvalid"
+        ), {"name": index_name}).first()
+        if invalid:
+            op.drop_index(index_name, table_name=table_name, postgresql_concurrently=True)
+        op.create_index(
+            index_name, table_name, columns,
+            postgresql_concurrently=True, if_not_exists=True, **kw
+        )
+
+
+def drop_index_online(index_name: str, table_name: str) -> None:
+    if not _is_postgres():
+        op.drop_index(index_name, table_name=table_name, if_exists=True)
+        return
+    with op.get_context().autocommit_block():
+        op.drop_index(index_name, table_name=table_name, postgresql_concurrently=True, if_exists=True)
+
+
+def backfill_in_batches(statement, table_name: str, key: str = "id", batch_size: int = 10_000) -> None:
+    """
+    Wykonuje `statement` (z parametrami :first_id i :last_id) dla kolejnych
+    zakresów klucza (first_id, last_id]. Każda paczka to osobna transakcja.
+    Instrukcja musi być idempotentna (np. ON CONFLICT DO NOTHING).
+    """
+    bind = op.get_bind()
+    min_key, max_key = bind.execute(sa.text(f"SELECT min({key}), max({key}) FROM {table_name}")).first()
+    if max_key is None:
+        return
+    with op.get_context().autocommit_block():
+        for first_id in range(min_key - 1, max_key, batch_size):
+            bind.execute(statement, {"first_id": first_id, "last_id": first_id + batch_size})
+
+
+def convert_column_online(table_name: str, column: str, type_sql: str, using: str, key: str = "id") -> None:
+    """
+    Zmienia typ kolumny na PostgreSQL: `using` to wyrażenie SQL z {col}
+    w miejscu starej wartości. Indeksy na kolumnie znikają razem ze starą
+    kolumną - buduje się je potem przez create_index_online.
+    """
+    bind = op.get_bind()
+    new = f"{column}__new"
+    function = f"{table_name}_{column}_convert"
+    with op.get_context().autocommit_block():
+        bind.execute(sa.text(f"ALTER TABLE {table_name} ADD COLUMN IF NOT EXISTS {new} {type_sql}"))
+        # Zapisy w trakcie backfillu od razu wypełniają nową kolumnę
+        bind.execute(sa.text(f"""
+            CREATE OR REPLACE FUNCTION {function}() RETURNS trigger AS $$
+            BEGIN
+                NEW.{new} := {using.format(col="NEW." + column)};
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql
+        """))
+        bind.execute(sa.text(f"DROP TRIGGER IF EXISTS {function} ON {table_name}"))
+        bind.execute(sa.text(
+            f"CREATE TRIGGER {function} BEFORE INSERT OR UPDATE OF {column} ON {table_name} "
+            f"FOR EACH ROW EXECUTE FUNCTION {function}()"
+        ))
+    backfill_in_batches(sa.text(
+        f"UPDATE {table_name} SET {new} = {using.format(col=column)} "
+        f"WHERE {key} > :first_id AND {key} <= :last_id"
+    ), table_name, key)
+    # Zamiana w jednej krótkiej transakcji (zmiany tylko w katalogu, bez przepisywania)
+    bind.execute(sa.text("SET LOCAL lock_timeout = '5s'"))
+    bind.execute(sa.text(f"DROP TRIGGER {function} ON {table_name}"))
+    bind.execute(sa.text(f"DROP FUNCTION {function}()"))
+    bind.execute(sa.text(f"ALTER TABLE {table_name} DROP COLUMN {column}"))
+    bind.execute(sa.text(f"ALTER TABLE {table_name} RENAME COLUMN {new} TO {column}"))
@@ -0,0 +1,110 @@
+"""Schemat bazowy (stan po wersji z create_all)
+
+Tworzy brakujące tabele, więc działa zarówno na pustej bazie, jak i na bazie
+utworzonej wcześniej przez create_all. Wszystko, co przepisuje istniejące
+wiersze albo buduje indeks na dużej tabeli (typy dat, godziny JSONB,
+wyszukiwanie), robią osobne rewizje 0004-0006 - paczkami i CONCURRENTLY.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ["wniosek_hours", "wniosek_archive", "change_version", "user", "wniosek"]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    existing = set(sa.inspect(bind).get_table_names())
+    string = sqlmodel.sql.sqltypes.AutoString()
+    json = sa.JSON().with_variant(postgresql.JSONB(), "postgresql")
+
+    if "wniosek" not in existing:
+        op.create_table(
+            "wniosek",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("title", string, nullable=False),
+            sa.Column("person", string, nullable=False),
+            sa.Column("company", string, nullable=False),
+            sa.Column("type_of_woz", string, nullable=False),
+            sa.Column("payoff", sa.Float(), nullable=False),
+            sa.Column("created_date", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column("owner", string, nullable=True),
+            sa.Column("billing_month", sa.Date(), nullable=True),
+            sa.Column("premia_start", sa.Date(), nullable=True),
+            sa.Column("premia_end", sa.Date(), nullable=True),
+            sa.Column("hours", json, nullable=True),
+            sa.Column("comment", string, nullable=True),
+            sa.Column("status", string, nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_wniosek_billing_month", "wniosek", ["billing_month"])
+
+    if "user" not in existing:
+        op.create_table(
+            "user",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("email", sa.String(), nullable=True),
+            sa.Column("password_hash", string, nullable=False),
+            sa.Column("full_name", string, nullable=False),
+            sa.Column("role", string, nullable=False),
+            sa.Column("is_active", sa.Boolean(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_user_email", "user", ["email"], unique=True)
+
+    if "change_version" not in existing:
+        op.create_table(
+            "change_version",
+            sa.Column("scope", string, nullable=False),
+            sa.Column("version", sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint("scope"),
+        )
+
+    if "wniosek_archive" not in existing:
+        op.create_table(
+            "wniosek_archive",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("owner", string, nullable=True),
+            sa.Column("billing_month", sa.Date(), nullable=True),
+            sa.Column("status", string, nullable=False),
+            sa.Column("data", sa.JSON(), nullable=False),
+            sa.Column("pdf_archive", string, nullable=True),
+            sa.Column("pdf_names", sa.JSON(), nullable=True),
+            sa.Column("archived_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_wniosek_archive_owner", "wniosek_archive", ["owner"])
+        op.create_index("ix_wniosek_archive_billing_month", "wniosek_archive", ["billing_month"])
+
+    if "wniosek_hours" not in existing:
+        op.create_table(
+            "wniosek_hours",
+            sa.Column("wniosek_id", sa.Integer(), nullable=False),
+            sa.Column("day", string, nullable=False),
+            sa.Column("hours", sa.Float(), nullable=False),
+            sa.ForeignKeyConstraint(["wniosek_id"], ["wniosek.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("wniosek_id", "day"),
+        )
+        op.create_index("ix_wniosek_hours_day", "wniosek_hours", ["day"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        op.drop_table(table)
@@ -0,0 +1,38 @@
+"""Indeksy listy wniosków (budowane online)
+
+Lista sortuje po created_date i filtruje po właścicielu lub statusie -
+indeksy złożone pozwalają czytać tylko pierwszą stronę zamiast sortować
+całą tabelę. Na PostgreSQL tworzone CONCURRENTLY, bez blokowania zapisów.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 10:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from migrations.helpers import create_index_online, drop_index_online
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_wniosek_created_date", ["created_date"]),
+    ("ix_wniosek_owner_created_date", ["owner", "created_date"]),
+    ("ix_wniosek_status_created_date", ["status", "created_date"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, columns in INDEXES:
+        create_index_online(name, "wniosek", columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, _ in reversed(INDEXES):
+        drop_index_online(name, "wniosek")
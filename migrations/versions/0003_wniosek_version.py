@@ -0,0 +1,35 @@
+"""Kolumna wniosek.version (optymistyczna współbieżność zmian statusu)
+
+Zmiany statusu z API i workera to pojedynczy UPDATE z warunkiem na status
+i wersję. ADD COLUMN z wartością domyślną nie przepisuje tabeli na
+PostgreSQL 11+, więc migracja jest natychmiastowa także na dużej bazie.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    columns = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("wniosek")}
+    # Baza z create_all (dev) może już mieć kolumnę
+    if "version" not in columns:
+        op.add_column("wniosek", sa.Column("version", sa.Integer(), server_default="1", nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Bez batch_alter_table - kopia tabeli na SQLite usunęłaby triggery FTS i godzin
+    op.drop_column("wniosek", "version")
@@ -0,0 +1,42 @@
+"""Kolumny dat jako DATE (bazy sprzed zmiany typu)
+
+Bazy utworzone przez stary create_all trzymają daty jako tekst. Na
+PostgreSQL zamiast ALTER COLUMN TYPE (przepisanie tabeli pod blokadą
+wyłączną) nowa kolumna DATE jest wypełniana paczkami, a na końcu zamieniana
+z tekstową. Na SQLite tylko normalizacja tekstu, również paczkami.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from dates import DATE_COLUMNS, PG_DATE_USING, pg_text_date_columns, sqlite_normalize_statement
+from migrations.helpers import backfill_in_batches, convert_column_online, create_index_online
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        for column in pg_text_date_columns(bind):
+            convert_column_online("wniosek", column, "date", PG_DATE_USING)
+    else:
+        for column in DATE_COLUMNS:
+            backfill_in_batches(sqlite_normalize_statement(column), "wniosek")
+    # Indeks znika razem ze starą kolumną; baza z create_all mogła go nie mieć
+    create_index_online("ix_wniosek_billing_month", "wniosek", ["billing_month"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Powrót do dat jako tekstu nie jest obsługiwany - 0001 tworzy już kolumny DATE
@@ -0,0 +1,52 @@
+"""Godziny: kolumna JSONB, indeks GIN i tabela wniosek_hours
+
+Na PostgreSQL kolumna json z dawnego create_all przechodzi na jsonb przez
+nową kolumnę wypełnianą paczkami (bez ALTER COLUMN TYPE), indeks GIN
+powstaje CONCURRENTLY. Triggery synchronizujące wniosek_hours są tworzone
+po konwersji (korzystają z funkcji jsonb), istniejące wnioski trafiają do
+wniosek_hours paczkami.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 09:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+import hours
+from migrations.helpers import backfill_in_batches, convert_column_online, create_index_online, drop_index_online
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        data_type = bind.execute(sa.text(
+            "SELECT data_type FROM information_schema.columns "
+            "WHERE table_name = 'wniosek' AND column_name = 'hours'"
+        )).scalar()
+        if data_type == "json":
+            convert_column_online("wniosek", "hours", "jsonb", "{col}::jsonb")
+        create_index_online("ix_wniosek_hours_gin", "wniosek", ["hours"], postgresql_using="gin")
+
+    # Triggery od razu (nowe zapisy), istniejące wnioski paczkami poza transakcją
+    hours.create_hours_schema(bind, backfill=False, column_ddl=False)
+    if not bind.execute(sa.text("SELECT 1 FROM wniosek_hours LIMIT 1")).first():
+        backfill_in_batches(hours.backfill_statement(bind.dialect.name), "wniosek")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    hours.drop_hours_schema(bind)
+    if bind.dialect.name == "postgresql":
+        drop_index_online("ix_wniosek_hours_gin", "wniosek")
@@ -0,0 +1,50 @@
+"""Struktury wyszukiwania pełnotekstowego
+
+PostgreSQL: kolumna search_vector (bez wartości domyślnej - dodanie nie
+przepisuje tabeli) utrzymywana triggerem, wypełniana paczkami; indeksy GIN
+(tsvector i trigramy) budowane CONCURRENTLY. SQLite: tabela FTS5 z triggerami.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 09:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+import search
+from migrations.helpers import backfill_in_batches, create_index_online, drop_index_online
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        search.create_search_schema(bind)
+        return
+    search.create_search_schema(bind, indexes=False, backfill=False)
+    # Trigger wypełnia nowe zapisy; istniejące wiersze bez wektora - paczkami
+    backfill_in_batches(search.backfill_statement(), "wniosek")
+    for name, column, ops in search.POSTGRES_INDEXES:
+        create_index_online(
+            name, "wniosek", [column], postgresql_using="gin",
+            **({"postgresql_ops": {column: ops}} if ops else {})
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    search.drop_search_schema(bind)
+    if bind.dialect.name == "postgresql":
+        for name, _, _ in reversed(search.POSTGRES_INDEXES):
+            drop_index_online(name, "wniosek")
+        op.drop_column("wniosek", "search_vector")
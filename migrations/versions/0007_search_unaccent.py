@@ -0,0 +1,43 @@
+"""Wyszukiwanie bez znaków diakrytycznych na PostgreSQL
+
+Konfiguracja `woz_search` (simple + unaccent) dla wektora i zapytań - jak
+`remove_diacritics` w FTS5 na SQLite. Funkcja triggera jest podmieniana,
+istniejące wektory przeliczane paczkami; indeks GIN zostaje.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+import search
+from migrations.helpers import backfill_in_batches
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, Sequence[str], None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+    search.create_search_schema(bind, indexes=False, backfill=False)
+    backfill_in_batches(search.backfill_statement(), "wniosek")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+    bind.execute(sa.text(search.sync_function_ddl("simple")))
+    backfill_in_batches(search.backfill_statement("simple"), "wniosek")
+    op.execute(f"DROP TEXT SEARCH CONFIGURATION IF EXISTS {search.SEARCH_CONFIG}")
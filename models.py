@@ -1,10 +1,18 @@
 from datetime import date, datetime
-from sqlalchemy import func, Column, DateTime, JSON, String
+from sqlalchemy import func, Column, DateTime, ForeignKey, Index, Integer, JSON, String
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlmodel import SQLModel, Field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 
 class Wniosek(SQLModel, table=True):
+    # Indeksy listy (sortowanie po dacie, filtr właściciela/statusu) - migracja 0002
+    __table_args__ = (
+        Index("ix_wniosek_created_date", "created_date"),
+        Index("ix_wniosek_owner_created_date", "owner", "created_date"),
+        Index("ix_wniosek_status_created_date", "status", "created_date"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     title: str
     person: str
@@ -16,13 +24,51 @@ class Wniosek(SQLModel, table=True):
         default_factory=datetime.now
     )
     owner: Optional[str] = Field(default=None)
-    # Daty jako stringi dla kompatybilności z SQLite (format: YYYY-MM-DD)
-    billing_month: Optional[str] = Field(default=None, description="Format: RRRR-MM-DD")
-    premia_start: Optional[str] = Field(default=None, description="Data początkowa okresu premii")
-    premia_end: Optional[str] = Field(default=None, description="Data końcowa okresu premii")
-    hours: Dict[str, Any] = Field(default={}, sa_column=Column(JSON))
+    # Na PostgreSQL opcjonalnie klucz partycjonowania (patrz partitioning.py)
+    billing_month: Optional[date] = Field(default=None, index=True, description="Format: RRRR-MM-DD")
+    premia_start: Optional[date] = Field(default=None, description="Data początkowa okresu premii")
+    premia_end: Optional[date] = Field(default=None, description="Data końcowa okresu premii")
+    # Na PostgreSQL JSONB (indeks GIN), kopia znormalizowana w WniosekHours
+    hours: Dict[str, Any] = Field(default={}, sa_column=Column(JSON().with_variant(JSONB(), "postgresql")))
     comment: Optional[str] = Field(default="")
     status: str = "Waiting"
+    # Podbijana przy każdej zmianie statusu - optymistyczna współbieżność
+    # (UPDATE ... WHERE version = :v, patrz transitions.py); migracja 0003
+    version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})
+
+
+class WniosekArchive(SQLModel, table=True):
+    """
+    Zarchiwizowany (zamknięty, stary) wniosek - poza gorącą tabelą `wniosek`.
+    Pełny rekord w `data`; PDF-y w archiwach ZIP (patrz archive.py).
+    """
+    __tablename__ = "wniosek_archive"
+
+    id: int = Field(primary_key=True)
+    owner: Optional[str] = Field(default=None, index=True)
+    billing_month: Optional[date] = Field(default=None, index=True)
+    status: str
+    data: Dict[str, Any] = Field(sa_column=Column(JSON, nullable=False))
+    pdf_archive: Optional[str] = Field(default=None, description="Plik ZIP z PDF-ami")
+    pdf_names: List[str] = Field(default=[], sa_column=Column(JSON))
+    archived_at: datetime = Field(
+        sa_column=Column(DateTime(timezone=True), server_default=func.now()),
+        default_factory=datetime.now
+    )
+
+
+class WniosekHours(SQLModel, table=True):
+    """
+    Godziny z `Wniosek.hours` - jeden wiersz na wniosek i dzień.
+    Utrzymywane triggerami bazy (patrz hours.py), nie zapisywać ręcznie.
+    """
+    __tablename__ = "wniosek_hours"
+
+    wniosek_id: int = Field(
+        sa_column=Column(Integer, ForeignKey("wniosek.id", ondelete="CASCADE"), primary_key=True)
+    )
+    day: str = Field(primary_key=True, index=True, description="Format: RRRR-MM-DD")
+    hours: float
 
 
 class User(SQLModel, table=True):
@@ -33,4 +79,59 @@ class User(SQLModel, table=True):
     full_name: str
     role: str = Field(default="user")  # user, payroll, admin
     is_active: bool = Field(default=True)
-    created_at: datetime = Field(default_factory=datetime.now)
\ No newline at end of file
+    created_at: datetime = Field(default_factory=datetime.now)
+
+class WniosekListItem(SQLModel):
+    """
+    Schemat elementu listy wniosków (tylko dokumentacja OpenAPI).
+    Pola poza `id` są opcjonalne, bo lista obsługuje projekcję `fields=`.
+    """
+    id: int
+    title: Optional[str] = None
+    person: Optional[str] = None
+    company: Optional[str] = None
+    type_of_woz: Optional[str] = None
+    payoff: Optional[float] = None
+    created_date: Optional[datetime] = None
+    owner: Optional[str] = None
+    billing_month: Optional[date] = None
+    premia_start: Optional[date] = None
+    premia_end: Optional[date] = None
+    hours: Optional[Dict[str, Any]] = None
+    comment: Optional[str] = None
+    status: Optional[str] = None
+    version: Optional[int] = None
+
+
+class BulkStatusUpdate(SQLModel):
+    """
+    Zbiorcza zmiana statusu: lista `ids` albo filtr (status / billing_month /
+    owner) - dokładnie jedno z dwojga.
+    """
+    new_status: str
+    ids: Optional[List[int]] = None
+    status: Optional[str] = None
+    billing_month: Optional[date] = None
+    owner: Optional[str] = None
+
+
+class MonthlyReportRequest(SQLModel):
+    """Zlecenie raportu miesięcznego (generuje worker, patrz reports.py)."""
+    billing_month: date = Field(description="Miesiąc rozliczeniowy (dowolny dzień miesiąca)")
+    formats: List[str] = Field(default=["csv", "pdf"], description="csv, xlsx, pdf")
+
+
+# Kolumny dostępne w projekcji listy (kolejność jak w tabeli)
+WNIOSEK_LIST_FIELDS = [column.name for column in Wniosek.__table__.columns]
+
+
+class ChangeVersion(SQLModel, table=True):
+    """
+    Licznik zmian danych per właściciel (wersja tabeli to ich suma, etags.py,
+    więc wierszy się nie usuwa).
+    Podbijany przy każdym zapisie wniosku - z niego liczone są ETagi.
+    """
+    __tablename__ = "change_version"
+
+    scope: str = Field(primary_key=True)  # "owner:<nazwa>" (dawniej także "wniosek")
+    version: int = Field(default=0)
@@ -0,0 +1,189 @@
+"""
+Opcjonalne partycjonowanie tabeli `wniosek` po billing_month (PostgreSQL).
+
+Tabela jest partycjonowana zakresami miesięcznymi (`wniosek_p2026_01` itd.)
+z partycją domyślną `wniosek_default` na wnioski bez miesiąca lub spoza
+utworzonych zakresów. Zapytania, eksporty i archiwizacja z warunkiem na
+billing_month czytają wtedy tylko jedną partycję.
+
+Uruchamiane ręcznie / z crona:
+
+    python partitioning.py --convert            # jednorazowa konwersja tabeli
+    python partitioning.py --months-ahead 3     # partycje na kolejne miesiące
+
+Ograniczenia partycjonowania w PostgreSQL:
+- klucz główny musiałby zawierać billing_month (a ten bywa NULL), więc
+  tabela ma zwykły indeks na `id` - unikalność zapewnia sekwencja,
+- klucz obcy wniosek_hours -> wniosek jest usuwany (spójność utrzymuje trigger).
+"""
+
+import argparse
+import asyncio
+import os
+from datetime import date
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from dates import add_months, month_start
+
+DEFAULT_PARTITION = "wniosek_default"
+
+
+def partition_name(month: date) -> str:
+    return f"wniosek_p{month:%Y_%m}"
+
+
+def month_partitions(first: date, last: date) -> List[Tuple[str, date, date]]:
+    """Partycje (nazwa, od, do) dla miesięcy od `first` do `last` włącznie."""
+    partitions = []
+    month = month_start(first)
+    while month <= last:
+        upper = add_months(month, 1)
+        partitions.append((partition_name(month), month, upper))
+        month = upper
+    return partitions
+
+
+def is_partitioned(connection) -> bool:
+    return bool(connection.execute(text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = 'wniosek'"
+    )).first())
+
+
+def _insertable_columns(connection, table: str) -> List[str]:
+    """Kolumny bez kolumn generowanych (search_vector)."""
+    rows = connection.execute(text(
+        "SELECT column_name FROM information_schema.columns "
+        "WHERE table_name = :table AND is_generated = 'NEVER' ORDER BY ordinal_position"
+    ), {"table": table})
+    return [r[0] for r in rows]
+
+
+def _existing_partitions(connection) -> set:
+    rows = connection.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = 'wniosek'"
+    ))
+    return {r[0] for r in rows}
+
+
+def ensure_partitions(connection, first: date, last: date) -> List[str]:
+    """
+    Tworzy brakujące partycje miesięczne. Wiersze z danego zakresu, które
+    trafiły wcześniej do partycji domyślnej, są do nowej partycji przenoszone.
+    Zwraca nazwy utworzonych partycji.
+    """
+    existing = _existing_partitions(connection)
+    if DEFAULT_PARTITION not in existing:
+        connection.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF wniosek DEFAULT"))
+    columns = ", ".join(_insertable_columns(connection, "wniosek"))
+    created = []
+    for name, lower, upper in month_partitions(first, last):
+        if name in existing:
+            continue
+        bounds = {"lower": lower, "upper": upper}
+        in_range = "billing_month >= :lower AND billing_month < :upper"
+        moved = connection.execute(text(
+            f"SELECT count(*) FROM {DEFAULT_PARTITION} WHERE {in_range}"
+        ), bounds).scalar()
+        if moved:
+            # Partycji nie da się utworzyć, gdy domyślna ma wiersze z jej zakresu
+            connection.execute(text(
+                f"CREATE TEMP TABLE wniosek_move AS SELECT {columns} FROM {DEFAULT_PARTITION} WHERE {in_range}"
+            ), bounds)
+            connection.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {in_range}"), bounds)
+        connection.execute(text(
+            f"CREATE TABLE {name} PARTITION OF wniosek "
+            f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+        ))
+        if moved:
+            connection.execute(text(f"INSERT INTO wniosek ({columns}) SELECT {columns} FROM wniosek_move"))
+            connection.execute(text("DROP TABLE wniosek_move"))
+        created.append(name)
+    return created
+
+
+def convert_to_partitioned(connection, months_ahead: int = 3) -> bool:
+    """
+    Jednorazowo zamienia zwykłą tabelę `wniosek` na partycjonowaną.
+    Kopiuje dane w jednej transakcji; zwraca False, jeśli nie było czego robić.
+    """
+    import hours
+    import search
+
+    if is_partitioned(connection):
+        return False
+
+    connection.execute(text("ALTER TABLE wniosek RENAME TO wniosek_unpartitioned"))
+    # Sekwencja id przechodzi na nową tabelę (inaczej zniknęłaby z DROP starej)
+    connection.execute(text("ALTER SEQUENCE wniosek_id_seq OWNED BY NONE"))
+    connection.execute(text("ALTER TABLE wniosek_hours DROP CONSTRAINT IF EXISTS wniosek_hours_wniosek_id_fkey"))
+    connection.execute(text(
+        "CREATE TABLE wniosek (LIKE wniosek_unpartitioned INCLUDING DEFAULTS INCLUDING GENERATED) "
+        "PARTITION BY RANGE (billing_month)"
+    ))
+    connection.execute(text("ALTER SEQUENCE wniosek_id_seq OWNED BY wniosek.id"))
+
+    bounds = connection.execute(text(
+        "SELECT min(billing_month), max(billing_month) FROM wniosek_unpartitioned"
+    )).first()
+    current = month_start(date.today())
+    first = month_start(bounds[0]) if bounds[0] else current
+    last = max(month_start(bounds[1]) if bounds[1] else current, add_months(current, months_ahead))
+    ensure_partitions(connection, first, last)
+
+    columns = ", ".join(_insertable_columns(connection, "wniosek_unpartitioned"))
+    connection.execute(text(
+        f"INSERT INTO wniosek ({columns}) SELECT {columns} FROM wniosek_unpartitioned"
+    ))
+    # Indeksy starej tabeli mają te same nazwy - usuwamy ją przed ich odtworzeniem
+    connection.execute(text("DROP TABLE wniosek_unpartitioned"))
+
+    connection.execute(text("CREATE INDEX ix_wniosek_id ON wniosek (id)"))
+    connection.execute(text("CREATE INDEX ix_wniosek_billing_month ON wniosek (billing_month)"))
+    search.create_search_schema(connection)
+    # wniosek_hours jest aktualne - odtwarzamy tylko trigger, bez przeliczania
+    hours.create_hours_schema(connection, backfill=False)
+    return True
+
+
+async def run(database_url: str, convert: bool, months_ahead: int, months_back: int) -> Optional[List[str]]:
+    engine = create_async_engine(database_url)
+    if engine.dialect.name != "postgresql":
+        await engine.dispose()
+        raise SystemExit("Partycjonowanie jest dostępne tylko dla PostgreSQL")
+    try:
+        async with engine.begin() as conn:
+            if convert and await conn.run_sync(convert_to_partitioned, months_ahead):
+                print("Tabela wniosek przekonwertowana na partycjonowaną", flush=True)
+            if not await conn.run_sync(is_partitioned):
+                raise SystemExit("Tabela wniosek nie jest partycjonowana (użyj --convert)")
+            current = month_start(date.today())
+            created = await conn.run_sync(
+                ensure_partitions, add_months(current, -months_back), add_months(current, months_ahead)
+            )
+        for name in created:
+            print(f"Utworzono partycję {name}", flush=True)
+        return created
+    finally:
+        await engine.dispose()
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Partycjonowanie tabeli wniosek po billing_month")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"), help="URL bazy (domyślnie DATABASE_URL)")
+    parser.add_argument("--convert", action="store_true", help="Zamień istniejącą tabelę na partycjonowaną")
+    parser.add_argument("--months-ahead", type=int, default=3, help="Ile miesięcy naprzód utworzyć")
+    parser.add_argument("--months-back", type=int, default=1, help="Ile miesięcy wstecz sprawdzić")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if not args.database_url:
+        raise SystemExit("Brak DATABASE_URL")
+    asyncio.run(run(args.database_url, args.convert, args.months_ahead, args.months_back))
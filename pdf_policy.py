@@ -0,0 +1,245 @@
+"""
+Kiedy powstaje PDF wniosku (PDF_POLICY).
+
+- eager (domyślnie): POST /wnioski/ od razu wysyła zadanie do workera.
+- lazy: PDF powstaje przy pierwszym GET /wnioski/{id}/pdf. Większości
+  PDF-ów nikt nie pobiera, więc worker nie renderuje ich wcale.
+- scheduled: zadania wysyła okresowo (cron, poza godzinami pracy)
+  `python pdf_policy.py` - paczkami po --batch-size, następna paczka dopiero
+  gdy kolejka workera ją przerobi. Pobranie przed nocnym przebiegiem działa
+  jak w trybie lazy.
+
+Pobranie bez gotowego pliku (lazy / scheduled):
+- pierwsze żądanie wysyła zadanie, kolejne dla tego samego wniosku czekają
+  na ten sam plik (PdfRequests - jedno zadanie na wniosek i jedno listowanie
+  katalogu na takt dla wszystkich oczekujących wniosków w procesie API),
+- żądanie czeka do PDF_LAZY_WAIT s i dostaje PDF albo 202 z Retry-After;
+  ponowienie w ciągu PDF_LAZY_RESEND s nie wysyła zadania drugi raz.
+
+Wniosek w statusie Waiting/Processing idzie zwykłym zadaniem generate_pdf
+(worker ustawia Completed/Failed). Dla pozostałych statusów wysyłane jest
+render_pdf - sam dokument z danymi z wiadomości, bez zmiany statusu.
+W trybie lazy wnioski, których nikt nie otworzy, zostają w Waiting do
+decyzji payroll.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from archive import index_pdfs
+from metrics import PDF_ON_DEMAND
+from models import Wniosek
+from publisher import QUEUE_NAME, send_to_worker
+from results import job_payload, results_via_bus
+from transitions import CLAIMABLE_STATUSES
+
+logger = logging.getLogger("woz.pdf_policy")
+
+PDF_POLICY = os.getenv("PDF_POLICY", "eager")
+PDF_LAZY_WAIT = float(os.getenv("PDF_LAZY_WAIT", "5"))
+PDF_LAZY_POLL = float(os.getenv("PDF_LAZY_POLL", "0.1"))
+PDF_LAZY_RESEND = float(os.getenv("PDF_LAZY_RESEND", "60"))
+PDF_RETRY_AFTER = int(os.getenv("PDF_RETRY_AFTER", "2"))
+PDF_SCHEDULE_BATCH = int(os.getenv("PDF_SCHEDULE_BATCH", "200"))
+
+
+def renders_on_create() -> bool:
+    return PDF_POLICY not in ("lazy", "scheduled")
+
+
+def renders_on_demand() -> bool:
+    return not renders_on_create()
+
+
+def render_job(wniosek: Wniosek) -> dict:
+    """Zadanie dla workera: generate_pdf (ze zmianą statusu) albo sam render_pdf."""
+    if wniosek.status not in CLAIMABLE_STATUSES:
+        return {**job_payload(wniosek), "action": "render_pdf"}
+    if results_via_bus():
+        # Worker renderuje z danych w wiadomości - bez odczytu z bazy
+        return job_payload(wniosek)
+    return {"id": wniosek.id, "action": "generate_pdf", "title": wniosek.title}
+
+
+class PdfRequests:
+    """Pobrania PDF czekające na worker, łączone per wniosek."""
+
+    def __init__(self, wait: float = PDF_LAZY_WAIT, poll: float = PDF_LAZY_POLL, resend_after: float = PDF_LAZY_RESEND):
+        self.wait = wait
+        self.poll = poll
+        self.resend_after = resend_after
+        # id -> (katalog, termin, wynik); jeden watcher sprawdza wszystkie
+        self._pending: Dict[int, Tuple[str, float, asyncio.Future]] = {}
+        self._watcher: Optional[asyncio.Task] = None
+        self._sent: Dict[int, float] = {}
+
+    async def wait_for(
+        self, wniosek_id: int, pdf_dir: str, enqueue: Callable[[], Awaitable[None]]
+    ) -> Optional[str]:
+        """Nazwa gotowego pliku PDF albo None, gdy nie powstał w czasie `wait`."""
+        pending = self._pending.get(wniosek_id)
+        if pending is not None:
+            PDF_ON_DEMAND.inc(result="coalesced")
+            future = pending[2]
+        else:
+            # Rejestracja przed pierwszym await - żądania przychodzące w trakcie
+            # wysyłania zadania czekają na ten sam wynik, zamiast wysyłać własne
+            now = time.monotonic()
+            future = asyncio.get_running_loop().create_future()
+            self._pending[wniosek_id] = (pdf_dir, now + self.wait, future)
+            previous = self._sent.get(wniosek_id)
+            if now - (previous if previous is not None else float("-inf")) >= self.resend_after:
+                self._sent[wniosek_id] = now
+                try:
+                    await enqueue()
+                except BaseException as e:
+                    self._pending.pop(wniosek_id, None)
+                    if previous is None:
+                        self._sent.pop(wniosek_id, None)
+                    else:
+                        self._sent[wniosek_id] = previous
+                    if isinstance(e, asyncio.CancelledError):
+                        future.cancel()
+                    else:
+                        future.set_exception(e)
+                        # Wyjątek dostaje ten wywołujący; czekający - przez future
+                        future.exception()
+                    raise
+                self._prune(now)
+                PDF_ON_DEMAND.inc(result="requested")
+            if self._watcher is None or self._watcher.done():
+                self._watcher = asyncio.create_task(self._watch(), name="pdf-watch")
+        # Anulowanie jednego żądania nie przerywa czekania pozostałych
+        filename = await asyncio.shield(future)
+        PDF_ON_DEMAND.inc(result="ready" if filename else "pending")
+        return filename
+
+    async def _watch(self) -> None:
+        """Jedno listowanie katalogu na takt dla wszystkich oczekujących wniosków."""
+        try:
+            while self._pending:
+                for pdf_dir in {d for d, _, _ in self._pending.values()}:
+                    index = await asyncio.to_thread(index_pdfs, pdf_dir)
+                    now = time.monotonic()
+                    for wniosek_id, (directory, deadline, future) in list(self._pending.items()):
+                        if directory != pdf_dir:
+                            continue
+                        filenames = index.get(wniosek_id)
+                        if filenames:
+                            self._sent.pop(wniosek_id, None)
+                            future.set_result(filenames[-1])
+                        elif now >= deadline:
+                            future.set_result(None)
+                        else:
+                            continue
+                        del self._pending[wniosek_id]
+                if self._pending:
+                    await asyncio.sleep(self.poll)
+        except asyncio.CancelledError:
+            for _, _, future in self._pending.values():
+                future.cancel()
+            self._pending.clear()
+            raise
+        except Exception as e:
+            # Np. błąd odczytu katalogu - czekający dostają wyjątek zamiast wisieć
+            for _, _, future in self._pending.values():
+                future.set_exception(e)
+            self._pending.clear()
+
+    def _prune(self, now: float) -> None:
+        if len(self._sent) > 10_000:
+            self._sent = {i: sent for i, sent in self._sent.items() if now - sent < self.resend_after}
+
+
+# Jeden rejestr na proces API
+PDF_REQUESTS = PdfRequests()
+
+
+# ============== SCHEDULED ==============
+
+async def pending_batch(session: AsyncSession, after_id: int, batch_size: int) -> list:
+    """Następna paczka wniosków Waiting (keyset po id)."""
+    return list((await session.execute(
+        select(Wniosek)
+        .where(Wniosek.status == "Waiting", Wniosek.id > after_id)
+        .order_by(Wniosek.id)
+        .limit(batch_size)
+    )).scalars().all())
+
+
+async def _queue_depth(connection) -> int:
+    async with connection.channel() as channel:
+        queue = await channel.declare_queue(QUEUE_NAME, durable=True)
+        return queue.declaration_result.message_count
+
+
+async def schedule_renders(
+    session: AsyncSession,
+    connection,
+    pdf_dir: str,
+    batch_size: int = PDF_SCHEDULE_BATCH,
+    pause: float = 1.0,
+    send: Callable = send_to_worker,
+    queue_depth: Callable = _queue_depth,
+) -> int:
+    """
+    Wysyła zadania dla wniosków Waiting bez PDF. Kolejna paczka idzie, gdy
+    w kolejce zostało mniej niż `batch_size` wiadomości - przebieg nie
+    zalewa brokera i kończy się razem z pracą workerów. Zwraca liczbę zadań.
+    Katalog PDF jest listowany raz na przebieg.
+    """
+    rendered = await asyncio.to_thread(index_pdfs, pdf_dir)
+    sent = 0
+    after_id = 0
+    while True:
+        batch = await pending_batch(session, after_id, batch_size)
+        if not batch:
+            return sent
+        while await queue_depth(connection) >= batch_size:
+            await asyncio.sleep(pause)
+        for wniosek in batch:
+            if wniosek.id not in rendered:
+                await send(connection, render_job(wniosek))
+                sent += 1
+        after_id = batch[-1].id
+        logger.info("Wysłano paczkę zadań PDF", extra={"up_to_id": after_id, "sent": sent})
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Nocne generowanie PDF (PDF_POLICY=scheduled)")
+    parser.add_argument("--batch-size", type=int, default=PDF_SCHEDULE_BATCH,
+                        help="Zadania na paczkę i próg głębokości kolejki")
+    parser.add_argument("--pause", type=float, default=1.0,
+                        help="Odstęp sprawdzania kolejki (s), gdy poprzednia paczka nie jest przerobiona")
+    return parser.parse_args(argv)
+
+
+async def main(argv=None):
+    from database import SessionLocal, dispose_engines
+    from logging_config import setup_logging, shutdown_logging
+    from publisher import connect
+
+    args = parse_args(argv)
+    setup_logging("pdf_schedule")
+    connection = await connect()
+    try:
+        async with SessionLocal() as session:
+            sent = await schedule_renders(
+                session, connection, os.getenv("PDF_OUTPUT_DIR", "./generated_pdfs"), args.batch_size, args.pause
+            )
+        logger.info("Nocne generowanie PDF zlecone", extra={"sent": sent})
+    finally:
+        await connection.close()
+        await dispose_engines()
+        shutdown_logging()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
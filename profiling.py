@@ -0,0 +1,187 @@
+"""
+Profilowanie pojedynczych żądań na życzenie administratora.
+
+Włączane nagłówkiem ``X-Profile: 1`` lub parametrem ``?_profile=1``.
+Dla takiego żądania zbierany jest profil cProfile, lista zapytań SQL
+z czasami oraz czas serializacji odpowiedzi. Raport trafia do
+PROFILE_OUTPUT_DIR, a jego ID i podsumowanie do nagłówków odpowiedzi.
+Bez nagłówka koszt to jedno sprawdzenie w middleware i jeden
+ContextVar.get() na zapytanie SQL.
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+PROFILE_OUTPUT_DIR = os.getenv("PROFILE_OUTPUT_DIR", "./profiles")
+PROFILE_HEADER = "x-profile"
+PROFILE_QUERY_PARAM = "_profile"
+
+# Funkcje, których czas łączny traktujemy jako serializację odpowiedzi
+_SERIALIZATION_FUNCTIONS = {"serialize_response", "render"}
+
+# Lista zapytań bieżącego profilowanego żądania (None = profilowanie wyłączone)
+_sql_capture: ContextVar[Optional[list]] = ContextVar("sql_capture", default=None)
+
+# ID aktywnego profilu. cProfile podpina się pod cały wątek pętli zdarzeń,
+# a drugi enable() na tym samym wątku rzuca ValueError (3.12+) albo
+# nadpisuje pierwszy profiler, więc w procesie trwa najwyżej jeden profil.
+_active_profile: Optional[str] = None
+
+
+def _is_serialization_module(filename: str) -> bool:
+    return "fastapi" in filename or "starlette" in filename or filename.endswith("serialization.py")
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _sql_capture.get() is not None:
+        conn.info.setdefault("woz_profile_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    captured = _sql_capture.get()
+    if captured is not None:
+        starts = conn.info.get("woz_profile_start")
+        if starts:
+            captured.append({
+                "statement": statement,
+                "duration_ms": round((time.perf_counter() - starts.pop()) * 1000, 3),
+                "executemany": executemany,
+            })
+
+
+def is_requested(request: Request) -> bool:
+    """Czy żądanie prosi o profilowanie (tanie sprawdzenie, bez I/O)."""
+    return PROFILE_HEADER in request.headers or PROFILE_QUERY_PARAM in request.query_params
+
+
+def profile_in_progress() -> bool:
+    """Czy w tym procesie trwa już profilowanie innego żądania."""
+    return _active_profile is not None
+
+
+async def is_admin(request: Request) -> bool:
+    """Sprawdza, czy żądanie ma token JWT administratora."""
+    from fastapi import HTTPException
+
+    from auth import decode_token, get_user_by_id
+    from database import open_session
+
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        payload = decode_token(token)
+    except HTTPException:
+        return False
+    if payload.get("type") != "access" or not payload.get("sub"):
+        return False
+
+    async with open_session(request.app) as session:
+        user = await get_user_by_id(session, int(payload["sub"]))
+    return bool(user and user.is_active and user.role == "admin")
+
+
+class RequestProfile:
+    """Zbiera profil jednego żądania."""
+
+    def __init__(self, request: Request):
+        self.id = uuid.uuid4().hex
+        self.method = request.method
+        self.path = request.url.path
+        self.query = str(request.url.query)
+        self.statements: list = []
+        self._profiler = cProfile.Profile()
+        self._token = None
+        self._start = 0.0
+        self.total_ms = 0.0
+
+    def __enter__(self):
+        global _active_profile
+        if _active_profile is not None:
+            raise RuntimeError(f"Profil {_active_profile} jest już aktywny")
+        _active_profile = self.id
+        self._token = _sql_capture.set(self.statements)
+        self._start = time.perf_counter()
+        # Uwaga: cProfile widzi cały wątek pętli zdarzeń, więc przy dużym
+        # ruchu profil może zawierać też fragmenty innych żądań
+        self._profiler.enable()
+        return self
+
+    def __exit__(self, *exc):
+        global _active_profile
+        self._profiler.disable()
+        _active_profile = None
+        self.total_ms = (time.perf_counter() - self._start) * 1000
+        _sql_capture.reset(self._token)
+        return False
+
+    def report(self, status_code: int, top: int = 30) -> dict:
+        stats = pstats.Stats(self._profiler)
+        functions = []
+        serialization = 0.0
+        for (filename, line, name), (cc, nc, tt, ct, callers) in stats.stats.items():
+            functions.append({
+                "function": f"{os.path.basename(filename)}:{line}({name})",
+                "calls": nc,
+                "tottime_ms": round(tt * 1000, 3),
+                "cumtime_ms": round(ct * 1000, 3),
+            })
+            if name in _SERIALIZATION_FUNCTIONS and _is_serialization_module(filename):
+                serialization += ct
+        functions.sort(key=lambda f: f["cumtime_ms"], reverse=True)
+        sql_total = sum(s["duration_ms"] for s in self.statements)
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "query": self.query,
+            "status": status_code,
+            "total_ms": round(self.total_ms, 3),
+            "sql_count": len(self.statements),
+            "sql_total_ms": round(sql_total, 3),
+            "serialization_ms": round(serialization * 1000, 3),
+            "sql": self.statements,
+            "top_functions": functions[:top],
+        }
+
+    @staticmethod
+    def server_timing(report: dict) -> str:
+        """Podsumowanie w formacie nagłówka Server-Timing."""
+        return (
+            f'db;dur={report["sql_total_ms"]};desc="{report["sql_count"]} queries", '
+            f'serialize;dur={report["serialization_ms"]}, '
+            f'total;dur={report["total_ms"]}'
+        )
+
+
+def save_report(report: dict) -> str:
+    """Zapisuje raport jako JSON; zwraca ścieżkę pliku."""
+    os.makedirs(PROFILE_OUTPUT_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_OUTPUT_DIR, f"{report['id']}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def load_report(profile_id: str) -> Optional[dict]:
+    """Wczytuje zapisany raport (None, jeśli nie istnieje)."""
+    if not profile_id.isalnum():
+        return None
+    path = os.path.join(PROFILE_OUTPUT_DIR, f"{profile_id}.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
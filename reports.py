@@ -0,0 +1,283 @@
+"""
+Miesięczny raport payroll: sumy wypłat i godzin per firma / osoba / typ WOZ.
+
+Raport generuje worker (akcja "monthly_report", zlecana przez
+POST /reports/monthly) albo CLI: python reports.py 2026-01.
+
+Pamięć nie zależy od liczby wniosków:
+- agregację robi baza (GROUP BY company, person, type_of_woz; godziny z
+  tabeli wniosek_hours przez indeks po wniosek_id),
+- grupy są czytane kursorem po stronie serwera paczkami REPORT_CHUNK_ROWS
+  i dopisywane do plików od razu (CSV; XLSX w trybie write_only),
+- sumy per firma (do PDF) liczone są w locie - grupy przychodzą
+  posortowane po firmie.
+
+Pliki powstają jako *.tmp i są podmieniane dopiero po zakończeniu, więc
+pobieranie nigdy nie zwróci niepełnego raportu.
+"""
+
+import argparse
+import asyncio
+import csv
+import importlib.util
+import logging
+import os
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from dates import month_range
+from fonts import register_fonts
+from models import Wniosek, WniosekHours
+
+# openpyxl opcjonalny (tylko XLSX) i importowany dopiero przy zapisie - API
+# importuje ten moduł przy starcie
+XLSX_AVAILABLE = importlib.util.find_spec("openpyxl") is not None
+
+logger = logging.getLogger("woz.reports")
+
+REPORT_OUTPUT_DIR = os.getenv("REPORT_OUTPUT_DIR", "./generated_reports")
+# Ile grup pobierać z kursora naraz
+REPORT_CHUNK_ROWS = int(os.getenv("REPORT_CHUNK_ROWS", "5000"))
+REPORT_FORMATS = ["csv", "xlsx", "pdf"]
+DEFAULT_FORMATS = ["csv", "pdf"]
+REPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "pdf": "application/pdf",
+}
+# Odrzucone wnioski nie wchodzą do rozliczenia
+EXCLUDED_STATUSES = ["Rejected"]
+
+GROUP_FIELDS = ["company", "person", "type_of_woz"]
+REPORT_HEADERS = ["Firma", "Osoba", "Typ WOZ", "Liczba wniosków", "Kwota (PLN)", "Godziny"]
+
+
+def available_formats() -> List[str]:
+    """Formaty możliwe w tym środowisku (XLSX wymaga openpyxl)."""
+    return [f for f in REPORT_FORMATS if f != "xlsx" or XLSX_AVAILABLE]
+
+
+def report_path(output_dir: str, billing_month: date, report_format: str) -> str:
+    return os.path.join(output_dir, f"raport_{billing_month:%Y-%m}.{report_format}")
+
+
+def report_statement(billing_month: date):
+    """Grupy raportu dla miesiąca rozliczeniowego, posortowane po firmie."""
+    month_from, month_to = month_range(billing_month)
+    hours = (
+        select(func.sum(WniosekHours.hours))
+        .where(WniosekHours.wniosek_id == Wniosek.id)
+        .correlate(Wniosek)
+        .scalar_subquery()
+    )
+    rows = (
+        select(Wniosek.company, Wniosek.person, Wniosek.type_of_woz, Wniosek.payoff, hours.label("hours"))
+        .where(
+            Wniosek.billing_month >= month_from,
+            Wniosek.billing_month < month_to,
+            Wniosek.status.notin_(EXCLUDED_STATUSES),
+        )
+        .subquery()
+    )
+    groups = [rows.c[name] for name in GROUP_FIELDS]
+    return (
+        select(
+            *groups,
+            func.count().label("wnioski"),
+            func.coalesce(func.sum(rows.c.payoff), 0.0).label("payoff"),
+            func.coalesce(func.sum(rows.c.hours), 0.0).label("hours"),
+        )
+        .group_by(*groups)
+        .order_by(*groups)
+    )
+
+
+class _CsvSink:
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path + ".tmp", "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(REPORT_HEADERS)
+
+    def write(self, rows: Sequence[Sequence]) -> None:
+        self._writer.writerows(rows)
+
+    def close(self, commit: bool = True) -> None:
+        self._file.close()
+        _finish(self.path, commit)
+
+
+class _XlsxSink:
+    def __init__(self, path: str):
+        import openpyxl
+
+        self.path = path
+        # write_only: wiersze trafiają od razu do pliku tymczasowego openpyxl
+        self._workbook = openpyxl.Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet("Raport")
+        self._sheet.append(REPORT_HEADERS)
+
+    def write(self, rows: Sequence[Sequence]) -> None:
+        for row in rows:
+            self._sheet.append(list(row))
+
+    def close(self, commit: bool = True) -> None:
+        if commit:
+            self._workbook.save(self.path + ".tmp")
+        self._workbook.close()
+        _finish(self.path, commit)
+
+
+def _finish(path: str, commit: bool) -> None:
+    if commit:
+        os.replace(path + ".tmp", path)
+    elif os.path.exists(path + ".tmp"):
+        os.remove(path + ".tmp")
+
+
+def _report_rows(rows: Iterable) -> List[tuple]:
+    return [
+        (row.company, row.person, row.type_of_woz, row.wnioski, round(row.payoff, 2), round(row.hours, 2))
+        for row in rows
+    ]
+
+
+async def generate_monthly_report(
+    session: AsyncSession,
+    billing_month: date,
+    formats: Sequence[str] = DEFAULT_FORMATS,
+    output_dir: Optional[str] = None,
+    chunk_rows: int = REPORT_CHUNK_ROWS,
+) -> dict:
+    """
+    Tworzy raport za miesiąc `billing_month` w podanych formatach (katalog
+    domyślnie REPORT_OUTPUT_DIR). Zwraca podsumowanie (liczby wniosków,
+    grup, sumy) i ścieżki plików.
+    """
+    output_dir = output_dir or REPORT_OUTPUT_DIR
+    unknown = set(formats) - set(available_formats())
+    if unknown:
+        raise ValueError(f"Nieobsługiwany format raportu: {', '.join(sorted(unknown))}")
+    os.makedirs(output_dir, exist_ok=True)
+
+    sink_types = {"csv": _CsvSink, "xlsx": _XlsxSink}
+    sinks = [sink_types[f](report_path(output_dir, billing_month, f)) for f in formats if f in sink_types]
+    companies: List[Dict] = []
+    totals = {"wnioski": 0, "groups": 0, "payoff": 0.0, "hours": 0.0}
+    committed = False
+    try:
+        result = await session.stream(report_statement(billing_month).execution_options(yield_per=chunk_rows))
+        async for chunk in result.partitions():
+            for row in chunk:
+                if not companies or companies[-1]["company"] != row.company:
+                    companies.append({"company": row.company, "wnioski": 0, "payoff": 0.0, "hours": 0.0})
+                for total in (companies[-1], totals):
+                    total["wnioski"] += row.wnioski
+                    total["payoff"] += row.payoff
+                    total["hours"] += row.hours
+            totals["groups"] += len(chunk)
+            rows = _report_rows(chunk)
+            for sink in sinks:
+                # Zapis (zwłaszcza XLSX) w wątku - pętla obsługuje w tym czasie inne zadania
+                await asyncio.to_thread(sink.write, rows)
+        committed = True
+    finally:
+        for sink in sinks:
+            await asyncio.to_thread(sink.close, committed)
+
+    files = {f: report_path(output_dir, billing_month, f) for f in formats}
+    if "pdf" in formats:
+        await asyncio.to_thread(build_summary_pdf, files["pdf"], billing_month, companies, totals)
+
+    logger.info("Raport miesięczny wygenerowany", extra={
+        "billing_month": billing_month.isoformat(), "formats": list(formats), **totals,
+    })
+    return {"billing_month": billing_month.isoformat(), **totals, "files": files}
+
+
+def build_summary_pdf(path: str, billing_month: date, companies: List[Dict], totals: Dict) -> str:
+    """PDF z sumami per firma i sumą całkowitą (ReportLab, jak PDF wniosku w workerze)."""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.lib.units import cm
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+    fonts = register_fonts()
+    doc = SimpleDocTemplate(path + ".tmp", pagesize=A4, rightMargin=2*cm, leftMargin=2*cm,
+                            topMargin=2*cm, bottomMargin=2*cm)
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle("ReportTitle", parent=styles["Heading1"], fontName=fonts.bold)
+    normal_style = ParagraphStyle("ReportNormal", parent=styles["Normal"], fontName=fonts.regular)
+    elements = [
+        Paragraph(f"Raport miesięczny - {billing_month:%Y-%m}", title_style),
+        Paragraph(
+            f"Wniosków: {totals['wnioski']}, grup (firma / osoba / typ): {totals['groups']}",
+            normal_style,
+        ),
+        Spacer(1, 20),
+    ]
+
+    data = [["Firma", "Wnioski", "Kwota (PLN)", "Godziny"]]
+    data += [
+        [c["company"], str(c["wnioski"]), f"{c['payoff']:,.2f}", f"{c['hours']:,.2f}"]
+        for c in companies
+    ]
+    data.append(["Razem", str(totals["wnioski"]), f"{totals['payoff']:,.2f}", f"{totals['hours']:,.2f}"])
+
+    table = Table(data, colWidths=[7*cm, 2.5*cm, 3.5*cm, 3*cm], repeatRows=1)
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f3f4f6')),
+        ('FONTNAME', (0, 0), (-1, -1), fonts.regular),
+        ('FONTNAME', (0, 0), (-1, 0), fonts.bold),
+        ('FONTNAME', (0, -1), (-1, -1), fonts.bold),
+        ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
+        ('FONTSIZE', (0, 0), (-1, -1), 9),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e5e7eb')),
+    ]))
+    elements.append(table)
+    elements.append(Spacer(1, 20))
+    elements.append(Paragraph(
+        f"Wygenerowano automatycznie: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", normal_style
+    ))
+    doc.build(elements)
+    _finish(path, True)
+    return path
+
+
+def _month(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m").date()
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Miesięczny raport payroll per firma / osoba / typ WOZ")
+    parser.add_argument("billing_month", type=_month, help="Miesiąc rozliczeniowy RRRR-MM")
+    parser.add_argument("--format", dest="formats", action="append", choices=REPORT_FORMATS,
+                        help="Format wyjściowy (można powtórzyć; domyślnie csv i pdf)")
+    parser.add_argument("--output-dir", default=REPORT_OUTPUT_DIR, help="Katalog raportów")
+    return parser.parse_args(argv)
+
+
+async def main(argv=None):
+    from database import SessionLocal, dispose_engines
+    from logging_config import setup_logging, shutdown_logging
+
+    args = parse_args(argv)
+    setup_logging("reports")
+    try:
+        async with SessionLocal() as session:
+            report = await generate_monthly_report(
+                session, args.billing_month, args.formats or DEFAULT_FORMATS, args.output_dir
+            )
+        for path in report["files"].values():
+            print(path)
+    finally:
+        await dispose_engines()
+        shutdown_logging()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,140 @@
+"""
+Wyniki zadań PDF przez kolejkę - workery bez połączeń z bazą.
+
+PDF_RESULTS_MODE=db (domyślnie): worker sam przejmuje wniosek (Processing)
+i zapisuje status końcowy, więc każdy proces workera trzyma własną pulę
+połączeń i liczba workerów jest ograniczona przez max_connections bazy.
+
+PDF_RESULTS_MODE=bus:
+- API dokłada do zadania generate_pdf pełne dane wniosku (job_payload),
+- worker renderuje i zapisuje PDF bez dostępu do bazy, po czym publikuje
+  krótki wynik {"id", "status", "version", "pdf"} do kolejki wnioski_results,
+- ResultConsumer w procesie API odbiera wyniki (prefetch RESULTS_PREFETCH)
+  i zapisuje je przez StatusWriter: współbieżne wiadomości trafiają do
+  jednego grupowego UPDATE i jednego commitu, ack po commicie.
+
+Wynik zmienia status tylko, gdy wersja wniosku wciąż jest równa wersji
+z zadania - zmiana przez payroll w trakcie renderowania wygrywa.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from typing import TYPE_CHECKING, Optional, Set
+
+from metrics import PDF_RESULTS_APPLIED
+from models import Wniosek
+from publisher import RESULTS_QUEUE
+from status_writer import StatusWriter
+
+if TYPE_CHECKING:
+    import aio_pika
+
+logger = logging.getLogger("woz.results")
+
+PDF_RESULTS_MODE = os.getenv("PDF_RESULTS_MODE", "db")
+RESULTS_PREFETCH = int(os.getenv("RESULTS_PREFETCH", "100"))
+RESULT_STATUSES = ["Completed", "Failed"]
+
+
+def results_via_bus() -> bool:
+    return PDF_RESULTS_MODE == "bus"
+
+
+def job_payload(wniosek: Wniosek) -> dict:
+    """Zadanie generate_pdf z kompletem danych do renderowania."""
+    return {
+        "id": wniosek.id,
+        "action": "generate_pdf",
+        "title": wniosek.title,
+        "wniosek": wniosek.model_dump(mode="json"),
+    }
+
+
+def make_result(wniosek: Wniosek, status: str, pdf_path: Optional[str] = None) -> dict:
+    return {
+        "id": wniosek.id,
+        "status": status,
+        "version": wniosek.version,
+        "pdf": os.path.basename(pdf_path) if pdf_path else None,
+    }
+
+
+def parse_result(body: bytes) -> dict:
+    """Treść wiadomości wyniku; ValueError, gdy nie da się jej zastosować."""
+    try:
+        result = json.loads(body)
+        wniosek_id, status, version = result["id"], result["status"], result["version"]
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValueError(f"Nieprawidłowy wynik: {e}") from e
+    if not isinstance(wniosek_id, int) or not isinstance(version, int) or status not in RESULT_STATUSES:
+        raise ValueError(f"Nieprawidłowy wynik: {result!r}")
+    return result
+
+
+class ResultConsumer:
+    """Jeden konsument kolejki wnioski_results na proces API."""
+
+    def __init__(
+        self,
+        connection: "aio_pika.abc.AbstractRobustConnection",
+        session_factory,
+        prefetch: int = RESULTS_PREFETCH,
+    ):
+        self.connection = connection
+        self.prefetch = prefetch
+        self.writer = StatusWriter(session_factory)
+        self._channel = None
+        self._queue = None
+        self._consumer_tag: Optional[str] = None
+        self._in_flight: Set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        self.writer.start()
+        self._channel = await self.connection.channel()
+        await self._channel.set_qos(prefetch_count=self.prefetch)
+        self._queue = await self._channel.declare_queue(RESULTS_QUEUE, durable=True)
+        self._consumer_tag = await self._queue.consume(self.on_message)
+        logger.info("Odbiór wyników PDF uruchomiony", extra={"queue": RESULTS_QUEUE, "prefetch": self.prefetch})
+
+    async def stop(self) -> None:
+        """Przestaje pobierać, kończy zapis wyników w toku; reszta wraca do kolejki."""
+        if self._queue is not None:
+            await self._queue.cancel(self._consumer_tag)
+            self._queue = None
+        if self._in_flight:
+            await asyncio.wait(self._in_flight)
+        await self.writer.stop()
+        if self._channel is not None:
+            await self._channel.close()
+            self._channel = None
+
+    async def on_message(self, message: "aio_pika.abc.AbstractIncomingMessage") -> None:
+        try:
+            result = parse_result(message.body)
+        except ValueError as e:
+            logger.error("Odrzucono wynik zadania", extra={"error": str(e)})
+            PDF_RESULTS_APPLIED.inc(result="invalid")
+            await message.reject()
+            return
+
+        task = asyncio.current_task()
+        self._in_flight.add(task)
+        try:
+            # Błąd zapisu (np. baza niedostępna) - wynik wraca do kolejki
+            async with message.process(requeue=True):
+                await self.apply(result)
+        finally:
+            self._in_flight.discard(task)
+
+    async def apply(self, result: dict) -> bool:
+        applied = await self.writer.finish(result["id"], result["status"], result["version"])
+        PDF_RESULTS_APPLIED.inc(result="applied" if applied else "conflict")
+        if applied:
+            logger.info("Status wniosku zmieniony", extra={"wniosek_id": result["id"], "status": result["status"]})
+        else:
+            logger.warning("Wniosek zmieniony w trakcie przetwarzania - status bez zmian", extra={
+                "wniosek_id": result["id"], "status": result["status"],
+            })
+        return applied
@@ -0,0 +1,258 @@
+"""
+Wyszukiwanie pełnotekstowe i prefiksowe wniosków.
+
+- PostgreSQL: kolumna `search_vector` (tsvector, utrzymywana triggerem)
+  z indeksem GIN oraz indeksy trigramowe (pg_trgm) na title/person/company do podpowiedzi.
+  Konfiguracja `woz_search` (simple + unaccent) usuwa znaki diakrytyczne
+  z dokumentów i zapytań - jak `remove_diacritics` w FTS5 na SQLite.
+- SQLite (dev): tabela FTS5 `wniosek_fts` (external content) synchronizowana
+  triggerami, z indeksami prefiksowymi.
+
+Wyniki są rankowane i stronicowane kluczem (rank, id), więc kolejne strony
+nie wymagają OFFSET-u po milionach wierszy.
+"""
+
+import base64
+import json
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Numeric, and_, cast, column, event, func, literal_column, or_, select, table, text, true
+
+from models import Wniosek
+
+SEARCH_FIELDS = ["title", "person", "company", "comment"]
+SUGGEST_FIELDS = ["title", "person", "company"]
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+# Lekki opis wirtualnej tabeli FTS5 (SQLite) na potrzeby zapytań
+_wniosek_fts = table("wniosek_fts", column("rowid"))
+
+# Konfiguracja wyszukiwania PostgreSQL: to_tsvector(regconfig, text) jest
+# IMMUTABLE, w przeciwieństwie do samej funkcji unaccent()
+SEARCH_CONFIG = "woz_search"
+
+# search_vector utrzymywany triggerem, nie GENERATED ... STORED - dodanie
+# kolumny generowanej przepisuje całą tabelę pod blokadą wyłączną, a zwykła
+# kolumna bez wartości domyślnej dochodzi natychmiast i jest wypełniana paczkami
+_PG_VECTOR = """
+    setweight(to_tsvector('{config}', coalesce({row}title, '')), 'A') ||
+    setweight(to_tsvector('{config}', coalesce({row}person, '')), 'B') ||
+    setweight(to_tsvector('{config}', coalesce({row}company, '')), 'B') ||
+    setweight(to_tsvector('{config}', coalesce({row}comment, '')), 'C')
+"""
+
+
+def sync_function_ddl(config: str = SEARCH_CONFIG) -> str:
+    """Funkcja triggera wypełniającego search_vector (PostgreSQL)."""
+    return f"""
+    CREATE OR REPLACE FUNCTION wniosek_search_sync() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := {_PG_VECTOR.format(row="NEW.", config=config)};
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """
+
+
+_POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    f"""
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = '{SEARCH_CONFIG}') THEN
+            CREATE TEXT SEARCH CONFIGURATION {SEARCH_CONFIG} (COPY = simple);
+            ALTER TEXT SEARCH CONFIGURATION {SEARCH_CONFIG}
+                ALTER MAPPING FOR hword, hword_part, word WITH unaccent, simple;
+        END IF;
+    END $$
+    """,
+    "ALTER TABLE wniosek ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    sync_function_ddl(),
+    "DROP TRIGGER IF EXISTS wniosek_search_sync ON wniosek",
+    """
+    CREATE TRIGGER wniosek_search_sync
+    BEFORE INSERT OR UPDATE OF title, person, company, comment ON wniosek
+    FOR EACH ROW EXECUTE FUNCTION wniosek_search_sync()
+    """,
+]
+
+# Indeksy GIN: (nazwa, kolumna, klasa operatorów); migracja buduje je CONCURRENTLY
+POSTGRES_INDEXES = [
+    ("ix_wniosek_search_vector", "search_vector", None),
+    ("ix_wniosek_title_trgm", "title", "gin_trgm_ops"),
+    ("ix_wniosek_person_trgm", "person", "gin_trgm_ops"),
+    ("ix_wniosek_company_trgm", "company", "gin_trgm_ops"),
+]
+
+_SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS wniosek_fts USING fts5(
+        title, person, company, comment,
+        content='wniosek', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS wniosek_fts_ai AFTER INSERT ON wniosek BEGIN
+        INSERT INTO wniosek_fts(rowid, title, person, company, comment)
+        VALUES (new.id, new.title, new.person, new.company, new.comment);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS wniosek_fts_ad AFTER DELETE ON wniosek BEGIN
+        INSERT INTO wniosek_fts(wniosek_fts, rowid, title, person, company, comment)
+        VALUES ('delete', old.id, old.title, old.person, old.company, old.comment);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS wniosek_fts_au AFTER UPDATE OF title, person, company, comment ON wniosek BEGIN
+        INSERT INTO wniosek_fts(wniosek_fts, rowid, title, person, company, comment)
+        VALUES ('delete', old.id, old.title, old.person, old.company, old.comment);
+        INSERT INTO wniosek_fts(rowid, title, person, company, comment)
+        VALUES (new.id, new.title, new.person, new.company, new.comment);
+    END
+    """,
+]
+
+
+def backfill_statement(config: str = SEARCH_CONFIG):
+    """Wypełnia search_vector (PostgreSQL) dla wniosków o id z (:first_id, :last_id]."""
+    return text(
+        f"UPDATE wniosek SET search_vector = {_PG_VECTOR.format(row='', config=config)} "
+        "WHERE id > :first_id AND id <= :last_id"
+    )
+
+
+def create_search_schema(connection, indexes: bool = True, backfill: bool = True) -> None:
+    """
+    Tworzy (idempotentnie) struktury wyszukiwania dla bieżącego dialektu.
+    Migracja (indexes=False, backfill=False) wypełnia kolumnę paczkami
+    i buduje indeksy CONCURRENTLY.
+    """
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        exists = connection.execute(text(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_name = 'wniosek' AND column_name = 'search_vector'"
+        )).first()
+        for ddl in _POSTGRES_DDL:
+            connection.execute(text(ddl))
+        if not exists and backfill:
+            connection.execute(backfill_statement(), {"first_id": 0, "last_id": 2**62})
+        if indexes:
+            for name, column_name, ops in POSTGRES_INDEXES:
+                connection.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS {name} ON wniosek USING GIN ({column_name} {ops or ''})"
+                ))
+    elif dialect == "sqlite":
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE name = 'wniosek_fts'")
+        ).first()
+        for ddl in _SQLITE_DDL:
+            connection.execute(text(ddl))
+        if not exists:
+            # Zaindeksuj wiersze istniejące przed utworzeniem FTS
+            connection.execute(text("INSERT INTO wniosek_fts(wniosek_fts) VALUES ('rebuild')"))
+
+
+def drop_search_schema(connection) -> None:
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("DROP FUNCTION IF EXISTS wniosek_search_sync() CASCADE"))
+        connection.execute(text(f"DROP TEXT SEARCH CONFIGURATION IF EXISTS {SEARCH_CONFIG}"))
+    elif connection.dialect.name == "sqlite":
+        for trigger in ("wniosek_fts_ai", "wniosek_fts_ad", "wniosek_fts_au"):
+            connection.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+        connection.execute(text("DROP TABLE IF EXISTS wniosek_fts"))
+
+
+@event.listens_for(Wniosek.__table__, "after_create")
+def _after_create(target, connection, **kw):
+    create_search_schema(connection)
+
+
+@event.listens_for(Wniosek.__table__, "before_drop")
+def _before_drop(target, connection, **kw):
+    drop_search_schema(connection)
+
+
+# ============== ZAPYTANIA ==============
+
+def search_terms(q: str) -> List[str]:
+    """Dzieli zapytanie na słowa (bez znaków specjalnych składni FTS)."""
+    return _TERM_RE.findall(q.lower())[:10]
+
+
+def encode_cursor(rank, wniosek_id: int) -> str:
+    raw = json.dumps([str(rank), wniosek_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        rank, wniosek_id = json.loads(base64.urlsafe_b64decode(padded))
+        return str(rank), int(wniosek_id)
+    except (ValueError, TypeError):
+        raise ValueError("Nieprawidłowy kursor")
+
+
+def search_statement(dialect: str, q: str, columns: list, cursor: Optional[str] = None):
+    """
+    Zapytanie rankowane (kolumna `rank`), posortowane malejąco po (rank, id).
+    ValueError przy pustym zapytaniu lub nieprawidłowym kursorze.
+    """
+    terms = search_terms(q)
+    if not terms:
+        raise ValueError("Puste zapytanie wyszukiwania")
+
+    if dialect == "postgresql":
+        # Każde słowo jako prefiks: "tran kow" -> tran:* & kow:*
+        # Ta sama konfiguracja co dokumenty - "łukasz" i "lukasz" dają ten sam leksem
+        ts_query = func.to_tsquery(
+            literal_column(f"'{SEARCH_CONFIG}'::regconfig"), " & ".join(f"{t}:*" for t in terms)
+        )
+        search_vector = literal_column("wniosek.search_vector")
+        rank = func.round(cast(func.ts_rank_cd(search_vector, ts_query), Numeric), 6)
+        condition = search_vector.op("@@")(ts_query)
+        statement = select(*columns, rank.label("rank")).where(condition)
+    else:
+        fts = literal_column("wniosek_fts")  # nazwa tabeli jako argument MATCH/bm25
+        match = " ".join(f'"{t}"*' for t in terms)
+        # bm25: mniejszy = lepszy, odwracamy znak dla wspólnego porządku malejącego
+        rank = func.round(-func.bm25(fts, 10.0, 5.0, 5.0, 1.0), 6)
+        statement = (
+            select(*columns, rank.label("rank"))
+            .select_from(Wniosek)
+            .join(_wniosek_fts, _wniosek_fts.c.rowid == Wniosek.id)
+            .where(fts.op("MATCH")(match))
+        )
+
+    if cursor:
+        last_rank, last_id = decode_cursor(cursor)
+        last_rank = cast(last_rank, Numeric) if dialect == "postgresql" else float(last_rank)
+        statement = statement.where(or_(
+            rank < last_rank,
+            and_(rank == last_rank, Wniosek.id < last_id),
+        ))
+    return statement.order_by(rank.desc(), Wniosek.id.desc())
+
+
+def escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def suggest_statement(field: str, prefix: str, limit: int, owner: Optional[str] = None):
+    """Podpowiedzi (autocomplete): najczęstsze wartości pola zaczynające się od prefiksu."""
+    column = getattr(Wniosek, field)
+    condition = column.ilike(f"{escape_like(prefix)}%", escape="\\")
+    statement = (
+        select(column.label("value"), func.count().label("count"))
+        .where(condition, Wniosek.owner == owner if owner is not None else true())
+        .group_by(column)
+        .order_by(func.count().desc(), column)
+        .limit(limit)
+    )
+    return statement
@@ -0,0 +1,90 @@
+"""
+Szybka serializacja odpowiedzi JSON.
+
+Listy wniosków są budowane z surowych wierszy (select kolumn, bez obiektów
+ORM) i serializowane bezpośrednio przez orjson - z pominięciem
+jsonable_encoder i walidacji pydantic obiekt po obiekcie.
+"""
+
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Iterable, List, Mapping, Optional
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson jest opcjonalny
+    orjson = None
+
+
+def _default(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Typ {type(value).__name__} nie jest serializowalny do JSON")
+
+
+def dumps(content: Any) -> bytes:
+    """Serializuje do bajtów JSON (orjson, a bez niego json z biblioteki standardowej)."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """Odpowiedź JSON serializowana przez orjson (gdy dostępny)."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def parse_fields(fields: Optional[str], allowed: List[str], always: List[str] = ("id",)) -> List[str]:
+    """
+    Zamienia parametr `fields=a,b,c` na listę kolumn.
+    Brak parametru = wszystkie kolumny; nieznane nazwy = 400.
+    """
+    if not fields:
+        return list(allowed)
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Nieznane pola: {', '.join(unknown)}. Dozwolone: {', '.join(allowed)}"
+        )
+    selected = [f for f in always if f not in requested] + requested
+    # Kolejność jak w modelu, bez duplikatów
+    return [f for f in allowed if f in selected]
+
+
+# ============== EKSPORT ==============
+
+def ndjson_chunk(rows: Iterable[Mapping]) -> bytes:
+    """Paczka wierszy jako NDJSON (jeden obiekt JSON na linię)."""
+    return b"".join(dumps(dict(row)) + b"\n" for row in rows)
+
+
+def _csv_value(value: Any):
+    if isinstance(value, (dict, list)):
+        return dumps(value).decode("utf-8")
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def csv_chunk(rows: Iterable[Mapping], fields: List[str], header: bool = False) -> bytes:
+    """Paczka wierszy jako CSV (opcjonalnie z nagłówkiem)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(fields)
+    writer.writerows([_csv_value(row[f]) for f in fields] for row in rows)
+    return buffer.getvalue().encode("utf-8")
@@ -0,0 +1,89 @@
+"""
+Profil produkcyjny SQLite: plikowa baza współdzielona przez API i worker.
+
+- WAL i pragmy ustawiane przy każdym połączeniu (czytelnicy nie blokują
+  piszącego i odwrotnie; busy_timeout zamiast natychmiastowego
+  "database is locked"),
+- osobne pule: czytelnicy (wiele połączeń) i jeden piszący - zapisy w
+  procesie są szeregowane na puli, a nie przez blokadę pliku,
+- transakcje piszącego zaczynają się od BEGIN IMMEDIATE: blokada zapisu
+  brana od razu (z czekaniem busy_timeout), bez nieudanej eskalacji
+  odczyt -> zapis w środku transakcji,
+- RoutingSession kieruje INSERT/UPDATE/DELETE i flush do piszącego, resztę
+  do czytelników; po pierwszym zapisie transakcja zostaje przy piszącym
+  (widzi własne zmiany). Sesja z `info["write"]` (endpointy zmieniające
+  dane, main.get_write_session) od początku używa tylko piszącego - odczyt
+  przed zapisem (np. DELETE po SELECT) nie trafia na inne połączenie.
+
+Włączony dla plikowych baz SQLite; SQLITE_WAL=false wyłącza (np. baza na
+udziale sieciowym, gdzie WAL nie działa).
+"""
+
+import os
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    # W WAL bezpieczne dla spójności; ostatnie transakcje mogą zginąć tylko przy utracie zasilania
+    "synchronous": "NORMAL",
+    "busy_timeout": os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"),
+    "foreign_keys": "ON",
+    "cache_size": "-20000",  # 20 MB na połączenie
+    "temp_store": "MEMORY",
+    "mmap_size": str(256 * 1024 * 1024),
+}
+
+# Połączenia czytelników (każde to wątek aiosqlite)
+SQLITE_READERS = int(os.getenv("SQLITE_READERS", "8"))
+
+
+def profile_enabled(url: str) -> bool:
+    """Plikowa baza SQLite i brak SQLITE_WAL=false."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite":
+        return False
+    if parsed.database in (None, "", ":memory:") or "mode=memory" in str(parsed):
+        return False
+    return os.getenv("SQLITE_WAL", "true").lower() not in ("0", "false", "no")
+
+
+def configure_sqlite(engine, writer: bool) -> None:
+    """Pragmy przy połączeniu i jawne BEGIN (IMMEDIATE dla piszącego)."""
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        # Transakcjami steruje SQLAlchemy (event "begin"), nie sterownik sqlite3 -
+        # potrzebne też do poprawnych SAVEPOINT
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def _on_begin(connection):
+        connection.exec_driver_sql("BEGIN IMMEDIATE" if writer else "BEGIN")
+
+
+def routing_session_class(reader, writer):
+    """Klasa Session wybierająca pulę czytelników lub piszącego per instrukcja."""
+
+    class RoutingSession(Session):
+        _use_writer = False
+
+        def get_bind(self, mapper=None, clause=None, **kw):
+            if self._use_writer or self.info.get("write") or self._flushing or isinstance(clause, UpdateBase):
+                self._use_writer = True
+                return writer.sync_engine
+            return reader.sync_engine
+
+    @event.listens_for(RoutingSession, "after_transaction_end")
+    def _reset_writer(session, transaction):
+        if transaction.parent is None:
+            session._use_writer = False
+
+    return RoutingSession
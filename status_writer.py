@@ -0,0 +1,162 @@
+"""
+Zbiorczy zapis statusów w workerze.
+
+Przy prefetch > 1 wiele zadań jest w toku naraz i każde robi dwie zmiany
+statusu (przejęcie -> Processing, koniec -> Completed/Failed). Zamiast
+osobnego commitu dla każdej StatusWriter zbiera je przez STATUS_FLUSH_MS
+milisekund (albo do STATUS_FLUSH_MAX sztuk) i zapisuje w jednej transakcji:
+
+- przejęcia: UPDATE ... WHERE id IN (...) RETURNING * (claim_statement),
+- zakończenia: UPDATE ... SET status = CASE id WHEN ... END WHERE
+  version = CASE id WHEN ... END (grouped_transition_statement),
+- jedno bump_versions dla wszystkich właścicieli i jeden commit.
+
+claim() i finish() wracają dopiero po commicie paczki, więc ack wiadomości
+AMQP (po wyjściu z message.process()) następuje po trwałym zapisie. Błąd
+zapisu paczki dostają wszystkie czekające zadania - ich wiadomości nie są
+potwierdzane.
+
+Paczki wykonuje jedno zadanie asyncio (jeden pisarz): jeden BEGIN IMMEDIATE
+i jeden commit (fsync) zamiast N.
+"""
+
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from etags import bump_versions
+from metrics import WRITE_BATCH_SIZE
+from models import Wniosek
+from transitions import CLAIMABLE_STATUSES, claim_statement, grouped_transition_statement
+
+STATUS_FLUSH_MS = float(os.getenv("STATUS_FLUSH_MS", "5"))
+STATUS_FLUSH_MAX = int(os.getenv("STATUS_FLUSH_MAX", "100"))
+
+logger = logging.getLogger("woz.status_writer")
+
+
+def _rounds(batch: list) -> List[list]:
+    """Dzieli paczkę na rundy bez powtórzeń id (CASE id WHEN obsłuży jedno)."""
+    rounds: List[list] = []
+    seen: List[set] = []
+    for item in batch:
+        wniosek_id = item[0][1]
+        for ids, round_ in zip(seen, rounds):
+            if wniosek_id not in ids:
+                break
+        else:
+            ids, round_ = set(), []
+            seen.append(ids)
+            rounds.append(round_)
+        ids.add(wniosek_id)
+        round_.append(item)
+    return rounds
+
+
+class StatusWriter:
+    """Kolejka zmian statusu zapisywanych grupowymi UPDATE."""
+
+    def __init__(self, session_factory, max_batch: int = STATUS_FLUSH_MAX, max_delay_ms: float = STATUS_FLUSH_MS):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+        self._queue: "asyncio.Queue[tuple]" = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="status-writer")
+
+    async def stop(self) -> None:
+        """Wykonuje zmiany już przyjęte i kończy pracę."""
+        if self._task is None:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def claim(self, wniosek_id: int) -> Optional[Wniosek]:
+        """Waiting/Processing -> Processing; cały wiersz albo None (brak lub zamknięty)."""
+        return await self._enqueue(("claim", wniosek_id))
+
+    async def finish(self, wniosek_id: int, status: str, version: int) -> bool:
+        """
+        Waiting/Processing -> `status`, o ile wersja się zgadza; False przy
+        konflikcie. Każda zmiana statusu podbija wersję, więc zgodna wersja
+        oznacza stan z chwili przejęcia (Processing) albo - dla wyników z
+        kolejki (results.py) - z chwili utworzenia (Waiting).
+        """
+        return await self._enqueue(("finish", wniosek_id, status, version))
+
+    async def _enqueue(self, item) -> Any:
+        """Dodaje operację i czeka na commit jej paczki; zwraca jej wynik."""
+        if self._task is None:
+            raise RuntimeError("StatusWriter nie jest uruchomiony")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _next_batch(self) -> list:
+        batch = [await self._queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.max_delay
+        while len(batch) < self.max_batch:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0 and self._queue.empty():
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), max(timeout, 0)))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._execute(batch)
+            except Exception as e:
+                logger.exception("Błąd zapisu paczki", extra={"jobs": len(batch)})
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _execute(self, batch: list) -> None:
+        """Zapisuje paczkę [(operacja, future)] i ustawia wyniki futures."""
+        resolved = []
+        async with self.session_factory() as session:
+            owners = set()
+            for round_ in _rounds([item for item in batch if not item[1].cancelled()]):
+                claims = [(op, future) for op, future in round_ if op[0] == "claim"]
+                finishes = [(op, future) for op, future in round_ if op[0] == "finish"]
+                if claims:
+                    rows = (await session.execute(
+                        claim_statement([op[1] for op, _ in claims])
+                    )).scalars().all()
+                    claimed = {wniosek.id: wniosek for wniosek in rows}
+                    owners.update(wniosek.owner for wniosek in rows)
+                    for op, future in claims:
+                        resolved.append((future, claimed.get(op[1])))
+                if finishes:
+                    targets: Dict[int, Tuple[str, int]] = {op[1]: (op[2], op[3]) for op, _ in finishes}
+                    rows = (await session.execute(
+                        grouped_transition_statement(targets, CLAIMABLE_STATUSES)
+                    )).all()
+                    updated = {row.id for row in rows}
+                    owners.update(row.owner for row in rows)
+                    for op, future in finishes:
+                        resolved.append((future, op[1] in updated))
+            if owners:
+                await bump_versions(session, owners)
+            await session.commit()
+        WRITE_BATCH_SIZE.observe(len(batch))
+        for future, result in resolved:
+            if not future.done():
+                future.set_result(result)
@@ -3,14 +3,52 @@ Pytest configuration and fixtures for WOZ tests.
 """
 
 import asyncio
+import json
+import os
+import platform
+import time
 import pytest
 import pytest_asyncio
 from httpx import AsyncClient, ASGITransport
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlmodel import SQLModel
 
-# Test database URL (in-memory SQLite)
-TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+# Rejestruje tabele (i DDL wyszukiwania oraz godzin) w SQLModel.metadata
+# przed create_all w fixture test_engine
+import database  # noqa: F401
+import hours  # noqa: F401
+import search  # noqa: F401
+
+# Test database URL (domyślnie in-memory SQLite, np. Postgres przez TEST_DATABASE_URL)
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+
+def pytest_addoption(parser):
+    """Opcje uruchamiania benchmarków."""
+    group = parser.getgroup("benchmark")
+    group.addoption("--benchmark", action="store_true", default=False,
+                    help="Uruchom testy wydajnościowe (marker 'benchmark')")
+    group.addoption("--bench-concurrency", type=int,
+                    default=int(os.getenv("BENCH_CONCURRENCY", "10")),
+                    help="Liczba równoległych klientów")
+    group.addoption("--bench-requests", type=int,
+                    default=int(os.getenv("BENCH_REQUESTS", "200")),
+                    help="Liczba żądań na scenariusz")
+    group.addoption("--bench-output", default=os.getenv("BENCH_OUTPUT", "bench_results.json"),
+                    help="Plik JSON z wynikami benchmarków")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: test wydajnościowy (uruchamiany z --benchmark)")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--benchmark"):
+        return
+    skip = pytest.mark.skip(reason="benchmark - uruchom z --benchmark")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
 
 
 @pytest.fixture(scope="session")
@@ -53,8 +91,12 @@ async def test_session(test_engine):
 async def client(test_engine):
     """Create test client with test database."""
     from main import app
+    from cache import clear_caches
     from database import get_session
     
+    # Wersje danych zaczynają się od nowa w każdej bazie testowej
+    clear_caches()
+    
     # Override database session
     SessionLocal = async_sessionmaker(
         bind=test_engine,
@@ -75,6 +117,60 @@ async def client(test_engine):
     app.dependency_overrides.clear()
 
 
+class BenchmarkRecorder:
+    """Zbiera wyniki benchmarków i zapisuje je jako JSON na koniec sesji."""
+
+    def __init__(self, concurrency: int, requests: int):
+        self.concurrency = concurrency
+        self.requests = requests
+        self.results = []
+
+    def record(self, name: str, latencies: list, total_s: float, **extra):
+        """Dodaje wynik scenariusza (latencje w sekundach)."""
+        ordered = sorted(latencies)
+
+        def pct(p):
+            if not ordered:
+                return 0.0
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 3)
+
+        result = {
+            "name": name,
+            "operations": len(ordered),
+            "total_s": round(total_s, 4),
+            "ops_per_s": round(len(ordered) / total_s, 2) if total_s else 0.0,
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "p99_ms": pct(0.99),
+            **extra,
+        }
+        self.results.append(result)
+        return result
+
+    def dump(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "database": TEST_DATABASE_URL.split("://")[0],
+                "concurrency": self.concurrency,
+                "requests": self.requests,
+                "results": self.results,
+            }, f, indent=2)
+
+
+@pytest.fixture(scope="session")
+def bench(request):
+    """Rejestrator wyników benchmarków (zapis do --bench-output)."""
+    recorder = BenchmarkRecorder(
+        concurrency=request.config.getoption("--bench-concurrency"),
+        requests=request.config.getoption("--bench-requests"),
+    )
+    yield recorder
+    if recorder.results:
+        recorder.dump(request.config.getoption("--bench-output"))
+
+
 @pytest.fixture
 def sample_wniosek_data():
     """Sample wniosek data for testing."""
@@ -25,6 +25,30 @@ class TestHealthEndpoints:
         data = response.json()
         assert data["status"] == "healthy"
 
+    @pytest.mark.asyncio
+    async def test_metrics(self, client, sample_wniosek_data):
+        """Test Prometheus metrics endpoint."""
+        await client.post("/wnioski/", json=sample_wniosek_data)
+        await client.get("/wnioski/1")
+
+        response = await client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        body = response.text
+        assert "# TYPE woz_http_request_duration_seconds histogram" in body
+        # Ścieżka jako szablon trasy, a nie konkretne ID
+        assert 'route="/wnioski/{wniosek_id}"' in body
+
+
+    @pytest.mark.asyncio
+    async def test_request_id_propagated(self, client):
+        """Test that X-Request-ID is echoed back (or generated)."""
+        response = await client.get("/health", headers={"X-Request-ID": "abc123"})
+        assert response.headers["x-request-id"] == "abc123"
+
+        response = await client.get("/health")
+        assert len(response.headers["x-request-id"]) == 32
+
 
 class TestWnioskiEndpoints:
     """Tests for wnioski CRUD endpoints."""
@@ -60,6 +84,25 @@ class TestWnioskiEndpoints:
         assert len(data) == 1
         assert data[0]["title"] == sample_wniosek_data["title"]
 
+    @pytest.mark.asyncio
+    async def test_get_wnioski_fields_projection(self, client, sample_wniosek_data):
+        """Test that fields= returns only selected columns (plus id)."""
+        await client.post("/wnioski/", json={**sample_wniosek_data, "hours": {"2026-01-02": 8}})
+
+        response = await client.get("/wnioski/?user=test&role=payroll&fields=title,status")
+        assert response.status_code == 200
+        assert response.json() == [{"id": 1, "title": sample_wniosek_data["title"], "status": "Waiting"}]
+
+        full = (await client.get("/wnioski/?user=test&role=payroll")).json()[0]
+        assert full["hours"] == {"2026-01-02": 8}
+        assert full["created_date"]
+
+    @pytest.mark.asyncio
+    async def test_get_wnioski_unknown_field(self, client):
+        """Test that unknown projection fields are rejected."""
+        response = await client.get("/wnioski/?user=test&role=payroll&fields=title,password")
+        assert response.status_code == 400
+
     @pytest.mark.asyncio
     async def test_get_wniosek_by_id(self, client, sample_wniosek_data):
         """Test getting a specific wniosek by ID."""
@@ -130,6 +173,135 @@ class TestWnioskiEndpoints:
         assert response.status_code == 422  # Validation error
 
 
+class TestSearch:
+    """Tests for full-text search, keyset paging and autocomplete."""
+
+    @pytest.mark.asyncio
+    async def test_search_prefix_and_diacritics(self, client, sample_wniosek_data):
+        """Test prefix search across columns, ignoring Polish diacritics."""
+        await client.post("/wnioski/", json={**sample_wniosek_data, "person": "Anna Wiśniewska"})
+        await client.post("/wnioski/", json={**sample_wniosek_data, "company": "Transpol"})
+        await client.post("/wnioski/", json={**sample_wniosek_data, "comment": "nadgodziny weekend"})
+
+        response = await client.get("/wnioski/?user=test&role=payroll&q=wisn")
+        assert [w["id"] for w in response.json()] == [1]
+
+        response = await client.get("/wnioski/?user=test&role=payroll&q=trans&fields=company")
+        data = response.json()
+        assert [w["company"] for w in data] == ["Transpol"]
+        assert "rank" in data[0]
+
+        response = await client.get("/wnioski/?user=test&role=payroll&q=nadgodz")
+        assert [w["id"] for w in response.json()] == [3]
+
+    @pytest.mark.asyncio
+    async def test_search_keyset_pagination(self, client, sample_wniosek_data):
+        """Test that X-Next-Cursor walks all results without duplicates."""
+        for _ in range(5):
+            await client.post("/wnioski/", json=sample_wniosek_data)
+
+        seen, cursor = [], None
+        while True:
+            url = "/wnioski/?user=test&role=payroll&q=test&limit=2"
+            response = await client.get(url + (f"&cursor={cursor}" if cursor else ""))
+            seen += [w["id"] for w in response.json()]
+            cursor = response.headers.get("x-next-cursor")
+            if not cursor:
+                break
+        assert sorted(seen) == [1, 2, 3, 4, 5]
+
+    @pytest.mark.asyncio
+    async def test_search_rejects_offset(self, client, sample_wniosek_data):
+        """Test that offset cannot be combined with q (search pages by cursor)."""
+        await client.post("/wnioski/", json=sample_wniosek_data)
+        response = await client.get("/wnioski/?user=test&role=payroll&q=test&offset=1")
+        assert response.status_code == 400
+        response = await client.get("/wnioski/?user=test&role=payroll&q=test&cursor=nie-kursor")
+        assert response.status_code == 400
+
+    def test_postgres_search_ignores_diacritics(self):
+        """Test that the PostgreSQL vector and query both use the unaccent configuration."""
+        from sqlalchemy.dialects import postgresql
+
+        import search
+        from models import Wniosek
+
+        sql = str(search.search_statement("postgresql", "Łukasz", [Wniosek.id]).compile(dialect=postgresql.dialect()))
+        assert f"to_tsquery('{search.SEARCH_CONFIG}'::regconfig" in sql
+        assert f"to_tsvector('{search.SEARCH_CONFIG}'" in str(search.backfill_statement())
+        assert "'simple'" not in search.sync_function_ddl()
+
+    @pytest.mark.asyncio
+    async def test_suggest(self, client, sample_wniosek_data):
+        """Test autocomplete of company names by prefix."""
+        for company in ["Transpol", "Transpol", "Translog", "Autotrans"]:
+            await client.post("/wnioski/", json={**sample_wniosek_data, "company": company})
+
+        response = await client.get("/wnioski/suggest?field=company&prefix=tra")
+        assert response.json() == [
+            {"value": "Transpol", "count": 2},
+            {"value": "Translog", "count": 1},
+        ]
+
+
+class TestConditionalRequests:
+    """Tests for ETag / If-None-Match handling."""
+
+    @pytest.mark.asyncio
+    async def test_list_not_modified_until_write(self, client, sample_wniosek_data):
+        """Test 304 on unchanged list and a new ETag after a write."""
+        await client.post("/wnioski/", json={**sample_wniosek_data, "owner": "jan"})
+        url = "/wnioski/?user=jan"
+
+        first = await client.get(url)
+        etag = first.headers["etag"]
+        assert etag.startswith('W/"')
+
+        cached = await client.get(url, headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.content == b""
+
+        # Zapis innego właściciela nie unieważnia listy "jan"
+        await client.post("/wnioski/", json={**sample_wniosek_data, "owner": "anna"})
+        assert (await client.get(url, headers={"If-None-Match": etag})).status_code == 304
+
+        await client.put("/wnioski/1/status?new_status=Rejected")
+        changed = await client.get(url, headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.headers["etag"] != etag
+
+    @pytest.mark.asyncio
+    async def test_writes_bump_only_owner_scopes(self, test_session):
+        """Test that writes skip the table-wide row and the table version is the sum over owners."""
+        from sqlalchemy import select
+
+        from etags import TABLE_SCOPE, bump_versions, get_version, owner_scope
+        from models import ChangeVersion
+
+        await bump_versions(test_session, ["jan", None])
+        await bump_versions(test_session, ["anna"])
+        await bump_versions(test_session, ["jan"])
+        await test_session.commit()
+
+        scopes = {row.scope: row.version for row in (await test_session.execute(select(ChangeVersion))).scalars()}
+        assert scopes == {"owner:jan": 2, "owner:": 1, "owner:anna": 1}
+        assert await get_version(test_session, owner_scope("jan")) == 2
+        assert await get_version(test_session, TABLE_SCOPE) == 4
+
+    @pytest.mark.asyncio
+    async def test_stats_and_detail_etag(self, client, sample_wniosek_data):
+        """Test 304 for /stats/ and /wnioski/{id}, invalidated by delete."""
+        await client.post("/wnioski/", json=sample_wniosek_data)
+        stats_etag = (await client.get("/stats/")).headers["etag"]
+        detail_etag = (await client.get("/wnioski/1")).headers["etag"]
+
+        assert (await client.get("/stats/", headers={"If-None-Match": stats_etag})).status_code == 304
+        assert (await client.get("/wnioski/1", headers={"If-None-Match": detail_etag})).status_code == 304
+
+        await client.delete("/wnioski/1")
+        assert (await client.get("/stats/", headers={"If-None-Match": stats_etag})).status_code == 200
+
+
 class TestStatsEndpoint:
     """Tests for statistics endpoint."""
 
@@ -155,3 +327,206 @@ class TestStatsEndpoint:
         data = response.json()
         assert data["total_wnioski"] == 2
         assert data["total_payoff"] == 3000.0  # 1500 * 2
+
+
+class TestHoursReport:
+    """Tests for SQL-side filtering and aggregation of worked hours."""
+
+    @pytest.mark.asyncio
+    async def test_hours_by_month_and_day(self, client, sample_wniosek_data):
+        """Test sums per month/day, including rows removed by delete."""
+        await client.post("/wnioski/", json={
+            **sample_wniosek_data,
+            "hours": {"2026-01-02": 8, "2026-01-05": 6, "2026-02-02": 4, "note": 3, "2026-01-06": "x"},
+        })
+        await client.post("/wnioski/", json={**sample_wniosek_data, "hours": {"2026-01-02": 10}})
+        response = await client.post("/wnioski/", json={**sample_wniosek_data, "hours": {"2026-01-02": 1}})
+        await client.delete(f"/wnioski/{response.json()['id']}")
+
+        data = (await client.get("/stats/hours")).json()
+        assert data["total_hours"] == 28
+        assert data["periods"] == [
+            {"period": "2026-01", "hours": 24, "wnioski": 2},
+            {"period": "2026-02", "hours": 4, "wnioski": 1},
+        ]
+
+        response = await client.get("/stats/hours?group_by=day&date_from=2026-01-03&date_to=2026-01-31")
+        assert response.json()["periods"] == [{"period": "2026-01-05", "hours": 6, "wnioski": 1}]
+
+    @pytest.mark.asyncio
+    async def test_list_worked_on(self, client, sample_wniosek_data):
+        """Test filtering the list by a day with recorded hours."""
+        await client.post("/wnioski/", json={**sample_wniosek_data, "hours": {"2026-01-02": 8}})
+        await client.post("/wnioski/", json={**sample_wniosek_data, "hours": {"2026-01-05": 8}})
+
+        response = await client.get("/wnioski/?user=test&role=payroll&worked_on=2026-01-05&fields=id")
+        assert response.json() == [{"id": 2}]
+
+
+class TestProfiling:
+    """Tests for the opt-in per-request profiler."""
+
+    @pytest.mark.asyncio
+    async def test_profile_requires_admin(self, client):
+        """Test that profiling header without admin token is rejected."""
+        response = await client.get("/stats/", headers={"X-Profile": "1"})
+        assert response.status_code == 403
+
+    @pytest.mark.asyncio
+    async def test_profile_report(self, client, test_session, sample_wniosek_data, tmp_path, monkeypatch):
+        """Test that an admin gets Server-Timing and a stored report."""
+        from datetime import datetime, timezone
+
+        import profiling
+        from auth import create_access_token
+        from models import User
+
+        monkeypatch.setattr(profiling, "PROFILE_OUTPUT_DIR", str(tmp_path))
+        admin = User(
+            email="admin@example.com", password_hash="x", full_name="Admin",
+            role="admin", created_at=datetime.now(timezone.utc),
+        )
+        test_session.add(admin)
+        await test_session.commit()
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': str(admin.id)})}"}
+
+        await client.post("/wnioski/", json=sample_wniosek_data)
+        response = await client.get(
+            "/wnioski/?user=test&role=payroll", headers={**headers, "X-Profile": "1"}
+        )
+        assert response.status_code == 200
+        assert "db;dur=" in response.headers["server-timing"]
+        profile_id = response.headers["x-profile-id"]
+
+        report = (await client.get(f"/admin/profiles/{profile_id}", headers=headers)).json()
+        assert report["path"] == "/wnioski/"
+        assert report["sql_count"] >= 1
+        assert any("FROM wniosek" in s["statement"] for s in report["sql"])
+        assert report["top_functions"]
+
+    @pytest.mark.asyncio
+    async def test_concurrent_profiles(self, client, test_session, tmp_path, monkeypatch):
+        """Test that a second profiled request during a profile is served unprofiled."""
+        import asyncio
+        from datetime import datetime, timezone
+
+        import profiling
+        from auth import create_access_token
+        from database import get_session
+        from main import app
+        from models import User
+
+        monkeypatch.setattr(profiling, "PROFILE_OUTPUT_DIR", str(tmp_path))
+        admin = User(
+            email="admin@example.com", password_hash="x", full_name="Admin",
+            role="admin", created_at=datetime.now(timezone.utc),
+        )
+        test_session.add(admin)
+        await test_session.commit()
+        headers = {
+            "Authorization": f"Bearer {create_access_token({'sub': str(admin.id)})}",
+            "X-Profile": "1",
+        }
+
+        # Pierwsze żądanie zatrzymuje się w zależności endpointu, trzymając
+        # aktywny profil (sesja z is_admin idzie tą samą ścieżką, ale przed profilem)
+        entered, release = asyncio.Event(), asyncio.Event()
+        original = app.dependency_overrides[get_session]
+
+        async def gated_session():
+            async for session in original():
+                if profiling.profile_in_progress() and not entered.is_set():
+                    entered.set()
+                    await release.wait()
+                yield session
+
+        monkeypatch.setitem(app.dependency_overrides, get_session, gated_session)
+        first = asyncio.create_task(client.get("/stats/", headers=headers))
+        await asyncio.wait_for(entered.wait(), timeout=5)
+
+        second = await client.get("/stats/", headers=headers)
+        assert second.status_code == 200
+        assert "x-profile-id" not in second.headers
+        assert "x-profile-skipped" in second.headers
+
+        release.set()
+        first = await first
+        assert first.status_code == 200
+        assert "x-profile-id" in first.headers
+        assert not profiling.profile_in_progress()
+
+        third = await client.get("/stats/", headers=headers)
+        assert "x-profile-id" in third.headers
+
+
+class TestBulkStatus:
+    """Tests for bulk status transitions."""
+
+    @staticmethod
+    async def payroll_headers(test_session, role="payroll"):
+        from datetime import datetime, timezone
+
+        from auth import create_access_token
+        from models import User
+
+        user = User(
+            email=f"{role}@example.com", password_hash="x", full_name=role,
+            role=role, created_at=datetime.now(timezone.utc),
+        )
+        test_session.add(user)
+        await test_session.commit()
+        return {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+
+    @pytest.mark.asyncio
+    async def test_bulk_by_ids(self, client, test_session, sample_wniosek_data, monkeypatch):
+        """Test per-id results and chunked updates."""
+        import transitions
+
+        monkeypatch.setattr(transitions, "BULK_CHUNK_SIZE", 2)
+        headers = await self.payroll_headers(test_session)
+        for status in ["Waiting", "Waiting", "Rejected", "Completed"]:
+            await client.post("/wnioski/", json={**sample_wniosek_data, "status": status})
+        etag = (await client.get("/wnioski/1")).headers["etag"]
+
+        response = await client.put(
+            "/wnioski/status", json={"ids": [1, 2, 3, 4, 99, 1], "new_status": "Completed"}, headers=headers
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["summary"] == {"updated": 2, "invalid_transition": 1, "unchanged": 1, "not_found": 1}
+        assert data["results"] == [
+            {"id": 1, "result": "updated", "old_status": "Waiting"},
+            {"id": 2, "result": "updated", "old_status": "Waiting"},
+            {"id": 3, "result": "invalid_transition", "old_status": "Rejected"},
+            {"id": 4, "result": "unchanged", "old_status": "Completed"},
+            {"id": 99, "result": "not_found"},
+        ]
+        assert (await client.get("/wnioski/2")).json()["status"] == "Completed"
+        assert (await client.get("/wnioski/1", headers={"If-None-Match": etag})).status_code == 200
+
+    @pytest.mark.asyncio
+    async def test_bulk_by_filter(self, client, test_session, sample_wniosek_data):
+        """Test rejecting all waiting wnioski of one billing month."""
+        headers = await self.payroll_headers(test_session)
+        await client.post("/wnioski/", json={**sample_wniosek_data, "billing_month": "2026-01-01"})
+        await client.post("/wnioski/", json={**sample_wniosek_data, "billing_month": "2026-02-01"})
+
+        response = await client.put("/wnioski/status", json={
+            "status": "Waiting", "billing_month": "2026-01-01", "new_status": "Rejected",
+        }, headers=headers)
+        assert response.status_code == 200
+        assert response.json()["results"] == [{"id": 1, "result": "updated", "old_status": "Waiting"}]
+        assert (await client.get("/wnioski/2")).json()["status"] == "Waiting"
+
+    @pytest.mark.asyncio
+    async def test_bulk_validation_and_role(self, client, test_session):
+        """Test that the request needs ids xor a filter and a payroll/admin role."""
+        headers = await self.payroll_headers(test_session)
+        body = {"ids": [1], "status": "Waiting", "new_status": "Completed"}
+        assert (await client.put("/wnioski/status", json=body, headers=headers)).status_code == 400
+        body = {"ids": [1], "new_status": "Approved"}
+        assert (await client.put("/wnioski/status", json=body, headers=headers)).status_code == 400
+
+        user_headers = await self.payroll_headers(test_session, role="user")
+        body = {"ids": [1], "new_status": "Completed"}
+        assert (await client.put("/wnioski/status", json=body, headers=user_headers)).status_code == 403
@@ -0,0 +1,99 @@
+"""
+Tests for cold archival of closed wnioski and their PDFs.
+"""
+
+import os
+from datetime import date
+
+import pytest
+
+from archive import archive_batch, archive_cutoff
+
+
+class TestArchive:
+    """Tests for archive job and read-through endpoints."""
+
+    def test_cutoff(self):
+        """Test that the cutoff is the first non-archived month."""
+        assert archive_cutoff(12, today=date(2026, 3, 15)) == date(2025, 3, 1)
+
+    @pytest.mark.asyncio
+    async def test_archive_and_read_through(self, client, test_session, sample_wniosek_data, tmp_path, monkeypatch):
+        """Test moving old closed wnioski with PDFs and serving them afterwards."""
+        pdf_dir, archive_dir = tmp_path / "pdfs", tmp_path / "archive"
+        pdf_dir.mkdir()
+        monkeypatch.setenv("PDF_OUTPUT_DIR", str(pdf_dir))
+        monkeypatch.setenv("PDF_ARCHIVE_DIR", str(archive_dir))
+
+        old = {**sample_wniosek_data, "billing_month": "2024-01-01", "hours": {"2024-01-02": 8}}
+        await client.post("/wnioski/", json={**old, "status": "Completed"})
+        await client.post("/wnioski/", json={**old, "status": "Waiting"})
+        await client.post("/wnioski/", json={**sample_wniosek_data, "status": "Completed"})
+        (pdf_dir / "wniosek_1_20240205_101500.pdf").write_bytes(b"%PDF-1.4 archiwum")
+
+        archived = await archive_batch(
+            test_session, date(2025, 1, 1), pdf_dir=str(pdf_dir), archive_dir=str(archive_dir)
+        )
+        assert archived == 1
+        assert not os.listdir(pdf_dir)
+        assert os.listdir(archive_dir) == ["pdf_2024-01.zip"]
+
+        response = await client.get("/wnioski/?user=test&role=payroll&fields=id")
+        assert [w["id"] for w in response.json()] == [3, 2]
+        assert (await client.get("/stats/hours")).json()["total_hours"] == 8
+
+        response = await client.get("/wnioski/1")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["archived"] is True
+        assert data["billing_month"] == "2024-01-01"
+        assert data["hours"] == {"2024-01-02": 8}
+
+        response = await client.get("/wnioski/1/pdf")
+        assert response.status_code == 200
+        assert response.content == b"%PDF-1.4 archiwum"
+
+        assert await archive_batch(test_session, date(2025, 1, 1), pdf_dir=str(pdf_dir)) == 0
+
+    @pytest.mark.asyncio
+    async def test_skips_row_reopened_after_select(self, client, test_session, sample_wniosek_data, tmp_path, monkeypatch):
+        """Test that a wniosek reopened between the SELECT and the DELETE stays in the hot table."""
+        from sqlalchemy import select, update
+
+        from models import Wniosek, WniosekArchive
+
+        pdf_dir = tmp_path / "pdfs"
+        pdf_dir.mkdir()
+        old = {**sample_wniosek_data, "billing_month": "2024-01-01", "status": "Rejected"}
+        await client.post("/wnioski/", json=old)
+        await client.post("/wnioski/", json=old)
+        (pdf_dir / "wniosek_1_20240205_101500.pdf").write_bytes(b"%PDF")
+
+        execute = test_session.execute
+        reopened = []
+
+        async def reopen_after_select(statement, *args, **kwargs):
+            result = await execute(statement, *args, **kwargs)
+            if not reopened:
+                reopened.append(True)
+                await execute(update(Wniosek).where(Wniosek.id == 1).values(status="Waiting", version=Wniosek.version + 1))
+            return result
+
+        monkeypatch.setattr(test_session, "execute", reopen_after_select)
+        archived = await archive_batch(
+            test_session, date(2025, 1, 1), pdf_dir=str(pdf_dir), archive_dir=str(tmp_path / "archive")
+        )
+
+        assert archived == 1
+        assert (await execute(select(Wniosek.id, Wniosek.status))).all() == [(1, "Waiting")]
+        assert (await execute(select(WniosekArchive.id))).scalars().all() == [2]
+        assert os.listdir(pdf_dir) == ["wniosek_1_20240205_101500.pdf"]
+
+    def test_index_pdfs(self, tmp_path):
+        """Test that one listing indexes PDFs per wniosek, newest last."""
+        from archive import index_pdfs
+
+        for name in ("wniosek_2_20240102.pdf", "wniosek_2_20240101.pdf", "wniosek_10_x.pdf", "wniosek_3_x.pdf.tmp", "raport.pdf"):
+            (tmp_path / name).write_bytes(b"")
+        (tmp_path / "reports").mkdir()
+        assert index_pdfs(str(tmp_path)) == {2: ["wniosek_2_20240101.pdf", "wniosek_2_20240102.pdf"], 10: ["wniosek_10_x.pdf"]}
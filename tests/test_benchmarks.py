@@ -0,0 +1,263 @@
+"""
+Benchmark suite for WOZ API and PDF pipeline.
+
+Testy są pomijane domyślnie; uruchomienie:
+    pytest tests/test_benchmarks.py --benchmark --bench-concurrency 20 --bench-requests 500
+Wyniki trafiają do pliku JSON (--bench-output, domyślnie bench_results.json).
+"""
+
+import asyncio
+import itertools
+import os
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel, select
+
+from conftest import TEST_DATABASE_URL
+
+pytestmark = pytest.mark.benchmark
+
+
+@pytest_asyncio.fixture(scope="function")
+async def test_engine(tmp_path):
+    """
+    Silnik testowy dla benchmarków.
+    Każde połączenie do sqlite :memory: to osobna baza, więc przy współbieżnych
+    sesjach używamy pliku SQLite w katalogu tymczasowym.
+    """
+    url = TEST_DATABASE_URL
+    if url.endswith(":memory:"):
+        url = f"sqlite+aiosqlite:///{tmp_path / 'bench.db'}"
+    engine = create_async_engine(url, echo=False)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    yield engine
+
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all)
+
+    await engine.dispose()
+
+
+async def run_load(total: int, concurrency: int, call):
+    """Wykonuje `total` wywołań `call(i)` przez `concurrency` równoległych klientów."""
+    counter = itertools.count()
+    latencies = []
+
+    async def client_loop():
+        while (i := next(counter)) < total:
+            start = time.perf_counter()
+            response = await call(i)
+            latencies.append(time.perf_counter() - start)
+            assert response.status_code < 400, response.text
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - start
+
+
+# ============== IN-PROCESS AMQP ==============
+
+class InMemoryMessage:
+    """Odpowiednik aio_pika.IncomingMessage dla kolejki w pamięci."""
+
+    def __init__(self, message):
+        self.body = message.body
+        self.headers = message.headers
+        self.correlation_id = message.correlation_id
+        self.acked = False
+
+    @asynccontextmanager
+    async def process(self, requeue=False):
+        yield
+        self.acked = True
+
+
+class _Exchange:
+    def __init__(self, broker):
+        self.broker = broker
+
+    async def publish(self, message, routing_key):
+        await self.broker.queue(routing_key).put(InMemoryMessage(message))
+
+
+class _Channel:
+    def __init__(self, broker):
+        self.default_exchange = _Exchange(broker)
+        self.broker = broker
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def declare_queue(self, name, durable=False):
+        return self.broker.queue(name)
+
+
+class InMemoryBroker:
+    """Zastępuje połączenie RabbitMQ (aio_pika.RobustConnection) w procesie testu."""
+
+    is_closed = False
+
+    def __init__(self):
+        self._queues = {}
+
+    def queue(self, name: str) -> asyncio.Queue:
+        return self._queues.setdefault(name, asyncio.Queue())
+
+    def channel(self):
+        return _Channel(self)
+
+    async def close(self):
+        self.is_closed = True
+
+
+# ============== API ==============
+
+class TestApiBenchmarks:
+    """Throughput and latency of the main API endpoints."""
+
+    @pytest.mark.asyncio
+    async def test_bench_create_wniosek(self, client, bench, sample_wniosek_data):
+        """POST /wnioski/ at configured concurrency."""
+        latencies, total = await run_load(
+            bench.requests, bench.concurrency,
+            lambda i: client.post("/wnioski/", json={**sample_wniosek_data, "owner": f"user{i % 10}"}),
+        )
+        bench.record("POST /wnioski/", latencies, total, concurrency=bench.concurrency)
+
+    @pytest.mark.asyncio
+    async def test_bench_list_wnioski(self, client, bench, sample_wniosek_data):
+        """GET /wnioski/ (payroll, 100 rows) at configured concurrency."""
+        await run_load(500, bench.concurrency, lambda i: client.post("/wnioski/", json=sample_wniosek_data))
+        latencies, total = await run_load(
+            bench.requests, bench.concurrency,
+            lambda i: client.get("/wnioski/?user=bench&role=payroll&limit=100"),
+        )
+        bench.record("GET /wnioski/", latencies, total, concurrency=bench.concurrency, rows=100)
+
+    @pytest.mark.asyncio
+    async def test_bench_stats(self, client, bench, sample_wniosek_data):
+        """GET /stats/ over 500 rows at configured concurrency."""
+        await run_load(500, bench.concurrency, lambda i: client.post("/wnioski/", json=sample_wniosek_data))
+        latencies, total = await run_load(
+            bench.requests, bench.concurrency, lambda i: client.get("/stats/"),
+        )
+        bench.record("GET /stats/", latencies, total, concurrency=bench.concurrency, rows=500)
+
+    @pytest.mark.asyncio
+    async def test_bench_login(self, client, test_session, bench, sample_user_data):
+        """POST /auth/login (dominated by bcrypt) at configured concurrency."""
+        from auth import hash_password
+        from models import User
+
+        test_session.add(User(
+            email=sample_user_data["email"],
+            password_hash=hash_password(sample_user_data["password"]),
+            full_name=sample_user_data["full_name"],
+            created_at=datetime.now(timezone.utc),
+        ))
+        await test_session.commit()
+
+        credentials = {"email": sample_user_data["email"], "password": sample_user_data["password"]}
+        requests = max(1, bench.requests // 10)
+        latencies, total = await run_load(
+            requests, bench.concurrency, lambda i: client.post("/auth/login", json=credentials),
+        )
+        bench.record("POST /auth/login", latencies, total, concurrency=bench.concurrency)
+
+
+# ============== PDF ==============
+
+class TestPdfBenchmarks:
+    """Render throughput of worker.generate_pdf and the full pipeline."""
+
+    def test_bench_generate_pdf(self, bench, sample_wniosek_data, tmp_path, monkeypatch):
+        """Renders per second of worker.generate_pdf."""
+        import worker
+        from models import Wniosek
+
+        monkeypatch.setattr(worker, "PDF_OUTPUT_DIR", str(tmp_path))
+        wniosek = Wniosek.model_validate({
+            "id": 1,
+            "hours": {f"2026-01-{day:02d}": 8 for day in range(1, 29)},
+            **sample_wniosek_data,
+        })
+
+        renders = max(1, bench.requests // 4)
+        latencies = []
+        start = time.perf_counter()
+        for _ in range(renders):
+            t0 = time.perf_counter()
+            worker.generate_pdf(wniosek)
+            latencies.append(time.perf_counter() - t0)
+        bench.record("worker.generate_pdf", latencies, time.perf_counter() - start)
+
+    @pytest.mark.asyncio
+    async def test_bench_pipeline(self, client, test_engine, bench, sample_wniosek_data, tmp_path, monkeypatch):
+        """POST -> in-process AMQP -> worker.process_message -> status Completed."""
+        import worker
+        from main import app
+        from models import Wniosek
+
+        broker = InMemoryBroker()
+        monkeypatch.setattr(app.state, "rabbit_con", broker, raising=False)
+        monkeypatch.setattr(worker, "SessionLocal", async_sessionmaker(bind=test_engine, expire_on_commit=False))
+        monkeypatch.setattr(worker, "PDF_OUTPUT_DIR", str(tmp_path))
+
+        jobs = max(1, bench.requests // 4)
+        queue = broker.queue("wnioski_queue")
+        latencies = []
+
+        async def consume():
+            for _ in range(jobs):
+                message = await queue.get()
+                t0 = time.perf_counter()
+                await worker.process_message(message)
+                latencies.append(time.perf_counter() - t0)
+
+        start = time.perf_counter()
+        consumer = asyncio.create_task(consume())
+        await run_load(jobs, bench.concurrency, lambda i: client.post("/wnioski/", json=sample_wniosek_data))
+        await consumer
+        total = time.perf_counter() - start
+
+        async with async_sessionmaker(bind=test_engine)() as session:
+            statuses = (await session.execute(select(Wniosek.status))).scalars().all()
+        assert statuses.count("Completed") == jobs
+
+        bench.record("pipeline POST->PDF", latencies, total, concurrency=bench.concurrency)
+
+
+# ============== STARTUP ==============
+
+class TestStartupBenchmarks:
+    """Cold import time of the API and worker modules (czysty interpreter)."""
+
+    @pytest.mark.parametrize("module", ["main", "worker"])
+    def test_bench_import(self, bench, module):
+        """Wall time of `python -c "import <module>"`, minus bare interpreter startup."""
+        import subprocess
+        import sys
+
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+        def run(code):
+            t0 = time.perf_counter()
+            subprocess.run([sys.executable, "-c", code], cwd=root, check=True)
+            return time.perf_counter() - t0
+
+        runs = 5
+        baseline = min(run("pass") for _ in range(runs))
+        latencies = [max(0.0, run(f"import {module}") - baseline) for _ in range(runs)]
+        bench.record(f"import {module}", latencies, sum(latencies))
+        assert min(latencies) < 1.0
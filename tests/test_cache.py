@@ -0,0 +1,132 @@
+"""
+Tests for the versioned in-process cache with single-flight loading.
+"""
+
+import asyncio
+
+import pytest
+
+from cache import VersionedCache
+from metrics import CACHE_REQUESTS
+
+
+class TestVersionedCache:
+    """Tests for VersionedCache."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_load(self):
+        """Test that N concurrent misses for one key call the loader once."""
+        cache = VersionedCache("test", 10)
+        calls = []
+
+        async def load():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"id": 1}
+
+        results = await asyncio.gather(*(cache.get_or_load(1, 5, load) for _ in range(20)))
+        assert len(calls) == 1
+        assert all(r == {"id": 1} for r in results)
+
+        assert await cache.get_or_load(1, 5, load) == {"id": 1}
+        assert len(calls) == 1
+        await cache.get_or_load(1, 6, load)
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_errors_are_shared_not_cached(self):
+        """Test that a failing load reaches all waiters and is retried later."""
+        cache = VersionedCache("test", 10)
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("db down")
+
+        results = await asyncio.gather(*(cache.get_or_load(1, 1, fail) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+        async def ok():
+            return "ok"
+
+        assert await cache.get_or_load(1, 1, ok) == "ok"
+
+    @pytest.mark.asyncio
+    async def test_cancelled_leader(self):
+        """Test that waiters load themselves when the leading request is cancelled."""
+        cache = VersionedCache("test", 10)
+        started = asyncio.Event()
+
+        async def slow():
+            started.set()
+            await asyncio.sleep(10)
+
+        async def fast():
+            return "fast"
+
+        leader = asyncio.create_task(cache.get_or_load(1, 1, slow))
+        await started.wait()
+        waiter = asyncio.create_task(cache.get_or_load(1, 1, fast))
+        await asyncio.sleep(0)
+        leader.cancel()
+        assert await waiter == "fast"
+
+    def test_ttl_and_lru(self, monkeypatch):
+        """Test expiry after TTL and eviction of the least recently used key."""
+        import cache as cache_module
+
+        now = [100.0]
+        monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+        cache = VersionedCache("test", 2, ttl=10)
+        cache.set("a", 1, "A")
+        cache.set("b", 1, "B")
+        assert cache.get("a", 1) == "A"
+        cache.set("c", 1, "C")
+        assert cache.get("b", 1) is None
+        now[0] += 11
+        assert cache.get("a", 1) is None
+
+
+class TestCachedEndpoints:
+    """Tests for cached GET /wnioski/{id} and /stats/."""
+
+    @pytest.mark.asyncio
+    async def test_detail_cached_until_row_changes(self, client, test_session, sample_wniosek_data):
+        """Test cache hits, survival across other writes and invalidation by a row version bump."""
+        from sqlalchemy import update
+
+        from etags import bump_versions
+        from models import Wniosek
+
+        await client.post("/wnioski/", json=sample_wniosek_data)
+        hits = CACHE_REQUESTS.value(cache="wniosek", result="hit")
+        first = await client.get("/wnioski/1")
+        assert (await client.get("/wnioski/1")).json() == first.json()
+        assert CACHE_REQUESTS.value(cache="wniosek", result="hit") == hits + 1
+
+        # Nowy wniosek nie unieważnia szczegółów innych wniosków
+        await client.post("/wnioski/", json=sample_wniosek_data)
+        second = await client.get("/wnioski/1", headers={"If-None-Match": first.headers["etag"]})
+        assert second.status_code == 304
+        assert (await client.get("/wnioski/1")).json() == first.json()
+        assert CACHE_REQUESTS.value(cache="wniosek", result="hit") == hits + 2
+
+        # Zapis jak w workerze: inna sesja, bez dostępu do cache API
+        await test_session.execute(
+            update(Wniosek).where(Wniosek.id == 1).values(status="Completed", version=Wniosek.version + 1)
+        )
+        await bump_versions(test_session, [None])
+        await test_session.commit()
+        assert (await client.get("/wnioski/1")).json()["status"] == "Completed"
+
+        assert (await client.get("/wnioski/3")).status_code == 404
+        await client.post("/wnioski/", json=sample_wniosek_data)
+        assert (await client.get("/wnioski/3")).status_code == 200
+
+    @pytest.mark.asyncio
+    async def test_concurrent_stats_share_one_query(self, client, sample_wniosek_data):
+        """Test that identical concurrent /stats/ calls coalesce."""
+        await client.post("/wnioski/", json=sample_wniosek_data)
+        misses = CACHE_REQUESTS.value(cache="stats", result="miss")
+        responses = await asyncio.gather(*(client.get("/stats/") for _ in range(5)))
+        assert {r.json()["total_wnioski"] for r in responses} == {1}
+        assert CACHE_REQUESTS.value(cache="stats", result="miss") == misses + 1
@@ -0,0 +1,70 @@
+"""
+Tests for response compression and streaming exports.
+"""
+
+import gzip
+import json
+
+import pytest
+
+from compression import negotiate
+
+
+class TestNegotiation:
+    """Tests for Accept-Encoding negotiation."""
+
+    def test_negotiate(self):
+        """Test q-values, wildcard and exclusions."""
+        encodings = {"zstd": None, "br": None, "gzip": None}
+        assert negotiate("gzip, deflate", encodings) == "gzip"
+        assert negotiate("gzip;q=0.5, br", encodings) == "br"
+        assert negotiate("*", encodings) == "zstd"
+        assert negotiate("*, zstd;q=0", encodings) == "br"
+        assert negotiate("identity", encodings) is None
+        assert negotiate("", encodings) is None
+
+
+class TestCompressionMiddleware:
+    """Tests for compressed API responses."""
+
+    @pytest.mark.asyncio
+    async def test_large_list_is_gzipped(self, client, sample_wniosek_data):
+        """Test that a large JSON list is compressed and decodes correctly."""
+        for _ in range(20):
+            await client.post("/wnioski/", json=sample_wniosek_data)
+
+        response = await client.get(
+            "/wnioski/?user=test&role=payroll", headers={"Accept-Encoding": "gzip"}
+        )
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert len(response.json()) == 20
+
+    @pytest.mark.asyncio
+    async def test_small_response_not_compressed(self, client):
+        """Test that responses below the threshold are sent as-is."""
+        response = await client.get("/health", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+
+    @pytest.mark.asyncio
+    async def test_streaming_export_compressed(self, client, sample_wniosek_data):
+        """Test NDJSON and CSV exports streamed through gzip."""
+        for i in range(30):
+            await client.post("/wnioski/", json={**sample_wniosek_data, "owner": "jan"})
+
+        async with client.stream(
+            "GET", "/wnioski/export?user=jan&format=ndjson&fields=title,status",
+            headers={"Accept-Encoding": "gzip"},
+        ) as response:
+            assert response.headers["content-encoding"] == "gzip"
+            assert "content-length" not in response.headers
+            raw = b"".join([chunk async for chunk in response.aiter_raw()])
+
+        lines = gzip.decompress(raw).decode().splitlines()
+        assert len(lines) == 30
+        assert json.loads(lines[0]) == {"id": 1, "title": sample_wniosek_data["title"], "status": "Waiting"}
+
+        response = await client.get("/wnioski/export?user=jan&format=csv&fields=title")
+        rows = response.text.splitlines()
+        assert rows[0] == "id,title"
+        assert len(rows) == 31
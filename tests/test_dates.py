@@ -0,0 +1,72 @@
+"""
+Tests for typed date columns, their migration and partition ranges.
+"""
+
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from dates import add_months, migrate_date_columns, month_range
+from partitioning import month_partitions
+
+
+class TestDateHelpers:
+    """Tests for month arithmetic and partition bounds."""
+
+    def test_month_range(self):
+        """Test half-open month ranges across a year boundary."""
+        assert month_range(date(2026, 1, 15)) == (date(2026, 1, 1), date(2026, 2, 1))
+        assert month_range(date(2025, 12, 31)) == (date(2025, 12, 1), date(2026, 1, 1))
+        assert add_months(date(2026, 1, 1), -13) == date(2024, 12, 1)
+
+    def test_month_partitions(self):
+        """Test that partitions cover consecutive months without gaps."""
+        partitions = month_partitions(date(2025, 11, 20), date(2026, 1, 1))
+        assert partitions == [
+            ("wniosek_p2025_11", date(2025, 11, 1), date(2025, 12, 1)),
+            ("wniosek_p2025_12", date(2025, 12, 1), date(2026, 1, 1)),
+            ("wniosek_p2026_01", date(2026, 1, 1), date(2026, 2, 1)),
+        ]
+
+    def test_migrate_sqlite_text_dates(self):
+        """Test normalization of legacy text values on SQLite."""
+        engine = create_engine("sqlite://")
+        with engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE wniosek (id INTEGER PRIMARY KEY, billing_month VARCHAR, "
+                "premia_start VARCHAR, premia_end VARCHAR)"
+            ))
+            conn.execute(text(
+                "INSERT INTO wniosek VALUES (1, '2026-01-01', '2026-01', ''), "
+                "(2, '2026-02-01 00:00:00', NULL, 'brak')"
+            ))
+            migrate_date_columns(conn)
+            migrate_date_columns(conn)
+            rows = conn.execute(text("SELECT * FROM wniosek ORDER BY id")).all()
+        assert rows == [(1, "2026-01-01", "2026-01-01", None), (2, "2026-02-01", None, None)]
+
+
+class TestDateColumnsApi:
+    """Tests for date fields through the API."""
+
+    @pytest.mark.asyncio
+    async def test_dates_validated_and_filtered(self, client, sample_wniosek_data):
+        """Test that dates are parsed, rejected when invalid and filterable by month."""
+        await client.post("/wnioski/", json=sample_wniosek_data)
+        await client.post("/wnioski/", json={
+            **sample_wniosek_data, "billing_month": "2026-02-01",
+            "premia_start": "2026-02-03", "premia_end": "2026-02-20",
+        })
+
+        response = await client.post("/wnioski/", json={**sample_wniosek_data, "billing_month": "-01"})
+        assert response.status_code == 422
+
+        response = await client.get("/wnioski/2")
+        assert response.json()["premia_start"] == "2026-02-03"
+
+        response = await client.get("/wnioski/?user=test&role=payroll&billing_month=2026-02-15&fields=id")
+        assert response.json() == [{"id": 2}]
+
+        response = await client.get("/wnioski/export?user=test&role=payroll&billing_month=2026-01-01&format=csv")
+        assert response.text.splitlines()[1].endswith(",2026-01-01,,,{},Test comment,Waiting,1")
@@ -0,0 +1,73 @@
+"""
+Tests for the PDF font registry and the font subset cache.
+"""
+
+import pytest
+
+import fonts
+from fonts import FALLBACK_FONTS, FONT_FILES, SubsetCache, find_font, register_fonts
+from metrics import CACHE_REQUESTS
+
+requires_dejavu = pytest.mark.skipif(
+    not all(find_font(name) for name in FONT_FILES.values()), reason="brak czcionek DejaVu"
+)
+
+
+class TestFontRegistry:
+    """Tests for fonts.register_fonts."""
+
+    @requires_dejavu
+    def test_registers_once(self):
+        """Test that TTFs are parsed once per process and registered with ReportLab."""
+        from reportlab.pdfbase import pdfmetrics
+
+        registered = register_fonts()
+        assert registered.regular == "DejaVuSans"
+        font = pdfmetrics.getFont(registered.regular)
+        assert isinstance(font.face.makeSubset, SubsetCache)
+        assert register_fonts() is registered
+        assert pdfmetrics.getFont(registered.regular) is font
+
+    def test_fallback_without_files(self, tmp_path, monkeypatch):
+        """Test that missing font files fall back to Helvetica."""
+        monkeypatch.setattr(fonts, "FONT_DIRS", [str(tmp_path)])
+        monkeypatch.setattr(fonts, "_fonts", None)
+        assert register_fonts() == FALLBACK_FONTS
+
+    def test_subset_cache(self):
+        """Test that an identical subset is built once."""
+        calls = []
+
+        def make_subset(subset):
+            calls.append(list(subset))
+            return repr(subset).encode()
+
+        cache = SubsetCache(make_subset, maxsize=2)
+        assert cache([65, 261, 322]) == cache([65, 261, 322])
+        assert len(calls) == 1
+        cache([66])
+        cache([67])
+        cache([65, 261, 322])
+        assert len(calls) == 4
+
+    @requires_dejavu
+    def test_pdf_embeds_unicode_font(self, tmp_path, monkeypatch):
+        """Test that worker PDFs embed DejaVu and reuse cached subsets across documents."""
+        import worker
+        from models import Wniosek
+
+        monkeypatch.setattr(worker, "PDF_OUTPUT_DIR", str(tmp_path))
+        wniosek = Wniosek.model_validate({
+            "id": 1, "title": "Zażółć gęślą jaźń", "person": "Łukasz Świątek",
+            "company": "Przedsiębiorstwo Ćma", "type_of_woz": "Premia", "payoff": 10.0,
+        })
+        worker.generate_pdf(wniosek)
+        hits = CACHE_REQUESTS.value(cache="font_subset", result="hit")
+        path = worker.generate_pdf(wniosek)
+
+        with open(path, "rb") as f:
+            content = f.read()
+        assert b"DejaVuSans" in content
+        # Helvetica zostaje tylko jako domyślna czcionka płótna - tekst jej nie używa
+        assert b"Helvetica-Bold" not in content
+        assert CACHE_REQUESTS.value(cache="font_subset", result="hit") > hits
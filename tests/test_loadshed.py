@@ -0,0 +1,94 @@
+"""
+Tests for event-loop lag monitoring and load shedding.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+import loadshed
+from loadshed import LOOP_MONITOR, LoopLagMonitor, request_priority
+from metrics import REQUESTS_SHED
+
+
+@pytest.fixture
+def overloaded(monkeypatch):
+    """Ustawia wygładzone opóźnienie pętli (w ms) monitora używanego przez API."""
+    def set_lag(lag_ms):
+        monkeypatch.setattr(LOOP_MONITOR, "lag", lag_ms / 1000)
+    return set_lag
+
+
+class TestLoopLagMonitor:
+    """Tests for LoopLagMonitor."""
+
+    @pytest.mark.asyncio
+    async def test_measures_blocking(self):
+        """Test that blocking the loop shows up as lag and decays afterwards."""
+        monitor = LoopLagMonitor(interval=0.01, decay=0.8)
+        monitor.start()
+        try:
+            await asyncio.sleep(0.03)
+            time.sleep(0.2)
+            await asyncio.sleep(0.015)
+            assert monitor.lag >= 0.1
+            await asyncio.sleep(0.3)
+            assert monitor.lag < 0.05
+        finally:
+            await monitor.stop()
+
+    def test_priorities(self):
+        """Test route classification."""
+        assert request_priority("POST", "/wnioski/") == "critical"
+        assert request_priority("GET", "/health/db") == "critical"
+        assert request_priority("GET", "/wnioski/") == "normal"
+        assert request_priority("GET", "/wnioski/export") == "low"
+        assert request_priority("GET", "/stats/hours") == "low"
+
+
+class TestLoadShedding:
+    """Tests for LoadShedMiddleware."""
+
+    @pytest.mark.asyncio
+    async def test_sheds_low_priority_first(self, client, sample_wniosek_data, overloaded):
+        """Test that exports and stats get 503 + Retry-After while creates and health are served."""
+        overloaded(loadshed.LOADSHED_LOW_LAG_MS + 1)
+        shed = REQUESTS_SHED.value(priority="low")
+
+        response = await client.get("/stats/")
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == str(loadshed.LOADSHED_RETRY_AFTER)
+        assert (await client.get("/wnioski/export?user=x&role=payroll")).status_code == 503
+        assert REQUESTS_SHED.value(priority="low") == shed + 2
+
+        assert (await client.post("/wnioski/", json=sample_wniosek_data)).status_code == 200
+        assert (await client.get("/wnioski/1")).status_code == 200
+        assert (await client.get("/health")).status_code == 200
+
+    @pytest.mark.asyncio
+    async def test_sheds_normal_under_heavy_lag(self, client, sample_wniosek_data, overloaded):
+        """Test that only critical routes are served above the normal threshold."""
+        overloaded(loadshed.LOADSHED_NORMAL_LAG_MS + 1)
+        assert (await client.get("/wnioski/1")).status_code == 503
+        assert (await client.post("/wnioski/", json=sample_wniosek_data)).status_code == 200
+        assert (await client.get("/health")).status_code == 200
+
+        overloaded(0)
+        assert (await client.get("/wnioski/1")).status_code == 200
+
+    @pytest.mark.asyncio
+    async def test_in_flight_limit(self, client, monkeypatch):
+        """Test that the in-flight count is tracked and limits low-priority work."""
+        monkeypatch.setattr(loadshed, "LOADSHED_MAX_IN_FLIGHT", 2)
+        monkeypatch.setattr(LOOP_MONITOR, "in_flight", 1)
+        assert (await client.get("/stats/")).status_code == 503
+        assert (await client.get("/health")).status_code == 200
+        assert LOOP_MONITOR.in_flight == 1
+
+    @pytest.mark.asyncio
+    async def test_disabled(self, client, overloaded, monkeypatch):
+        """Test that LOADSHED_ENABLED=false turns shedding off."""
+        monkeypatch.setattr(loadshed, "LOADSHED_ENABLED", False)
+        overloaded(10_000)
+        assert (await client.get("/stats/")).status_code == 200
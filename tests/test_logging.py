@@ -0,0 +1,66 @@
+"""
+Tests for structured logging helpers.
+"""
+
+import io
+import json
+import logging
+import sys
+
+import logging_config
+from logging_config import ContextFilter, JsonFormatter, SamplingFilter, correlation_id
+
+
+class TestLogging:
+    """Tests for JSON formatting, correlation ids and sampling."""
+
+    def test_json_record_with_correlation_id(self):
+        """Test that records carry correlation id and structured extras."""
+        record = logging.makeLogRecord({
+            "name": "woz.test", "levelno": logging.INFO, "levelname": "INFO",
+            "msg": "Status wniosku zmieniony", "wniosek_id": 7,
+        })
+        token = correlation_id.set("req-1")
+        try:
+            ContextFilter("api").filter(record)
+        finally:
+            correlation_id.reset(token)
+
+        payload = json.loads(JsonFormatter().format(record))
+        assert payload["message"] == "Status wniosku zmieniony"
+        assert payload["correlation_id"] == "req-1"
+        assert payload["service"] == "api"
+        assert payload["wniosek_id"] == 7
+
+    def test_debug_sampling(self):
+        """Test that only every N-th debug record passes."""
+        sampler = SamplingFilter(10)
+        debug = logging.makeLogRecord({"levelno": logging.DEBUG})
+        warning = logging.makeLogRecord({"levelno": logging.WARNING})
+
+        assert sum(sampler.filter(debug) for _ in range(100)) == 10
+        assert all(sampler.filter(warning) for _ in range(5))
+
+    def test_exception_through_queue_listener(self, monkeypatch):
+        """Test that logger.exception keeps the traceback under exc_info after the queue hop."""
+        root = logging.getLogger()
+        handlers, level = root.handlers[:], root.level
+        logging_config.shutdown_logging()
+        output = io.StringIO()
+        monkeypatch.setattr(sys, "stdout", output)
+        try:
+            logging_config.setup_logging("test")
+            try:
+                raise ValueError("zły format")
+            except ValueError:
+                logging.getLogger("woz.test").exception("Błąd przetwarzania", extra={"wniosek_id": 3})
+        finally:
+            logging_config.shutdown_logging()
+            root.handlers, root.level = handlers, level
+
+        payload = json.loads(output.getvalue().splitlines()[-1])
+        assert payload["message"] == "Błąd przetwarzania"
+        assert payload["wniosek_id"] == 3
+        assert payload["service"] == "test"
+        assert payload["exc_info"].startswith("Traceback")
+        assert "ValueError: zły format" in payload["exc_info"]
@@ -0,0 +1,62 @@
+"""
+Tests for the Prometheus metrics module.
+"""
+
+import threading
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from metrics import DB_QUERY_DURATION, Counter, Histogram, Registry, instrument_engine
+
+
+class TestMetrics:
+    """Tests for lock-free counters and histograms."""
+
+    def test_counter_sums_thread_shards(self):
+        """Test that increments from many threads are all counted."""
+        counter = Counter("test_total", "Test counter", ["kind"])
+
+        def work():
+            for _ in range(1000):
+                counter.inc(kind="a")
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert counter.value(kind="a") == 4000
+        assert 'test_total{kind="a"} 4000.0' in counter.render()
+
+    def test_histogram_render(self):
+        """Test cumulative buckets, sum and count in text format."""
+        registry = Registry()
+        histogram = registry.register(Histogram("test_seconds", "Test histogram", buckets=(0.1, 1.0)))
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(5.0)
+
+        body = registry.render()
+        assert "# TYPE test_seconds histogram" in body
+        assert 'test_seconds_bucket{le="0.1"} 1' in body
+        assert 'test_seconds_bucket{le="1.0"} 2' in body
+        assert 'test_seconds_bucket{le="+Inf"} 3' in body
+        assert "test_seconds_count 3" in body
+        assert histogram.count() == 3
+
+    def test_failed_query_does_not_leak_start_time(self):
+        """Test that a query error drops its start time instead of leaving it on the connection."""
+        engine = create_engine("sqlite://")
+        instrument_engine(engine)
+        before = DB_QUERY_DURATION.count(operation="SELECT")
+        with engine.connect() as conn:
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM no_such_table"))
+            assert conn.info["woz_query_start"] == []
+            conn.execute(text("SELECT 1"))
+            assert conn.info["woz_query_start"] == []
+        assert DB_QUERY_DURATION.count(operation="SELECT") == before + 1
+        engine.dispose()
@@ -0,0 +1,77 @@
+"""
+Tests for Alembic migrations.
+"""
+
+import os
+import sqlite3
+
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine
+from sqlmodel import SQLModel
+
+import database  # noqa: F401
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def alembic_config(path) -> Config:
+    config = Config(os.path.join(ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT, "migrations"))
+    config.set_main_option("sqlalchemy.url", f"sqlite+aiosqlite:///{path}")
+    config.attributes["configure_logger"] = False
+    return config
+
+
+class TestMigrations:
+    """Tests for upgrade/downgrade on SQLite."""
+
+    def test_upgrade_matches_models(self, tmp_path):
+        """Test that a migrated empty database matches the SQLModel metadata."""
+        path = tmp_path / "migrated.db"
+        command.upgrade(alembic_config(path), "head")
+
+        engine = create_engine(f"sqlite:///{path}")
+        with engine.connect() as conn:
+            context = MigrationContext.configure(conn, opts={
+                "include_object": lambda obj, name, type_, reflected, compare_to:
+                    not (type_ in ("table", "index") and reflected and compare_to is None),
+            })
+            assert compare_metadata(context, SQLModel.metadata) == []
+        engine.dispose()
+
+        command.downgrade(alembic_config(path), "base")
+        conn = sqlite3.connect(path)
+        tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        conn.close()
+        assert tables == {"alembic_version"}
+
+    def test_upgrade_legacy_database(self, tmp_path):
+        """Test upgrading a database created by the old create_all (text dates, no hours table)."""
+        path = tmp_path / "legacy.db"
+        conn = sqlite3.connect(path)
+        conn.executescript("""
+            CREATE TABLE wniosek (
+                id INTEGER PRIMARY KEY, title VARCHAR NOT NULL, person VARCHAR NOT NULL,
+                company VARCHAR NOT NULL, type_of_woz VARCHAR NOT NULL, payoff FLOAT NOT NULL,
+                created_date DATETIME DEFAULT (CURRENT_TIMESTAMP), owner VARCHAR,
+                billing_month VARCHAR, premia_start VARCHAR, premia_end VARCHAR,
+                hours JSON, comment VARCHAR, status VARCHAR NOT NULL
+            );
+            INSERT INTO wniosek (title, person, company, type_of_woz, payoff, billing_month, hours, status)
+            VALUES ('Stary', 'Jan Kowalski', 'Transpol', 'Standard', 100, '2025-03', '{"2025-03-03": 8}', 'Completed');
+        """)
+        conn.commit()
+        conn.close()
+
+        command.upgrade(alembic_config(path), "head")
+
+        conn = sqlite3.connect(path)
+        assert conn.execute("SELECT billing_month, version FROM wniosek").fetchone() == ("2025-03-01", 1)
+        assert conn.execute("SELECT wniosek_id, day, hours FROM wniosek_hours").fetchall() == [(1, "2025-03-03", 8.0)]
+        assert conn.execute("SELECT rowid FROM wniosek_fts WHERE wniosek_fts MATCH 'kowal*'").fetchall() == [(1,)]
+        indexes = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert {"ix_wniosek_owner_created_date", "ix_wniosek_billing_month"} <= indexes
+        conn.close()
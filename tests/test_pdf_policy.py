@@ -0,0 +1,187 @@
+"""
+Tests for the eager / lazy / scheduled PDF generation policies.
+"""
+
+import asyncio
+import json
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+import pdf_policy
+from archive import index_pdfs
+from metrics import PDF_ON_DEMAND
+from models import Wniosek
+from pdf_policy import PdfRequests, render_job, schedule_renders
+
+
+@pytest.fixture
+def lazy(monkeypatch, tmp_path):
+    """PDF_POLICY=lazy z katalogiem PDF w tmp_path; zwraca listę wysłanych zadań."""
+    import main
+
+    sent = []
+
+    async def fake_send(connection, data):
+        sent.append(data)
+
+    monkeypatch.setattr(pdf_policy, "PDF_POLICY", "lazy")
+    monkeypatch.setattr(main, "PDF_REQUESTS", PdfRequests(wait=0.05, poll=0.01))
+    monkeypatch.setattr(main, "send_to_worker", fake_send)
+    monkeypatch.setattr(main.app.state, "rabbit_con", object(), raising=False)
+    monkeypatch.setenv("PDF_OUTPUT_DIR", str(tmp_path))
+    return sent
+
+
+class TestLazyPolicy:
+    """Tests for PDF_POLICY=lazy."""
+
+    @pytest.mark.asyncio
+    async def test_create_does_not_render(self, client, sample_wniosek_data, lazy):
+        """Test that creating a wniosek enqueues nothing and a slow render answers 202."""
+        await client.post("/wnioski/", json=sample_wniosek_data)
+        assert lazy == []
+
+        response = await client.get("/wnioski/1/pdf")
+        assert response.status_code == 202
+        assert response.headers["retry-after"] == str(pdf_policy.PDF_RETRY_AFTER)
+        assert response.headers["location"] == "/wnioski/1/pdf"
+        assert lazy == [{"id": 1, "action": "generate_pdf", "title": sample_wniosek_data["title"]}]
+
+        # Ponowienie w oknie PDF_LAZY_RESEND nie wysyła zadania drugi raz
+        assert (await client.get("/wnioski/1/pdf")).status_code == 202
+        assert len(lazy) == 1
+        assert (await client.get("/wnioski/999/pdf")).status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_concurrent_downloads_coalesce(self, client, sample_wniosek_data, lazy, tmp_path, monkeypatch):
+        """Test that concurrent first downloads share one job and all get the PDF."""
+        import main
+
+        await client.post("/wnioski/", json=sample_wniosek_data)
+        monkeypatch.setattr(main, "PDF_REQUESTS", PdfRequests(wait=2, poll=0.01))
+        coalesced = PDF_ON_DEMAND.value(result="coalesced")
+
+        async def worker_send(connection, data):
+            # Wysyłka oddaje sterowanie - pozostałe żądania przychodzą w jej trakcie
+            await asyncio.sleep(0)
+            lazy.append(data)
+
+            async def render():
+                await asyncio.sleep(0.05)
+                (tmp_path / "wniosek_1_20260101_120000.pdf").write_bytes(b"%PDF-1.4 lazy")
+
+            asyncio.get_running_loop().create_task(render())
+
+        monkeypatch.setattr(main, "send_to_worker", worker_send)
+        responses = await asyncio.gather(*(client.get("/wnioski/1/pdf") for _ in range(5)))
+
+        assert [r.status_code for r in responses] == [200] * 5
+        assert all(r.content == b"%PDF-1.4 lazy" for r in responses)
+        assert len(lazy) == 1
+        assert PDF_ON_DEMAND.value(result="coalesced") == coalesced + 4
+
+    @pytest.mark.asyncio
+    async def test_one_listing_per_tick(self, tmp_path, monkeypatch):
+        """Test that waits for many wnioski share one directory listing per poll."""
+        listings = []
+
+        def counting_index(pdf_dir):
+            listings.append(pdf_dir)
+            return {3: ["wniosek_3_20260101_120000.pdf"]} if len(listings) > 1 else {}
+
+        async def enqueue():
+            pass
+
+        monkeypatch.setattr(pdf_policy, "index_pdfs", counting_index)
+        requests = PdfRequests(wait=0.2, poll=0.05)
+        results = await asyncio.gather(*(requests.wait_for(i, str(tmp_path), enqueue) for i in range(1, 11)))
+
+        assert results[2] == "wniosek_3_20260101_120000.pdf"
+        assert results.count(None) == 9
+        # ~wait/poll taktów, a nie jedno listowanie na wniosek na takt
+        assert len(listings) <= 6
+
+    @pytest.mark.asyncio
+    async def test_waiters_during_enqueue_share_one_job(self, tmp_path):
+        """Test that requests arriving while the job is being sent join it, and a send error reaches all of them."""
+        sent = []
+
+        async def enqueue():
+            sent.append(1)
+            await asyncio.sleep(0.01)
+
+        requests = PdfRequests(wait=0.05, poll=0.01)
+        results = await asyncio.wait_for(
+            asyncio.gather(*(requests.wait_for(7, str(tmp_path), enqueue) for _ in range(5))), 2
+        )
+        assert results == [None] * 5
+        assert len(sent) == 1
+
+        async def broken():
+            await asyncio.sleep(0.01)
+            raise ConnectionError("broker niedostępny")
+
+        requests = PdfRequests(wait=0.05, poll=0.01)
+        results = await asyncio.wait_for(asyncio.gather(
+            *(requests.wait_for(8, str(tmp_path), broken) for _ in range(3)), return_exceptions=True
+        ), 2)
+        assert all(isinstance(r, ConnectionError) for r in results)
+        assert requests._pending == {} and requests._sent == {}
+
+    @pytest.mark.asyncio
+    async def test_closed_wniosek_renders_without_status_change(self, client, test_engine, sample_wniosek_data, tmp_path, monkeypatch):
+        """Test that a rejected wniosek gets a render_pdf job the worker handles without the DB."""
+        import worker
+
+        def no_database():
+            raise AssertionError("render_pdf nie może używać bazy")
+
+        await client.post("/wnioski/", json=sample_wniosek_data)
+        await client.put("/wnioski/1/status?new_status=Rejected")
+        async with async_sessionmaker(bind=test_engine)() as session:
+            job = render_job(await session.get(Wniosek, 1))
+        assert job["action"] == "render_pdf"
+        assert job["wniosek"]["status"] == "Rejected"
+
+        class Message:
+            body = json.dumps(job).encode()
+            headers = {}
+
+        monkeypatch.setattr(worker, "SessionLocal", no_database)
+        monkeypatch.setattr(worker, "PDF_OUTPUT_DIR", str(tmp_path))
+        await worker._handle_message(Message())
+        assert [p.name.endswith(".pdf") for p in tmp_path.iterdir()] == [True]
+
+
+class TestScheduledPolicy:
+    """Tests for the scheduled (off-peak) batch run."""
+
+    @pytest.mark.asyncio
+    async def test_batches_pending_without_pdf(self, client, test_session, sample_wniosek_data, tmp_path, monkeypatch):
+        """Test that only Waiting wnioski without a PDF are sent, paced by queue depth."""
+        monkeypatch.setattr(pdf_policy, "PDF_POLICY", "scheduled")
+        for _ in range(6):
+            assert (await client.post("/wnioski/", json=sample_wniosek_data)).status_code == 200
+        await client.put("/wnioski/2/status?new_status=Rejected")
+        (tmp_path / "wniosek_3_20260101_010000.pdf").write_bytes(b"%PDF")
+        (tmp_path / "reports").mkdir()
+
+        sent = []
+        depths = [5, 0, 0, 0]
+        listings = []
+        monkeypatch.setattr(pdf_policy, "index_pdfs", lambda d: listings.append(d) or index_pdfs(d))
+
+        async def send(connection, data):
+            sent.append(data["id"])
+
+        async def queue_depth(connection):
+            return depths.pop(0)
+
+        total = await schedule_renders(
+            test_session, None, str(tmp_path), batch_size=2, pause=0, send=send, queue_depth=queue_depth
+        )
+        assert total == 4
+        assert sent == [1, 4, 5, 6]
+        assert depths == []
+        assert listings == [str(tmp_path)]
@@ -0,0 +1,143 @@
+"""
+Tests for the streaming monthly payroll report.
+"""
+
+import csv
+import os
+from datetime import date, datetime, timezone
+
+import pytest
+import pytest_asyncio
+
+from reports import XLSX_AVAILABLE, generate_monthly_report
+
+
+async def payroll_headers(test_session):
+    from auth import create_access_token
+    from models import User
+
+    user = User(
+        email="payroll@example.com", password_hash="x", full_name="payroll",
+        role="payroll", created_at=datetime.now(timezone.utc),
+    )
+    test_session.add(user)
+    await test_session.commit()
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+
+
+@pytest_asyncio.fixture
+async def report_data(client, sample_wniosek_data):
+    rows = [
+        ("Alfa", "Jan", "Standard", 100.0, {"2026-01-02": 8, "2026-01-03": 4}, "2026-01-01"),
+        ("Alfa", "Jan", "Standard", 50.5, {"2026-01-05": 2}, "2026-01-20"),
+        ("Alfa", "Anna", "Premia", 200.0, {}, "2026-01-01"),
+        ("Beta", "Ola", "Standard", 300.0, {"2026-01-07": 6}, "2026-01-01"),
+        # Inny miesiąc i wniosek odrzucony - poza raportem
+        ("Beta", "Ola", "Standard", 999.0, {}, "2026-02-01"),
+        ("Beta", "Ola", "Standard", 999.0, {}, "2026-01-01", "Rejected"),
+    ]
+    for company, person, type_of_woz, payoff, hours, billing_month, *status in rows:
+        await client.post("/wnioski/", json={
+            **sample_wniosek_data, "company": company, "person": person, "type_of_woz": type_of_woz,
+            "payoff": payoff, "hours": hours, "billing_month": billing_month,
+            "status": status[0] if status else "Waiting",
+        })
+
+
+class TestMonthlyReport:
+    """Tests for reports.generate_monthly_report."""
+
+    @pytest.mark.asyncio
+    async def test_csv_and_pdf(self, test_session, report_data, tmp_path):
+        """Test grouped totals across cursor chunks, excluded rows and atomic files."""
+        report = await generate_monthly_report(
+            test_session, date(2026, 1, 15), ["csv", "pdf"], output_dir=str(tmp_path), chunk_rows=1
+        )
+
+        assert report["wnioski"] == 4
+        assert report["groups"] == 3
+        assert report["payoff"] == pytest.approx(650.5)
+        assert report["hours"] == pytest.approx(20.0)
+
+        with open(report["files"]["csv"], newline="", encoding="utf-8") as f:
+            rows = list(csv.reader(f))
+        assert rows[0][:3] == ["Firma", "Osoba", "Typ WOZ"]
+        assert rows[1:] == [
+            ["Alfa", "Anna", "Premia", "1", "200.0", "0.0"],
+            ["Alfa", "Jan", "Standard", "2", "150.5", "14.0"],
+            ["Beta", "Ola", "Standard", "1", "300.0", "6.0"],
+        ]
+        with open(report["files"]["pdf"], "rb") as f:
+            assert f.read(5) == b"%PDF-"
+        assert sorted(os.listdir(tmp_path)) == ["raport_2026-01.csv", "raport_2026-01.pdf"]
+
+    @pytest.mark.asyncio
+    async def test_xlsx(self, test_session, report_data, tmp_path):
+        """Test the optional XLSX output."""
+        openpyxl = pytest.importorskip("openpyxl")
+        report = await generate_monthly_report(test_session, date(2026, 1, 1), ["xlsx"], output_dir=str(tmp_path))
+        sheet = openpyxl.load_workbook(report["files"]["xlsx"]).active
+        assert sheet.max_row == 4
+
+    @pytest.mark.asyncio
+    async def test_unknown_format(self, test_session, tmp_path):
+        """Test that unsupported formats are rejected before any file is written."""
+        with pytest.raises(ValueError):
+            await generate_monthly_report(test_session, date(2026, 1, 1), ["docx"], output_dir=str(tmp_path))
+        assert os.listdir(tmp_path) == []
+
+
+    @pytest.mark.asyncio
+    async def test_worker_job(self, test_engine, report_data, tmp_path, monkeypatch):
+        """Test the worker's monthly_report action."""
+        import json
+
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+
+        import reports
+        import worker
+
+        class Message:
+            body = json.dumps({"action": "monthly_report", "billing_month": "2026-01-01", "formats": ["csv"]}).encode()
+            headers = {}
+
+        monkeypatch.setattr(worker, "SessionLocal", async_sessionmaker(bind=test_engine, expire_on_commit=False))
+        monkeypatch.setattr(reports, "REPORT_OUTPUT_DIR", str(tmp_path))
+        await worker._handle_message(Message())
+        assert os.listdir(tmp_path) == ["raport_2026-01.csv"]
+
+
+class TestReportEndpoints:
+    """Tests for /reports/monthly."""
+
+    @pytest.mark.asyncio
+    async def test_request_and_download(self, client, test_session, report_data, tmp_path, monkeypatch):
+        """Test that the job is queued for the worker and the file is served once generated."""
+        import main
+
+        sent = []
+
+        async def fake_send(connection, data):
+            sent.append(data)
+
+        monkeypatch.setattr(main, "send_to_worker", fake_send)
+        monkeypatch.setattr(main.app.state, "rabbit_con", object(), raising=False)
+        monkeypatch.setenv("REPORT_OUTPUT_DIR", str(tmp_path))
+        headers = await payroll_headers(test_session)
+
+        assert (await client.post("/reports/monthly", json={"billing_month": "2026-01-15"})).status_code in (401, 403)
+        response = await client.post("/reports/monthly", json={"billing_month": "2026-01-15"}, headers=headers)
+        assert response.status_code == 202
+        assert sent == [{"action": "monthly_report", "billing_month": "2026-01-01", "formats": ["csv", "pdf"]}]
+
+        bad = await client.post("/reports/monthly", json={"billing_month": "2026-01-15", "formats": ["docx"]}, headers=headers)
+        assert bad.status_code == 400
+        if not XLSX_AVAILABLE:
+            bad = await client.post("/reports/monthly", json={"billing_month": "2026-01-15", "formats": ["xlsx"]}, headers=headers)
+            assert bad.status_code == 400
+
+        assert (await client.get("/reports/monthly/2026-01-01", headers=headers)).status_code == 404
+        await generate_monthly_report(test_session, date(2026, 1, 1), ["csv"], output_dir=str(tmp_path))
+        response = await client.get("/reports/monthly/2026-01-31?format=csv", headers=headers)
+        assert response.status_code == 200
+        assert response.text.splitlines()[1].startswith("Alfa,Anna,Premia")
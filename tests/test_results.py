@@ -0,0 +1,191 @@
+"""
+Tests for DB-less PDF jobs reporting results over the message bus.
+"""
+
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+import results
+from metrics import PDF_RESULTS_APPLIED, WRITE_BATCH_SIZE
+from models import Wniosek
+from publisher import RESULTS_QUEUE
+from results import ResultConsumer, parse_result
+
+
+class FakeMessage:
+    """Minimalny odpowiednik aio_pika.IncomingMessage z zapisem ack / reject."""
+
+    def __init__(self, body):
+        self.body = body if isinstance(body, bytes) else json.dumps(body).encode()
+        self.headers = {}
+        self.correlation_id = None
+        self.outcome = None
+
+    @asynccontextmanager
+    async def process(self, requeue=False):
+        try:
+            yield
+        except Exception:
+            self.outcome = "requeue" if requeue else "reject"
+            raise
+        self.outcome = "ack"
+
+    async def reject(self, requeue=False):
+        self.outcome = "reject"
+
+
+class FakeChannel:
+    """Kanał przechwytujący publikowane wiadomości."""
+
+    def __init__(self):
+        self.published = []
+        self.default_exchange = self
+
+    async def publish(self, message, routing_key):
+        self.published.append((routing_key, json.loads(message.body)))
+
+
+@pytest.fixture
+def bus_mode(monkeypatch):
+    import main
+
+    sent = []
+
+    async def fake_send(connection, data):
+        sent.append(data)
+
+    monkeypatch.setattr(results, "PDF_RESULTS_MODE", "bus")
+    monkeypatch.setattr(main, "send_to_worker", fake_send)
+    monkeypatch.setattr(main.app.state, "rabbit_con", object(), raising=False)
+    return sent
+
+
+async def _statuses(test_engine):
+    async with async_sessionmaker(bind=test_engine)() as session:
+        rows = (await session.execute(select(Wniosek.id, Wniosek.status, Wniosek.version).order_by(Wniosek.id))).all()
+    return [tuple(row) for row in rows]
+
+
+class TestDbLessWorker:
+    """Tests for the worker side of PDF_RESULTS_MODE=bus."""
+
+    @pytest.mark.asyncio
+    async def test_render_without_database(self, client, sample_wniosek_data, bus_mode, tmp_path, monkeypatch):
+        """Test that the job carries the wniosek and the worker only publishes a compact result."""
+        import worker
+
+        def no_database():
+            raise AssertionError("worker w trybie bus nie może używać bazy")
+
+        await client.post("/wnioski/", json={**sample_wniosek_data, "person": "Łukasz Świątek"})
+        job = bus_mode[0]
+        assert job["wniosek"]["person"] == "Łukasz Świątek"
+        assert job["wniosek"]["version"] == 1
+
+        channel = FakeChannel()
+        monkeypatch.setattr(worker, "results_channel", channel)
+        monkeypatch.setattr(worker, "SessionLocal", no_database)
+        monkeypatch.setattr(worker, "PDF_OUTPUT_DIR", str(tmp_path))
+        message = FakeMessage(job)
+        await worker.process_message(message)
+
+        assert message.outcome == "ack"
+        routing_key, result = channel.published[0]
+        assert routing_key == RESULTS_QUEUE
+        assert result == {"id": 1, "status": "Completed", "version": 1, "pdf": result["pdf"]}
+        assert (tmp_path / result["pdf"]).exists()
+
+    @pytest.mark.asyncio
+    async def test_render_failure(self, sample_wniosek_data, monkeypatch):
+        """Test that a rendering error is reported as a Failed result."""
+        import worker
+
+        def broken(wniosek):
+            raise RuntimeError("brak miejsca")
+
+        channel = FakeChannel()
+        monkeypatch.setattr(worker, "results_channel", channel)
+        monkeypatch.setattr(worker, "generate_pdf", broken)
+        wniosek = Wniosek.model_validate({**sample_wniosek_data, "id": 7, "version": 3})
+        assert await worker.render_and_report(wniosek.model_dump(mode="json")) == "Failed"
+        assert channel.published[0][1] == {"id": 7, "status": "Failed", "version": 3, "pdf": None}
+
+    @pytest.mark.asyncio
+    async def test_publish_failure_requeues_job(self, sample_wniosek_data, tmp_path, monkeypatch):
+        """Test that a job whose result the broker did not take is not acked."""
+        import worker
+
+        class ClosedChannel(FakeChannel):
+            async def publish(self, message, routing_key):
+                raise ConnectionError("kanał zamknięty")
+
+        monkeypatch.setattr(worker, "results_channel", ClosedChannel())
+        monkeypatch.setattr(worker, "PDF_OUTPUT_DIR", str(tmp_path))
+        wniosek = Wniosek.model_validate({**sample_wniosek_data, "id": 1})
+        message = FakeMessage({"id": 1, "action": "generate_pdf", "wniosek": wniosek.model_dump(mode="json")})
+        await worker.process_message(message)
+        assert message.outcome == "requeue"
+
+
+class TestResultConsumer:
+    """Tests for the API-side ResultConsumer."""
+
+    @pytest.mark.asyncio
+    async def test_applies_results_in_one_batch(self, client, test_engine, sample_wniosek_data):
+        """Test that concurrent results share one commit, stale versions lose and bad messages are rejected."""
+        for _ in range(10):
+            await client.post("/wnioski/", json=sample_wniosek_data)
+        await client.put("/wnioski/10/status?new_status=Rejected")
+
+        consumer = ResultConsumer(None, async_sessionmaker(bind=test_engine, expire_on_commit=False))
+        consumer.writer.max_delay = 0.02
+        consumer.writer.start()
+        applied = PDF_RESULTS_APPLIED.value(result="applied")
+        batches = WRITE_BATCH_SIZE.count()
+        messages = [
+            FakeMessage({"id": i, "status": "Completed" if i % 2 else "Failed", "version": 1, "pdf": f"wniosek_{i}.pdf"})
+            for i in range(1, 11)
+        ]
+        invalid = FakeMessage(b'{"id": 1, "status": "Deleted", "version": 1}')
+        try:
+            await asyncio.gather(*(consumer.on_message(m) for m in messages), consumer.on_message(invalid))
+        finally:
+            await consumer.stop()
+
+        assert [m.outcome for m in messages] == ["ack"] * 10
+        assert invalid.outcome == "reject"
+        assert PDF_RESULTS_APPLIED.value(result="applied") == applied + 9
+        assert WRITE_BATCH_SIZE.count() == batches + 1
+        rows = await _statuses(test_engine)
+        assert rows[0] == (1, "Completed", 2)
+        assert rows[1] == (2, "Failed", 2)
+        assert rows[9] == (10, "Rejected", 2)
+
+    @pytest.mark.asyncio
+    async def test_requeue_on_write_error(self, test_engine):
+        """Test that a result is returned to the queue when the status write fails."""
+
+        def unavailable():
+            raise ConnectionError("baza niedostępna")
+
+        consumer = ResultConsumer(None, unavailable)
+        consumer.writer.start()
+        message = FakeMessage({"id": 1, "status": "Completed", "version": 1})
+        try:
+            with pytest.raises(ConnectionError):
+                await consumer.on_message(message)
+        finally:
+            await consumer.stop()
+        assert message.outcome == "requeue"
+
+    def test_parse_result(self):
+        """Test result validation."""
+        assert parse_result(b'{"id": 1, "status": "Failed", "version": 2}')["status"] == "Failed"
+        for body in (b"nie-json", b'{"id": 1}', b'{"id": "1", "status": "Completed", "version": 1}'):
+            with pytest.raises(ValueError):
+                parse_result(body)
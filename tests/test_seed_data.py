@@ -0,0 +1,41 @@
+"""
+Tests for the synthetic data generator.
+"""
+
+import json
+import sqlite3
+
+import pytest
+
+from seed_data import WniosekGenerator, parse_args, seed
+
+
+class TestSeedData:
+    """Tests for seed_data CLI."""
+
+    def test_batch_shape(self):
+        """Test that generated rows have realistic, skewed values."""
+        owners = [f"user{i}@woz.example.com" for i in range(100)]
+        generator = WniosekGenerator(owners, companies=50, months=12, seed=1, sqlite=True)
+        rows = generator.batch(5000)
+
+        assert len(rows) == 5000
+        assert all(len(row) == 13 for row in rows)
+        # Rozkład Zipfa: najczęstszy właściciel ma wyraźnie ponad średnią (50)
+        top = max(sum(1 for r in rows if r[6] == o) for o in owners)
+        assert top > 500
+        assert all(isinstance(json.loads(r[10]), dict) for r in rows[:100])
+
+    @pytest.mark.asyncio
+    async def test_seed_sqlite(self, tmp_path):
+        """Test bulk load into a fresh SQLite database."""
+        path = tmp_path / "seed.db"
+        await seed(parse_args([
+            "--database-url", f"sqlite+aiosqlite:///{path}",
+            "--wnioski", "2500", "--users", "20", "--batch-size", "1000",
+        ]))
+
+        conn = sqlite3.connect(path)
+        assert conn.execute("SELECT COUNT(*) FROM wniosek").fetchone()[0] == 2500
+        assert conn.execute("SELECT COUNT(*) FROM user").fetchone()[0] == 20
+        conn.close()
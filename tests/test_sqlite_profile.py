@@ -0,0 +1,147 @@
+"""
+Tests for the SQLite WAL profile (reader/writer pools) and batched writes on it.
+"""
+
+import asyncio
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+
+from metrics import WRITE_BATCH_SIZE
+from models import Wniosek
+from sqlite_profile import configure_sqlite, profile_enabled, routing_session_class
+from status_writer import StatusWriter
+
+
+def _wniosek(n: int) -> Wniosek:
+    return Wniosek(title=f"W{n}", person="Jan", company="Firma", type_of_woz="Premia", payoff=100.0, owner="user")
+
+
+@pytest_asyncio.fixture
+async def engines(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'wnioski.db'}"
+    reader = create_async_engine(url, pool_size=4, max_overflow=0)
+    writer = create_async_engine(url, pool_size=1, max_overflow=0)
+    configure_sqlite(reader, writer=False)
+    configure_sqlite(writer, writer=True)
+    async with writer.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield reader, writer
+    await reader.dispose()
+    await writer.dispose()
+
+
+@pytest.fixture
+def session_factory(engines):
+    reader, writer = engines
+    return async_sessionmaker(
+        bind=reader, expire_on_commit=False, sync_session_class=routing_session_class(reader, writer)
+    )
+
+
+class TestSqliteProfile:
+    """Tests for pragmas, routing and concurrent writes."""
+
+    def test_profile_enabled(self, monkeypatch):
+        """Test that only file-based SQLite gets the profile."""
+        assert profile_enabled("sqlite+aiosqlite:///./wnioski.db")
+        assert not profile_enabled("sqlite+aiosqlite:///:memory:")
+        assert not profile_enabled("postgresql+asyncpg://u:p@db/woz")
+        monkeypatch.setenv("SQLITE_WAL", "false")
+        assert not profile_enabled("sqlite+aiosqlite:///./wnioski.db")
+
+    @pytest.mark.asyncio
+    async def test_pragmas_applied(self, engines):
+        """Test that every connection runs in WAL with busy_timeout."""
+        for engine in engines:
+            async with engine.connect() as conn:
+                assert (await conn.exec_driver_sql("PRAGMA journal_mode")).scalar() == "wal"
+                assert (await conn.exec_driver_sql("PRAGMA busy_timeout")).scalar() == 5000
+                assert (await conn.exec_driver_sql("PRAGMA foreign_keys")).scalar() == 1
+
+    @pytest.mark.asyncio
+    async def test_reads_use_reader_writes_stick_to_writer(self, engines, session_factory):
+        """Test that SELECT goes to the reader pool and a transaction stays on the writer after a write."""
+        reader, writer = engines
+        async with session_factory() as session:
+            sync = session.sync_session
+            assert sync.get_bind(clause=select(Wniosek)) is reader.sync_engine
+            session.add(_wniosek(1))
+            await session.flush()
+            assert sync.get_bind(clause=select(Wniosek)) is writer.sync_engine
+            # Odczyt w tej samej transakcji widzi własny, niezatwierdzony zapis
+            assert (await session.execute(select(func.count(Wniosek.id)))).scalar() == 1
+            await session.commit()
+            assert sync.get_bind(clause=select(Wniosek)) is reader.sync_engine
+
+    @pytest.mark.asyncio
+    async def test_write_session_reads_from_writer(self, engines, session_factory):
+        """Test that a session marked for write sends its reads to the writer too (one connection)."""
+        reader, writer = engines
+        async with session_factory() as session:
+            session.info["write"] = True
+            sync = session.sync_session
+            assert sync.get_bind(clause=select(Wniosek)) is writer.sync_engine
+            session.add(_wniosek(1))
+            await session.commit()
+            wniosek = (await session.execute(select(Wniosek))).scalars().first()
+            await session.delete(wniosek)
+            await session.commit()
+            assert sync.get_bind(clause=select(Wniosek)) is writer.sync_engine
+
+    @pytest.mark.asyncio
+    async def test_concurrent_writers_do_not_lock(self, engines, session_factory):
+        """Test that concurrent writes from two 'processes' (engines) succeed."""
+        url = engines[1].url
+        other = create_async_engine(url, pool_size=1, max_overflow=0)
+        configure_sqlite(other, writer=True)
+        other_sessions = async_sessionmaker(bind=other, expire_on_commit=False)
+
+        async def write(factory, n):
+            async with factory() as session:
+                session.add(_wniosek(n))
+                await session.commit()
+
+        try:
+            await asyncio.gather(*(
+                write(session_factory if n % 2 else other_sessions, n) for n in range(40)
+            ))
+        finally:
+            await other.dispose()
+
+        async with session_factory() as session:
+            assert (await session.execute(select(func.count(Wniosek.id)))).scalar() == 40
+
+
+class TestStatusWriterOnProfile:
+    """Tests for the batching StatusWriter on the WAL reader/writer pools."""
+
+    @pytest.mark.asyncio
+    async def test_batches_commits(self, session_factory):
+        """Test that concurrent claims through the routing session are committed together."""
+        async with session_factory() as session:
+            session.add_all([_wniosek(n) for n in range(30)])
+            await session.commit()
+
+        writer = StatusWriter(session_factory, max_batch=50, max_delay_ms=10)
+        writer.start()
+        before = WRITE_BATCH_SIZE.count()
+        try:
+            claimed = await asyncio.gather(*(writer.claim(n) for n in range(1, 31)))
+        finally:
+            await writer.stop()
+
+        assert [w.id for w in claimed] == list(range(1, 31))
+        assert WRITE_BATCH_SIZE.count() - before < 30
+        async with session_factory() as session:
+            statuses = (await session.execute(select(Wniosek.status).distinct())).scalars().all()
+        assert statuses == ["Processing"]
+
+    @pytest.mark.asyncio
+    async def test_requires_start(self, session_factory):
+        """Test that writing through a stopped queue fails fast."""
+        with pytest.raises(RuntimeError):
+            await StatusWriter(session_factory).claim(1)
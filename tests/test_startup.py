@@ -0,0 +1,76 @@
+"""
+Tests for fast API startup (lazy imports, background broker connection).
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+
+import pytest
+
+import main
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def loaded_modules(module: str, candidates) -> list:
+    """Importuje `module` w czystym interpreterze i zwraca załadowane moduły z `candidates`."""
+    code = (
+        f"import sys, {module}; "
+        f"print(' '.join(m for m in {list(candidates)!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return result.stdout.split()
+
+
+class TestStartup:
+    """Tests for startup cost of API and worker."""
+
+    def test_api_import_skips_heavy_modules(self):
+        """Test that importing the API does not load the broker, JWT, bcrypt or PDF libraries."""
+        assert loaded_modules("main", ["aio_pika", "jose", "bcrypt", "reportlab"]) == []
+
+    def test_worker_import_skips_reportlab(self):
+        """Test that ReportLab is loaded only when the first PDF is built (or preloaded)."""
+        assert loaded_modules("worker", ["reportlab"]) == []
+
+    def test_worker_import_skips_web_modules(self):
+        """Test that the worker does not load FastAPI or the search / hours DDL modules."""
+        assert loaded_modules("worker", ["fastapi", "starlette", "search", "hours"]) == []
+
+    @pytest.mark.asyncio
+    async def test_lifespan_does_not_wait_for_broker(self, monkeypatch):
+        """Test that the app starts while RabbitMQ is unreachable and becomes ready later."""
+        attempts = []
+        connected = asyncio.Event()
+
+        class Connection:
+            is_closed = False
+
+            async def close(self):
+                self.is_closed = True
+
+        async def fake_connect():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise ConnectionError("broker down")
+            connected.set()
+            return Connection()
+
+        async def no_db():
+            pass
+
+        monkeypatch.setattr(main, "connect_broker", fake_connect)
+        monkeypatch.setattr(main, "init_db", no_db)
+        monkeypatch.setattr(main, "BROKER_RETRY_DELAYS", [0])
+
+        async with main.lifespan(main.app):
+            assert main.app.state.rabbit_con is None or len(attempts) >= 3
+            await asyncio.wait_for(connected.wait(), timeout=1)
+            await asyncio.sleep(0)
+            assert main.app.state.rabbit_con is not None
+            connection = main.app.state.rabbit_con
+        assert connection.is_closed
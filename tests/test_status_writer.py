@@ -0,0 +1,103 @@
+"""
+Tests for the worker's write-coalescing StatusWriter.
+"""
+
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from metrics import WRITE_BATCH_SIZE
+from models import Wniosek
+from status_writer import StatusWriter, _rounds
+
+
+class FakeMessage:
+    """Minimalny odpowiednik aio_pika.IncomingMessage, zapisujący moment ack."""
+
+    def __init__(self, body: dict, events: list):
+        self.body = json.dumps(body).encode()
+        self.headers = {}
+        self.correlation_id = None
+        self.events = events
+
+    @asynccontextmanager
+    async def process(self, requeue=False):
+        yield
+        self.events.append("ack")
+
+
+@pytest.fixture
+def writer(test_engine):
+    return StatusWriter(async_sessionmaker(bind=test_engine, expire_on_commit=False), max_delay_ms=20)
+
+
+async def _statuses(test_engine):
+    async with async_sessionmaker(bind=test_engine)() as session:
+        rows = (await session.execute(select(Wniosek.id, Wniosek.status, Wniosek.version).order_by(Wniosek.id))).all()
+    return [tuple(row) for row in rows]
+
+
+class TestStatusWriter:
+    """Tests for StatusWriter."""
+
+    def test_rounds_split_duplicate_ids(self):
+        """Test that one id never appears twice in a single grouped UPDATE."""
+        batch = [(("claim", 1), "a"), (("claim", 2), "b"), (("finish", 1, "Completed", 2), "c")]
+        assert _rounds(batch) == [batch[:2], batch[2:]]
+
+    @pytest.mark.asyncio
+    async def test_coalesces_claims_and_finishes(self, client, test_engine, writer, sample_wniosek_data):
+        """Test that concurrent transitions are written in a few grouped commits."""
+        for _ in range(20):
+            await client.post("/wnioski/", json=sample_wniosek_data)
+        await client.put("/wnioski/20/status?new_status=Rejected")
+
+        writer.start()
+        before = WRITE_BATCH_SIZE.count()
+        try:
+            claimed = await asyncio.gather(*(writer.claim(i) for i in range(1, 22)))
+            assert [w.version for w in claimed[:19]] == [2] * 19
+            assert claimed[19] is None and claimed[20] is None
+
+            finished = await asyncio.gather(*(
+                writer.finish(w.id, "Completed" if w.id % 2 else "Failed", w.version) for w in claimed[:19]
+            ), writer.finish(1, "Completed", 2))
+        finally:
+            await writer.stop()
+
+        assert WRITE_BATCH_SIZE.count() - before <= 4
+        # Druga zmiana tego samego wniosku przegrywa (inna wersja)
+        assert finished == [True] * 19 + [False]
+        rows = await _statuses(test_engine)
+        assert rows[0] == (1, "Completed", 3)
+        assert rows[1] == (2, "Failed", 3)
+        assert rows[19] == (20, "Rejected", 2)
+
+    @pytest.mark.asyncio
+    async def test_ack_after_flush(self, client, test_engine, writer, sample_wniosek_data, tmp_path, monkeypatch):
+        """Test that the AMQP ack is sent only after the Completed status is committed."""
+        import worker
+
+        await client.post("/wnioski/", json=sample_wniosek_data)
+        events = []
+        execute = writer._execute
+
+        async def recording_execute(batch):
+            await execute(batch)
+            events.append("flush")
+
+        monkeypatch.setattr(writer, "_execute", recording_execute)
+        monkeypatch.setattr(worker, "status_writer", writer)
+        monkeypatch.setattr(worker, "PDF_OUTPUT_DIR", str(tmp_path))
+        writer.start()
+        try:
+            await worker.process_message(FakeMessage({"id": 1, "action": "generate_pdf"}, events))
+        finally:
+            await writer.stop()
+
+        assert events == ["flush", "flush", "ack"]
+        assert (await _statuses(test_engine))[0] == (1, "Completed", 3)
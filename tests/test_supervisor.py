@@ -0,0 +1,105 @@
+"""
+Tests for the multi-process worker supervisor.
+"""
+
+import asyncio
+import signal
+import time
+
+import pytest
+
+import supervisor
+from supervisor import BusyClock, Supervisor, desired_processes
+
+
+async def idle_worker(prefetch, busy, metrics_port):
+    """Proces-dziecko bez brokera: czeka na SIGTERM jak worker.main."""
+    stop = asyncio.Event()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+    busy.start()  # sygnał dla testu: handler zainstalowany
+    await stop.wait()
+    busy.stop()
+
+
+def wait_ready(sup):
+    wait_until(lambda: all(c.clock.total() > 0 for c in sup.active))
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timeout"
+        time.sleep(0.02)
+
+
+class TestScaling:
+    """Tests for the scaling policy."""
+
+    @pytest.mark.parametrize("current,depth,utilisation,expected", [
+        (1, 0, 0.0, 1),      # nie schodzimy poniżej minimum
+        (2, 0, 0.1, 1),      # pusta kolejka, bezczynne procesy
+        (2, 0, 0.9, 2),      # pusta kolejka, ale procesy zajęte
+        (2, 15, 0.9, 2),     # kolejka w granicach BACKLOG_PER_PROCESS
+        (2, 35, 0.9, 4),     # skok do ceil(depth / backlog)
+        (2, 21, 0.9, 3),     # co najmniej +1
+        (2, 500, 0.9, 6),    # nie powyżej maksimum
+        (2, 500, 0.2, 2),    # procesy bezczynne przy pełnej kolejce - nie skalujemy
+    ])
+    def test_desired_processes(self, current, depth, utilisation, expected):
+        """Test target process count for queue depth and utilisation."""
+        assert desired_processes(current, depth, utilisation, 1, 6, backlog_per_process=10) == expected
+
+    def test_scale_down_needs_several_idle_ticks(self):
+        """Test that the supervisor scales up at once but down only after SCALE_DOWN_AFTER ticks."""
+        sup = Supervisor(idle_worker, 1, 4, metrics_port=0)
+        assert sup.scale(100, 1.0) == 4
+        assert sup.scale(None, 0.0) == 4
+        for _ in range(supervisor.SCALE_DOWN_AFTER - 1):
+            assert sup.scale(0, 0.0) == 4
+        assert sup.scale(0, 0.0) == 3
+
+    def test_busy_clock(self):
+        """Test that busy time includes the job currently in progress."""
+        clock = BusyClock()
+        clock.start()
+        time.sleep(0.05)
+        assert clock.total() >= 0.05
+        clock.stop()
+        total = clock.total()
+        time.sleep(0.02)
+        assert clock.total() == total
+
+
+class TestSupervisor:
+    """Tests for child process management."""
+
+    def test_restart_scale_down_and_drain(self, monkeypatch):
+        """Test replacing a crashed child, draining surplus children and shutting down."""
+        monkeypatch.setattr(supervisor, "MIN_UPTIME", 0.0)
+        sup = Supervisor(idle_worker, 1, 3, metrics_port=0)
+        try:
+            sup.target = 2
+            sup.reconcile()
+            assert [c.slot for c in sup.active] == [0, 1]
+            wait_ready(sup)
+
+            crashed = sup.children[0]
+            crashed.process.kill()
+            wait_until(lambda: not crashed.process.is_alive())
+            sup.reconcile()
+            assert sup.restarts == 1
+            assert sorted(c.slot for c in sup.active) == [0, 1]
+            wait_ready(sup)
+
+            sup.target = 1
+            sup.reconcile()
+            assert len(sup.active) == 1
+            drained = next(c for c in sup.children if c.draining)
+            wait_until(lambda: not drained.process.is_alive())
+            assert drained.process.exitcode == 0
+            sup.reconcile()
+            assert sup.restarts == 1 and len(sup.children) == 1
+        finally:
+            processes = [c.process for c in sup.children]
+            sup.shutdown(timeout=5)
+        assert [p.exitcode for p in processes] == [0]
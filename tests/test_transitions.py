@@ -0,0 +1,69 @@
+"""
+Tests for conditional status updates (state machine + version column).
+"""
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from transitions import ALLOWED_TRANSITIONS, STATUSES, source_statuses
+
+
+class TestStateMachine:
+    """Tests for the transition table."""
+
+    def test_transitions_use_known_statuses(self):
+        """Test that every source and target is a known status."""
+        assert set(ALLOWED_TRANSITIONS) == set(STATUSES)
+        assert all(targets <= set(STATUSES) for targets in ALLOWED_TRANSITIONS.values())
+
+    def test_source_statuses(self):
+        """Test sources allowed for a target status."""
+        assert source_statuses("Completed") == ["Processing", "Waiting"]
+        assert source_statuses("Waiting") == ["Failed", "Rejected"]
+
+
+class TestConditionalUpdates:
+    """Tests for the single-row UPDATE ... WHERE status IN (...) AND version = :v."""
+
+    @pytest.mark.asyncio
+    async def test_update_status_versions(self, client, sample_wniosek_data):
+        """Test version bumps, stale versions and invalid transitions."""
+        await client.post("/wnioski/", json={**sample_wniosek_data, "version": 7})
+        assert (await client.get("/wnioski/1")).json()["version"] == 1
+
+        response = await client.put("/wnioski/1/status?new_status=Processing&version=1")
+        assert response.status_code == 200
+        assert response.json()["version"] == 2
+
+        response = await client.put("/wnioski/1/status?new_status=Completed&version=1")
+        assert response.status_code == 409
+        assert response.json()["detail"]["version"] == 2
+
+        response = await client.put("/wnioski/1/status?new_status=Waiting")
+        assert response.status_code == 409
+        assert response.json()["detail"]["status"] == "Processing"
+
+        response = await client.put("/wnioski/1/status?new_status=Processing")
+        assert response.status_code == 200
+        assert response.json() == {
+            "message": "Status bez zmian", "wniosek_id": 1, "new_status": "Processing", "version": 2,
+        }
+        assert (await client.put("/wnioski/99/status?new_status=Completed")).status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_worker_does_not_overwrite_rejection(self, client, test_engine, sample_wniosek_data, monkeypatch):
+        """Test that a payroll rejection during rendering wins over the worker's Completed."""
+        import worker
+
+        monkeypatch.setattr(worker, "SessionLocal", async_sessionmaker(bind=test_engine, expire_on_commit=False))
+        await client.post("/wnioski/", json=sample_wniosek_data)
+
+        wniosek = await worker.claim_wniosek(1)
+        assert (wniosek.status, wniosek.version) == ("Processing", 2)
+
+        assert (await client.put("/wnioski/1/status?new_status=Rejected")).status_code == 200
+        assert await worker.update_wniosek_status(1, "Completed", wniosek.version) is False
+        assert (await client.get("/wnioski/1")).json()["status"] == "Rejected"
+
+        # Zamknięty wniosek nie jest przejmowany ponownie (np. przy ponownym doręczeniu)
+        assert await worker.claim_wniosek(1) is None
@@ -0,0 +1,174 @@
+"""
+Statusy wniosków i dozwolone przejścia między nimi.
+
+Każda zmiana statusu to jeden warunkowy UPDATE (transition_statement):
+WHERE id = :id AND status IN (dozwolone źródła) [AND version = :v], z
+podbiciem wersji i RETURNING. Bez blokad i bez wcześniejszego SELECT -
+równoległe zmiany (payroll odrzuca, worker kończy PDF) nie nadpisują się;
+przegrana strona dostaje 0 wierszy.
+
+Zbiorcza zmiana statusu (PUT /wnioski/status) działa paczkami po
+BULK_CHUNK_SIZE identyfikatorów: jeden SELECT (obecne statusy) i jeden
+UPDATE ... WHERE id = ANY(...) AND status = ANY(...) RETURNING na paczkę,
+zamiast SELECT + UPDATE dla każdego wniosku. Warunek na status w UPDATE
+chroni przed zmianą, która zaszła między odczytem a zapisem (wynik
+"conflict").
+
+Worker zmienia statusy zbiorczo (status_writer.py): claim_statement przejmuje
+wiele wniosków jednym UPDATE ... WHERE id IN (...), a
+grouped_transition_statement kończy je jednym UPDATE z CASE id WHEN ...
+(status i oczekiwana wersja osobno dla każdego wniosku).
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Integer, String, any_, case, literal, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Wniosek
+
+STATUSES = ["Waiting", "Processing", "Completed", "Failed", "Rejected"]
+
+# Skąd można przejść do danego statusu (Processing/Failed ustawia worker)
+ALLOWED_TRANSITIONS: Dict[str, set] = {
+    "Waiting": {"Processing", "Completed", "Failed", "Rejected"},
+    "Processing": {"Completed", "Failed", "Rejected"},
+    "Completed": {"Rejected"},
+    "Failed": {"Waiting", "Rejected"},
+    "Rejected": {"Waiting"},
+}
+
+# Worker przejmuje zadanie także w statusie Processing (ponowne doręczenie
+# wiadomości po awarii procesu)
+CLAIMABLE_STATUSES = ["Waiting", "Processing"]
+
+BULK_CHUNK_SIZE = 500
+MAX_BULK_IDS = 10_000
+
+
+def is_allowed(old_status: str, new_status: str) -> bool:
+    return new_status in ALLOWED_TRANSITIONS.get(old_status, ())
+
+
+def source_statuses(new_status: str) -> List[str]:
+    """Statusy, z których wolno przejść do `new_status`."""
+    return sorted(s for s, targets in ALLOWED_TRANSITIONS.items() if new_status in targets)
+
+
+def transition_statement(
+    wniosek_id: int,
+    new_status: str,
+    sources: Sequence[str],
+    expected_version: Optional[int] = None,
+    returning: Sequence = (Wniosek.owner, Wniosek.version),
+):
+    """Warunkowa zmiana statusu jednego wniosku (0 wierszy = konflikt lub brak)."""
+    statement = (
+        update(Wniosek)
+        .where(Wniosek.id == wniosek_id, Wniosek.status.in_(sources))
+        .values(status=new_status, version=Wniosek.version + 1)
+    )
+    if expected_version is not None:
+        statement = statement.where(Wniosek.version == expected_version)
+    return statement.returning(*returning).execution_options(synchronize_session=False)
+
+
+def claim_statement(ids: Sequence[int]):
+    """Przejęcie wniosków `ids` przez workera (-> Processing), RETURNING całych wierszy."""
+    return (
+        update(Wniosek)
+        .where(Wniosek.id.in_(ids), Wniosek.status.in_(CLAIMABLE_STATUSES))
+        .values(status="Processing", version=Wniosek.version + 1)
+        .returning(Wniosek)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def grouped_transition_statement(targets: Dict[int, Tuple[str, int]], sources: Sequence[str]):
+    """
+    Zmiana statusu wielu wniosków jednym UPDATE: `targets` to id -> (nowy
+    status, oczekiwana wersja). Wiersze z inną wersją lub statusem spoza
+    `sources` nie są zmieniane (brak w RETURNING id, owner).
+    """
+    ids = list(targets)
+    return (
+        update(Wniosek)
+        .where(
+            Wniosek.id.in_(ids),
+            Wniosek.status.in_(sources),
+            Wniosek.version == case({i: v for i, (_, v) in targets.items()}, value=Wniosek.id),
+        )
+        .values(
+            status=case({i: s for i, (s, _) in targets.items()}, value=Wniosek.id),
+            version=Wniosek.version + 1,
+        )
+        .returning(Wniosek.id, Wniosek.owner)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _any(column, values: Sequence, item_type, dialect: str):
+    # PostgreSQL: jeden parametr-tablica (stały tekst zapytania dla cache
+    # prepared statements asyncpg); SQLite: zwykłe IN
+    if dialect == "postgresql":
+        return column == any_(literal(list(values), ARRAY(item_type)))
+    return column.in_(values)
+
+
+def _chunks(ids: Sequence[int], size: int) -> Iterable[Sequence[int]]:
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+async def apply_transitions(
+    session: AsyncSession,
+    ids: Sequence[int],
+    new_status: str,
+    chunk_size: int = BULK_CHUNK_SIZE,
+) -> Tuple[List[dict], set]:
+    """
+    Zmienia status wniosków `ids` (bez commit). Zwraca wynik dla każdego id
+    (updated / unchanged / invalid_transition / conflict / not_found) oraz
+    właścicieli zmienionych wniosków - do jednego bump_versions.
+    """
+    dialect = session.bind.dialect.name if session.bind is not None else "sqlite"
+    sources = source_statuses(new_status)
+    ids = list(dict.fromkeys(ids))
+    results: Dict[int, dict] = {}
+    owners = set()
+
+    for chunk in _chunks(ids, chunk_size):
+        current = dict((await session.execute(
+            select(Wniosek.id, Wniosek.status).where(_any(Wniosek.id, chunk, Integer, dialect))
+        )).all())
+
+        candidates = []
+        for wniosek_id in chunk:
+            old_status = current.get(wniosek_id)
+            if old_status is None:
+                results[wniosek_id] = {"id": wniosek_id, "result": "not_found"}
+            elif old_status == new_status:
+                results[wniosek_id] = {"id": wniosek_id, "result": "unchanged", "old_status": old_status}
+            elif not is_allowed(old_status, new_status):
+                results[wniosek_id] = {"id": wniosek_id, "result": "invalid_transition", "old_status": old_status}
+            else:
+                candidates.append(wniosek_id)
+        if not candidates:
+            continue
+
+        updated = (await session.execute(
+            update(Wniosek)
+            .where(_any(Wniosek.id, candidates, Integer, dialect))
+            .where(_any(Wniosek.status, sources, String, dialect))
+            .values(status=new_status, version=Wniosek.version + 1)
+            .returning(Wniosek.id, Wniosek.owner)
+            .execution_options(synchronize_session=False)
+        )).all()
+        for wniosek_id, owner in updated:
+            results[wniosek_id] = {"id": wniosek_id, "result": "updated", "old_status": current[wniosek_id]}
+            owners.add(owner)
+        for wniosek_id in candidates:
+            results.setdefault(wniosek_id, {"id": wniosek_id, "result": "conflict", "old_status": current[wniosek_id]})
+
+    return [results[wniosek_id] for wniosek_id in ids], owners